@@ -0,0 +1,160 @@
+'''
+Measures the command throughput of the board design itself.
+
+Scripted command streams are sent to a simulated BoardComponent through
+the uart, pipelined as far as credit based flow control allows, as the
+host client does. Throughput is measured in simulated uart bit times and
+reported at the given baudrate, as all uart timing derives from the baud
+ticks. The clock cycles taken by the controller count as bit times of the
+simulated clock-to-baud ratio, so that a low baud_div slightly overstates
+the processing latency. The results are written as JSON:
+
+    python -m benchmarks.protocol -b 9600 -o results.json
+'''
+
+import argparse, itertools, json, random, sys
+from collections import OrderedDict
+
+from fpgaedu import ControllerSpec, CreditWindow, FrameDecoder, encode_frame
+from fpgaedu.hdl.nexys4 import BoardSimulation
+
+SEED = 1
+_BITS_PER_BYTE = 10
+# Number of bit times simulated between checks for responses and credits
+_RUN_BITS = _BITS_PER_BYTE
+
+def stream_read(spec, rand):
+    while True:
+        yield spec.addr_type_message(spec.opcode_cmd_read,
+                rand.randrange(256), 0)
+
+def stream_write(spec, rand):
+    while True:
+        yield spec.addr_type_message(spec.opcode_cmd_write,
+                rand.randrange(256), rand.randrange(256))
+
+def stream_step(spec, rand):
+    while True:
+        yield spec.value_type_message(spec.opcode_cmd_step, 0)
+
+def stream_mixed(spec, rand):
+    streams = [stream_read(spec, rand), stream_write(spec, rand),
+            stream_step(spec, rand)]
+    while True:
+        yield next(rand.choice(streams))
+
+def stream_escape(spec, rand):
+    '''
+    Writes in which every address and data byte is a control character,
+    the worst case for the frame length
+    '''
+    control_chars = [spec.chr_start, spec.chr_stop, spec.chr_esc]
+    while True:
+        addr = 0
+        for i in range(spec.width_addr // 8):
+            addr = (addr << 8) | rand.choice(control_chars)
+        yield spec.addr_type_message(spec.opcode_cmd_write, addr,
+                rand.choice(control_chars))
+
+STREAMS = OrderedDict([
+    ('read', stream_read),
+    ('write', stream_write),
+    ('step', stream_step),
+    ('mixed', stream_mixed),
+    ('escape', stream_escape),
+])
+
+def run_stream(spec, stream, count, baudrate, baud_div, timeout_bits=10**6):
+    '''
+    Sends count commands of stream to a simulated board and returns the
+    throughput figures.
+    '''
+    messages = list(itertools.islice(stream(spec, random.Random(SEED)),
+        count))
+    simulation = BoardSimulation(spec, baud_div=baud_div)
+    decoder = FrameDecoder(spec)
+    try:
+        simulation.reset_board()
+        # The receive buffer is empty after reset
+        window = CreditWindow(simulation.rx_fifo_depth)
+        bits = 0
+        rx_bytes = tx_bytes = responses = 0
+        pending = list(reversed(messages))
+
+        while responses < count and bits < timeout_bits:
+            while pending:
+                frame = encode_frame(spec, pending[-1])
+                if not window.can_send(len(frame)):
+                    break
+                pending.pop()
+                window.sent(len(frame))
+                simulation.write(frame)
+                rx_bytes += len(frame)
+            simulation.run(_RUN_BITS)
+            bits += _RUN_BITS
+            data = simulation.read()
+            tx_bytes += len(data)
+            for message in decoder.feed(data):
+                responses += 1
+                window.release()
+    finally:
+        simulation.close()
+
+    if responses < count:
+        raise RuntimeError('%d of %d responses received' % (responses,
+            count))
+
+    seconds = float(bits) / baudrate
+    return OrderedDict([
+        ('commands', count),
+        ('simulated_seconds', round(seconds, 6)),
+        ('commands_per_second', round(count / seconds, 2)),
+        ('wire_bytes_per_command', round(float(rx_bytes + tx_bytes) /
+            count, 3)),
+        ('rx_bytes_per_command', round(float(rx_bytes) / count, 3)),
+        ('tx_bytes_per_command', round(float(tx_bytes) / count, 3)),
+        ('rx_idle_fraction', round(1 - float(rx_bytes * _BITS_PER_BYTE) /
+            bits, 4)),
+        ('tx_idle_fraction', round(1 - float(tx_bytes * _BITS_PER_BYTE) /
+            bits, 4))])
+
+def _parse_args():
+    '''
+    Parses the command line arguments.
+    '''
+    parser = argparse.ArgumentParser(description='Benchmarks the command \
+            throughput of the board design in simulated time.')
+    parser.add_argument('-o', '--output', default=None,
+            help='The JSON output file. Defaults to standard output.')
+    parser.add_argument('-b', '--baudrate', type=int, default=9600)
+    parser.add_argument('-n', '--commands', type=int, default=100,
+            help='The number of commands per stream.')
+    parser.add_argument('-d', '--baudDiv', type=int, default=16,
+            help='The number of simulated clock cycles per uart bit.')
+    parser.add_argument('-s', '--streams', nargs='+', default=None,
+            choices=list(STREAMS), help='The command streams to run.')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = _parse_args()
+
+    spec = ControllerSpec(32, 8)
+    results = OrderedDict()
+    for name in args.streams or STREAMS:
+        results[name] = run_stream(spec, STREAMS[name], args.commands,
+                args.baudrate, args.baudDiv)
+        sys.stderr.write('%-10s %10.2f commands/s %8.2f bytes/command\n' % (
+            name, results[name]['commands_per_second'],
+            results[name]['wire_bytes_per_command']))
+
+    report = OrderedDict([
+        ('baudrate', args.baudrate),
+        ('baud_div', args.baudDiv),
+        ('results', results)])
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
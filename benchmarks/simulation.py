@@ -0,0 +1,291 @@
+'''
+Measures how fast the myhdl models of the hdl modules simulate.
+
+Every module is simulated with realistic stimulus for a number of clock
+cycles, reporting the simulated clock cycles per wall second and the peak
+memory allocated during elaboration and simulation. The results are written
+to a JSON file, so that they can be compared between commits:
+
+    python -m benchmarks.simulation -o results.json
+'''
+
+import argparse, itertools, json, platform, random, subprocess, sys, time
+import tracemalloc
+from collections import OrderedDict
+
+import myhdl
+from myhdl import (Signal, ResetSignal, intbv, always, instance,
+        Simulation)
+
+from fpgaedu import ControllerSpec, encode_frame
+from fpgaedu.hdl import (ClockGen, BaudGen, UartRx, UartTx, Fifo,
+        BlockRamFifo, MessageReceiver, MessageTransmitter, Controller,
+        uart_transitions, UartStimulus)
+from fpgaedu.hdl.nexys4 import BoardComponent
+
+HALF_PERIOD = 5
+PERIOD = 2 * HALF_PERIOD
+# Clock cycles per uart bit
+BAUD_DIV = 16
+RX_DIV = 8
+SEED = 1
+
+def _reset_signal():
+    return ResetSignal(False, active=True, isasync=False)
+
+def _random_commands(spec, rand, count=256):
+    '''
+    Returns an endless iterator over count random read and write command
+    messages, which include the protocol's control characters as data. The
+    messages are generated up front, to keep the cost of the stimulus out
+    of the measurement.
+    '''
+    control_chars = [spec.chr_start, spec.chr_stop, spec.chr_esc]
+    messages = []
+    for i in range(count):
+        addr = rand.randrange(64)
+        data = rand.choice(control_chars + [rand.randrange(256)])
+        opcode = rand.choice([spec.opcode_cmd_read, spec.opcode_cmd_write])
+        messages.append(spec.addr_type_message(opcode, addr, data))
+    return itertools.cycle(messages)
+
+def _frame_bytes(spec, rand):
+    '''
+    Returns the bytes of random command frames
+    '''
+    messages = itertools.islice(_random_commands(spec, rand), 256)
+    return bytearray(b''.join(encode_frame(spec, message)
+        for message in messages))
+
+def _uart_line_driver(line, data):
+    '''
+    Drives line endlessly with the uart frames of the bytes in data
+    '''
+    return UartStimulus(line, uart_transitions(data, BAUD_DIV * PERIOD),
+            repeat=True)
+
+def bench_baudgen(spec, clk, rand):
+    rx_tick = Signal(False)
+    tx_tick = Signal(False)
+    return BaudGen(clk, _reset_signal(), rx_tick, tx_tick, rx_div=RX_DIV,
+            baud_div=BAUD_DIV)
+
+def bench_uart_tx(spec, clk, rand):
+    reset = _reset_signal()
+    tick = Signal(False)
+    tx = Signal(True)
+    tx_data = Signal(intbv(0)[8:0])
+    tx_start = Signal(False)
+    tx_busy = Signal(False)
+    baudgen = BaudGen(clk, reset, Signal(False), tick, rx_div=RX_DIV,
+            baud_div=BAUD_DIV)
+    uart_tx = UartTx(clk, reset, tx, tx_data, tx_start, tx_busy, tick)
+
+    @always(clk.posedge)
+    def stimulus():
+        tx_start.next = not tx_busy and not tx_start
+        tx_data.next = rand.randrange(256)
+
+    return baudgen, uart_tx, stimulus
+
+def bench_uart_rx(spec, clk, rand):
+    reset = _reset_signal()
+    tick = Signal(False)
+    rx = Signal(True)
+    baudgen = BaudGen(clk, reset, tick, Signal(False), rx_div=RX_DIV,
+            baud_div=BAUD_DIV)
+    uart_rx = UartRx(clk, reset, rx, Signal(intbv(0)[8:0]), Signal(False),
+            Signal(False), tick, rx_div=RX_DIV)
+    driver = _uart_line_driver(rx, bytearray(rand.randrange(256)
+        for i in range(256)))
+    return baudgen, uart_rx, driver
+
+def _bench_fifo(fifo_type, depth):
+    def bench(spec, clk, rand):
+        din = Signal(intbv(0)[8:0])
+        enqueue = Signal(False)
+        dequeue = Signal(False)
+        fifo = fifo_type(clk, _reset_signal(), din, enqueue,
+                Signal(intbv(0)[8:0]), dequeue, Signal(False), Signal(False),
+                depth=depth)
+
+        @always(clk.posedge)
+        def stimulus():
+            din.next = rand.randrange(256)
+            enqueue.next = rand.random() < 0.5
+            dequeue.next = rand.random() < 0.5
+
+        return fifo, stimulus
+    return bench
+
+bench_fifo = _bench_fifo(Fifo, 16)
+bench_block_ram_fifo = _bench_fifo(BlockRamFifo, 2048)
+
+def bench_message_receiver(spec, clk, rand):
+    fifo_data = Signal(intbv(0)[8:0])
+    fifo_empty = Signal(True)
+    fifo_dequeue = Signal(False)
+    message_ready = Signal(False)
+    receive_next = Signal(False)
+    receiver = MessageReceiver(spec, clk, _reset_signal(), fifo_data,
+            fifo_empty, fifo_dequeue, Signal(intbv(0)[spec.width_message:0]),
+            message_ready, receive_next)
+    data = itertools.cycle(_frame_bytes(spec, rand))
+
+    # Models a receive fifo that always holds data
+    @instance
+    def stimulus():
+        fifo_data.next = next(data)
+        fifo_empty.next = False
+        while True:
+            yield clk.posedge
+            if fifo_dequeue:
+                fifo_data.next = next(data)
+            receive_next.next = message_ready
+
+    return receiver, stimulus
+
+def bench_message_transmitter(spec, clk, rand):
+    message = Signal(intbv(0)[spec.width_message:0])
+    ready = Signal(False)
+    transmit_next = Signal(False)
+    transmitter = MessageTransmitter(spec, clk, _reset_signal(),
+            Signal(intbv(0)[8:0]), Signal(False), Signal(False), message,
+            ready, transmit_next)
+    messages = _random_commands(spec, rand)
+
+    @always(clk.posedge)
+    def stimulus():
+        transmit_next.next = ready and not transmit_next
+        if ready:
+            message.next = next(messages)
+
+    return transmitter, stimulus
+
+def bench_controller(spec, clk, rand):
+    rx_msg = Signal(intbv(0)[spec.width_message:0])
+    rx_ready = Signal(False)
+    exp_addr = Signal(intbv(0)[spec.width_addr:0])
+    exp_data_read = Signal(intbv(0)[spec.width_data:0])
+    controller = Controller(spec, clk, _reset_signal(), rx_msg,
+            Signal(False), rx_ready, Signal(intbv(0)[spec.width_message:0]),
+            Signal(False), Signal(True), exp_addr,
+            Signal(intbv(0)[spec.width_data:0]), exp_data_read,
+            Signal(False), Signal(False), Signal(False))
+    messages = _random_commands(spec, rand)
+
+    # A command every few cycles, as when messages arrive back to back
+    @always(clk.posedge)
+    def stimulus():
+        rx_ready.next = rand.random() < 0.25
+        rx_msg.next = next(messages)
+        exp_data_read.next = int(exp_addr.val) % 256
+
+    return controller, stimulus
+
+def bench_board_component(spec, clk, rand):
+    rx = Signal(True)
+    exp_addr = Signal(intbv(0)[spec.width_addr:0])
+    exp_data_read = Signal(intbv(0)[spec.width_data:0])
+    board_component = BoardComponent(spec, clk, _reset_signal(), rx,
+            Signal(True), exp_addr, Signal(intbv(0)[spec.width_data:0]),
+            exp_data_read, Signal(False), Signal(False), Signal(False),
+            Signal(False), baud_div=BAUD_DIV)
+    driver = _uart_line_driver(rx, _frame_bytes(spec, rand))
+
+    @always(clk.posedge)
+    def experiment():
+        exp_data_read.next = int(exp_addr.val) % 256
+
+    return board_component, driver, experiment
+
+BENCHMARKS = OrderedDict([
+    ('BaudGen', bench_baudgen),
+    ('UartTx', bench_uart_tx),
+    ('UartRx', bench_uart_rx),
+    ('Fifo', bench_fifo),
+    ('BlockRamFifo', bench_block_ram_fifo),
+    ('MessageReceiver', bench_message_receiver),
+    ('MessageTransmitter', bench_message_transmitter),
+    ('Controller', bench_controller),
+    ('BoardComponent', bench_board_component),
+])
+
+def _simulate(bench, spec, cycles):
+    '''
+    Elaborates and simulates bench, returning the elaboration and
+    simulation times in seconds.
+    '''
+    start = time.time()
+    clk = Signal(False)
+    instances = bench(spec, clk, random.Random(SEED))
+    sim = Simulation(ClockGen(clk, HALF_PERIOD), instances)
+    elaborated = time.time()
+    sim.run(cycles * PERIOD, quiet=True)
+    sim.quit()
+    return elaborated - start, time.time() - elaborated
+
+def run_benchmark(bench, spec, cycles):
+    '''
+    Runs bench twice, first for timing and then with memory tracing, which
+    slows down the simulation.
+    '''
+    elaborate_time, simulate_time = _simulate(bench, spec, cycles)
+    tracemalloc.start()
+    try:
+        _simulate(bench, spec, cycles)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return OrderedDict([
+        ('cycles', cycles),
+        ('elaborate_seconds', round(elaborate_time, 4)),
+        ('simulate_seconds', round(simulate_time, 4)),
+        ('cycles_per_second', round(cycles / simulate_time, 1)),
+        ('peak_memory_bytes', peak)])
+
+def _environment():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return OrderedDict([
+        ('commit', commit),
+        ('python', platform.python_version()),
+        ('myhdl', myhdl.__version__),
+        ('platform', platform.platform())])
+
+def _parse_args():
+    '''
+    Parses the command line arguments.
+    '''
+    parser = argparse.ArgumentParser(description='Benchmarks the \
+            simulation speed of the hdl modules.')
+    parser.add_argument('-o', '--output', default=None,
+            help='The JSON output file. Defaults to standard output.')
+    parser.add_argument('-c', '--cycles', type=int, default=20000,
+            help='The number of clock cycles to simulate per module.')
+    parser.add_argument('-m', '--modules', nargs='+', default=None,
+            choices=list(BENCHMARKS), help='The modules to benchmark.')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = _parse_args()
+
+    spec = ControllerSpec(32, 8)
+    results = OrderedDict()
+    for name in args.modules or BENCHMARKS:
+        results[name] = run_benchmark(BENCHMARKS[name], spec, args.cycles)
+        sys.stderr.write('%-20s %12.1f cycles/s\n' % (name,
+            results[name]['cycles_per_second']))
+
+    report = OrderedDict([('environment', _environment()),
+        ('results', results)])
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -1 +1,27 @@
 from ._controllerspec import ControllerSpec
+from ._codec import Response, encode_frame, decode_response, FrameDecoder
+from ._client import Client, CreditWindow, Batch, ResponseTimeoutError
+from ._mirror import MemoryMirror
+from ._controller_model import ControllerModel
+from ._discovery import (BoardInfo, DiscoveryCache, candidate_ports, probe,
+        identify, discover_boards)
+from ._scheduler import Board, Job, Scheduler
+from ._mux_server import MuxServer
+from ._transport import (Transport, SerialTransport, SocketTransport,
+        EmulatorTransport, open_transport)
+
+# The hdl subpackages depend on myhdl, which host tools do not need. They
+# are imported on first access.
+_SUBPACKAGES = ('hdl',)
+# The emulator serves on a pty, which is not available on all platforms.
+# It is imported on first access, by the module it is defined in.
+_LAZY_ATTRIBUTES = {'BoardEmulator': '._emulator'}
+
+def __getattr__(name):
+    import importlib
+    if name in _SUBPACKAGES:
+        return importlib.import_module('.' + name, __name__)
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -0,0 +1,349 @@
+import time
+from collections import deque, OrderedDict
+
+from ._codec import encode_frame, decode_response, FrameDecoder
+
+class ResponseTimeoutError(Exception):
+    pass
+
+class CreditWindow(object):
+    '''
+    Bookkeeping for credit based flow control.
+
+    Every byte of a command frame occupies the board's receive buffer until
+    the frame has been processed, which is known for certain once its
+    response has arrived. By keeping the number of bytes in frames without
+    a response at or below the free capacity advertised by the board, the
+    receive buffer can never overflow. A single frame is always allowed when
+    nothing is outstanding, as the board drains a frame while it is being
+    received.
+    '''
+
+    def __init__(self, credits):
+        self.credits = credits
+        self.used = 0
+        self._outstanding = deque()
+
+    @property
+    def outstanding(self):
+        return len(self._outstanding)
+
+    def can_send(self, size):
+        return not self._outstanding or self.used + size <= self.credits
+
+    def sent(self, size):
+        self._outstanding.append(size)
+        self.used += size
+
+    def release(self):
+        self.used -= self._outstanding.popleft()
+
+class Batch(object):
+    '''
+    Writes buffered by Client.batch. Repeated writes to an address are
+    coalesced into the last one, and the buffered writes are sent together
+    when the batch ends, or before a command that depends on them.
+
+    responses
+        The responses to the writes sent so far
+    coalesced
+        Number of writes that replaced a buffered write to the same address
+    '''
+
+    def __init__(self, client):
+        self.client = client
+        self.responses = []
+        self.coalesced = 0
+        self._writes = OrderedDict()
+
+    def write(self, addr, data):
+        if addr in self._writes:
+            self.coalesced += 1
+            # Sent in the order of the last write to every address
+            del self._writes[addr]
+        self._writes[addr] = data
+
+    def depends(self, message):
+        '''
+        Whether sending message requires the buffered writes to be sent
+        first. Only reads of other addresses do not.
+        '''
+        spec = self.client.spec
+        return bool(self._writes) and not (
+                spec.parse_opcode(message) == spec.opcode_cmd_read and
+                spec.parse_addr(message) not in self._writes)
+
+    def flush(self):
+        '''
+        Sends the buffered writes, in a single write to the connection if
+        the credit window allows, and waits for their responses.
+        '''
+        spec = self.client.spec
+        messages = [spec.addr_type_message(spec.opcode_cmd_write, addr, data)
+                for addr, data in self._writes.items()]
+        self._writes.clear()
+        self.client._send_all(messages)
+        self.responses.extend(self.client.receive() for _ in messages)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.client._batch = None
+        # The writes of a batch that raised are dropped rather than sent
+        # half done, also so that a failing flush cannot hide the error
+        if exc_info[0] is None:
+            self.flush()
+        else:
+            self._writes.clear()
+
+class Client(object):
+    '''
+    Host-side client for the controller protocol.
+
+    connection
+        Transport, or serial-port-like object providing write(data) and
+        read(size). Connections that provide readinto(buffer) are read into
+        a buffer of the client without copying.
+    timeout
+        Number of seconds to wait for a response before raising
+        ResponseTimeoutError
+    mirror
+        Optional MemoryMirror, from which read serves the addresses that
+        cannot have changed since they were last read or written
+
+    Event responses, sent by the board when it changes mode, do not answer
+    a command. They are passed to the registered event handlers as soon as
+    they are read, and never returned by receive.
+    '''
+
+    def __init__(self, spec, connection, timeout=1.0, mirror=None):
+        self.spec = spec
+        self.connection = connection
+        self.timeout = timeout
+        self.mirror = mirror
+        self.window = None
+        self._decoder = FrameDecoder(spec)
+        self._messages = deque()
+        self._responses = deque()
+        self._event_handlers = []
+        self._batch = None
+        self._buffer = bytearray(256)
+
+    def add_event_handler(self, handler):
+        '''
+        Registers handler to be called with the Response of every event
+        received from the board.
+        '''
+        self._event_handlers.append(handler)
+
+    def remove_event_handler(self, handler):
+        self._event_handlers.remove(handler)
+
+    def poll(self):
+        '''
+        Reads the data that has arrived without blocking, dispatching the
+        events it contains.
+        '''
+        size = getattr(self.connection, 'in_waiting', 0)
+        if size:
+            self._feed(self._read(size))
+
+    def sync_credits(self):
+        '''
+        Waits for all outstanding responses, queries the free receive
+        capacity of the board and uses it as the credit window for
+        subsequent commands. Returns the number of credits.
+        '''
+        while self.window is not None and self.window.outstanding > 0:
+            self._responses.append(self._read_response())
+        self.window = None
+        response = self.command(self.spec.value_type_message(
+            self.spec.opcode_cmd_credit, 0))
+        self.window = CreditWindow(response.value)
+        return response.value
+
+    def drain(self):
+        '''
+        Waits for the responses to all commands sent, and drops them along
+        with the responses that have not been returned yet. The credit
+        window counts the commands awaiting their response, so that
+        without one only the responses that have arrived are dropped.
+        '''
+        self.poll()
+        while self.window is not None and self.window.outstanding > 0:
+            self._read_response()
+        self._messages.clear()
+        self._responses.clear()
+
+    def send(self, message):
+        '''
+        Sends a command message without waiting for its response. When a
+        credit window is set, blocks until the window allows the frame to be
+        sent.
+        '''
+        if self._batch is not None and self._batch.depends(message):
+            self._batch.flush()
+        self._send_all([message])
+
+    def _send_all(self, messages):
+        '''
+        Sends the command messages with as few writes to the connection as
+        the credit window allows.
+        '''
+        data = bytearray()
+        for message in messages:
+            frame = encode_frame(self.spec, message)
+            if self.window is not None:
+                if not self.window.can_send(len(frame)) and data:
+                    self.connection.write(bytes(data))
+                    data = bytearray()
+                while not self.window.can_send(len(frame)):
+                    self._responses.append(self._read_response())
+                self.window.sent(len(frame))
+            if self.mirror is not None:
+                self.mirror.sent(message)
+            data.extend(frame)
+        if data:
+            self.connection.write(bytes(data))
+
+    def batch(self):
+        '''
+        Returns a context manager that buffers the writes made through this
+        client until it exits, returning None instead of their responses.
+        Repeated writes to the same address are coalesced, and all buffered
+        writes are sent at once, when the batch exits or before any command
+        other than a read of an address that is not written. The Batch
+        collects the responses of the writes. When the with block raises,
+        the writes that are still buffered are discarded.
+        '''
+        if self._batch is not None:
+            raise ValueError('a batch is already in progress')
+        self._batch = Batch(self)
+        return self._batch
+
+    def receive(self):
+        '''
+        Returns the response to the oldest command sent for which no
+        response has been returned yet.
+        '''
+        if self._responses:
+            return self._responses.popleft()
+        return self._read_response()
+
+    def receive_available(self):
+        '''
+        Reads the data that has arrived without blocking, and returns the
+        responses that have not been returned yet, oldest first.
+        '''
+        self.poll()
+        while self._messages:
+            self._responses.append(self._pop_response())
+        responses = list(self._responses)
+        self._responses.clear()
+        return responses
+
+    def command(self, message):
+        self.send(message)
+        return self.receive()
+
+    def transact(self, messages):
+        '''
+        Sends all command messages, pipelined as far as the credit window
+        allows, and returns the list of responses.
+        '''
+        if self.window is None:
+            self.sync_credits()
+        responses = []
+        for message in messages:
+            self.send(message)
+            while self._responses:
+                responses.append(self._responses.popleft())
+        while len(responses) < len(messages):
+            responses.append(self.receive())
+        return responses
+
+    def _read_response(self):
+        deadline = time.time() + self.timeout
+        # Data read earlier may hold several responses
+        while not self._messages:
+            self._feed(self._read(getattr(self.connection, 'in_waiting', 0)
+                or 1))
+            # Bytes that are no frame, such as noise on the line, do not
+            # extend the deadline
+            if not self._messages and time.time() > deadline:
+                raise ResponseTimeoutError('no response within %s seconds' %
+                        self.timeout)
+        return self._pop_response()
+
+    def _read(self, size):
+        readinto = getattr(self.connection, 'readinto', None)
+        if readinto is None:
+            return self.connection.read(size)
+        if len(self._buffer) < size:
+            # Replaced rather than resized, as memoryviews of it may exist
+            self._buffer = bytearray(size)
+        view = memoryview(self._buffer)
+        return view[:readinto(view[:size])]
+
+    def _pop_response(self):
+        if self.window is not None and self.window.outstanding > 0:
+            self.window.release()
+        response = decode_response(self.spec, self._messages.popleft())
+        if self.mirror is not None:
+            self.mirror.received(response)
+        return response
+
+    def _feed(self, data):
+        for message in self._decoder.feed(data):
+            if self.spec.is_event_response(self.spec.parse_opcode(message)):
+                event = decode_response(self.spec, message)
+                if self.mirror is not None:
+                    self.mirror.received(event)
+                for handler in list(self._event_handlers):
+                    handler(event)
+            else:
+                self._messages.append(message)
+
+    def read(self, addr):
+        message = self.spec.addr_type_message(self.spec.opcode_cmd_read, addr,
+                0)
+        if self._batch is not None and self._batch.depends(message):
+            self._batch.flush()
+        if self.mirror is not None:
+            data = self.mirror.lookup(addr)
+            if data is not None:
+                return decode_response(self.spec, self.spec.addr_type_message(
+                    self.spec.opcode_res_read_success, addr, data))
+        return self.command(message)
+
+    def write(self, addr, data):
+        if self._batch is not None:
+            self._batch.write(addr, data)
+            return None
+        return self.command(self.spec.addr_type_message(
+            self.spec.opcode_cmd_write, addr, data))
+
+    def reset(self):
+        return self.command(self.spec.value_type_message(
+            self.spec.opcode_cmd_reset, 0))
+
+    def step(self):
+        return self.command(self.spec.value_type_message(
+            self.spec.opcode_cmd_step, 0))
+
+    def start(self):
+        return self.command(self.spec.value_type_message(
+            self.spec.opcode_cmd_start, 0))
+
+    def pause(self):
+        return self.command(self.spec.value_type_message(
+            self.spec.opcode_cmd_pause, 0))
+
+    def status(self):
+        return self.command(self.spec.value_type_message(
+            self.spec.opcode_cmd_status, 0))
+
+    def stat(self, index):
+        return self.command(self.spec.addr_type_message(
+            self.spec.opcode_cmd_stat, index, 0))
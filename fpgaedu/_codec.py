@@ -0,0 +1,79 @@
+from collections import namedtuple
+
+Response = namedtuple('Response', ['opcode', 'addr', 'data', 'value'])
+
+def encode_frame(spec, message):
+    '''
+    Returns the wire representation of message: the message bytes, most
+    significant first, enclosed by the start and stop characters. Message
+    bytes equal to one of the control characters are prefixed with the
+    escape character.
+    '''
+    control_chars = (spec.chr_start, spec.chr_stop, spec.chr_esc)
+    frame = bytearray([spec.chr_start])
+    for i in reversed(range(spec.width_message_bytes)):
+        byte = (message >> (8*i)) & 0xFF
+        if byte in control_chars:
+            frame.append(spec.chr_esc)
+        frame.append(byte)
+    frame.append(spec.chr_stop)
+    return bytes(frame)
+
+def decode_response(spec, message):
+    '''
+    Splits a response message into its opcode, address, data and value
+    fields. Whether the address and data or the value field is meaningful
+    depends on the opcode.
+    '''
+    return Response(opcode=spec.parse_opcode(message),
+            addr=spec.parse_addr(message), data=spec.parse_data(message),
+            value=spec.parse_value(message))
+
+class FrameDecoder(object):
+    '''
+    Incremental decoder for the framed wire format, following the behaviour
+    of the board's message receiver: an unescaped start character restarts
+    the current frame, and frames of incorrect length are dropped. The
+    number of partially received frames that were dropped is kept in the
+    errors attribute.
+    '''
+
+    def __init__(self, spec):
+        self._spec = spec
+        self._buffer = None
+        self._esc = False
+        self.errors = 0
+
+    def feed(self, data):
+        '''
+        Consumes the bytes in data and returns the list of messages that
+        were completed by them.
+        '''
+        spec = self._spec
+        messages = []
+        # Iterating bytes, bytearrays and memoryviews yields integers,
+        # without copying the data
+        for byte in data:
+            if self._esc:
+                self._esc = False
+                if self._buffer is not None:
+                    self._buffer.append(byte)
+            elif byte == spec.chr_esc:
+                self._esc = True
+            elif byte == spec.chr_start:
+                if self._buffer:
+                    self.errors += 1
+                self._buffer = bytearray()
+            elif byte == spec.chr_stop:
+                if (self._buffer is not None and
+                        len(self._buffer) == spec.width_message_bytes):
+                    message = 0
+                    for b in self._buffer:
+                        message = (message << 8) | b
+                    messages.append(message)
+                elif self._buffer is not None:
+                    self.errors += 1
+                self._buffer = None
+            elif self._buffer is not None:
+                self._buffer.append(byte)
+        return messages
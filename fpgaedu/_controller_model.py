@@ -0,0 +1,306 @@
+class ControllerModel(object):
+    '''
+    Cycle-accurate model of fpgaedu.hdl.Controller in plain Python, for
+    tools and long regression runs for which the myhdl simulation is too
+    slow.
+
+    The input attributes (rx_msg, rx_ready, tx_ready, exp_data_read,
+    exp_break, stat_events, rx_free and reset, which is True when asserted)
+    are the values of the controller inputs during the current clock
+    period. tick() ends the period: it sets the output attributes (rx_next,
+    tx_msg, tx_next, exp_addr, exp_data_write, exp_wen, exp_reset and
+    exp_clk_en) to the values sampled by the rising edge ending the period,
+    and then advances the registers past that edge. run(cycles) ticks with
+    the same inputs for many periods, skipping those in which the
+    controller only waits or counts cycles.
+    '''
+
+    __slots__ = ('exp_reset_active',
+            # inputs
+            'rx_msg', 'rx_ready', 'tx_ready', 'exp_data_read', 'exp_break',
+            'stat_events', 'rx_free', 'reset',
+            # outputs
+            'rx_next', 'tx_msg', 'tx_next', 'exp_addr', 'exp_data_write',
+            'exp_wen', 'exp_reset', 'exp_clk_en',
+            # cycle control registers, clocked on the falling edge
+            '_autonomous', '_cycle_count', '_clk_en',
+            # registers clocked on the rising edge
+            '_ex_res_opcode_res', '_ex_res_nop', '_ex_res_cycle_count',
+            '_ex_res_addr', '_ex_res_stat_value', '_ex_res_rx_free',
+            '_ex_res_event', '_autonomous_reg', '_event_pending', '_counts',
+            # constants derived from the spec
+            '_constants')
+
+    def __init__(self, spec, exp_reset_active=False):
+        self.exp_reset_active = exp_reset_active
+
+        # Response opcodes indexed by command opcode, for manual and
+        # autonomous mode. Unknown commands are answered with opcode 0.
+        opcode_mask = 2**spec.width_opcode - 1
+        manual = [0] * (opcode_mask + 1)
+        autonomous = [0] * (opcode_mask + 1)
+        for table, mode in ((manual, False), (autonomous, True)):
+            table[spec.opcode_cmd_read] = (spec.opcode_res_read_error_mode
+                    if mode else spec.opcode_res_read_success)
+            table[spec.opcode_cmd_write] = (spec.opcode_res_write_error_mode
+                    if mode else spec.opcode_res_write_success)
+            table[spec.opcode_cmd_reset] = spec.opcode_res_reset_success
+            table[spec.opcode_cmd_step] = (spec.opcode_res_step_error_mode
+                    if mode else spec.opcode_res_step_success)
+            table[spec.opcode_cmd_start] = (spec.opcode_res_start_error_mode
+                    if mode else spec.opcode_res_start_success)
+            table[spec.opcode_cmd_pause] = (spec.opcode_res_pause_success
+                    if mode else spec.opcode_res_pause_error_mode)
+            table[spec.opcode_cmd_status] = spec.opcode_res_status
+            table[spec.opcode_cmd_stat] = spec.opcode_res_stat
+            table[spec.opcode_cmd_credit] = spec.opcode_res_credit
+
+        stall_bit = 1 << spec.stat_tx_stalls
+        command_bit = 1 << spec.stat_commands
+        value_mask = 2**spec.width_value - 1
+        # In the order tick unpacks them
+        self._constants = (spec.index_opcode_low, opcode_mask,
+                spec.index_addr_low, 2**spec.width_addr - 1,
+                2**spec.width_data - 1, value_mask, value_mask,
+                spec.num_stats, spec.opcode_cmd_write, spec.opcode_cmd_reset,
+                spec.opcode_cmd_step, spec.opcode_cmd_start,
+                spec.opcode_cmd_pause, spec.opcode_res_event_manual,
+                spec.opcode_res_event_autonomous, stall_bit, command_bit,
+                ~(stall_bit | command_bit), (manual, autonomous),
+                _compose_kinds(spec))
+
+        self.rx_msg = 0
+        self.rx_ready = False
+        self.tx_ready = True
+        self.exp_data_read = 0
+        self.exp_break = False
+        self.stat_events = 0
+        self.rx_free = 0
+        self.reset = False
+
+        self.rx_next = False
+        self.tx_msg = 0
+        self.tx_next = False
+        self.exp_addr = 0
+        self.exp_data_write = 0
+        self.exp_wen = False
+        self.exp_reset = not exp_reset_active
+        self.exp_clk_en = False
+
+        self._reset_cycle_control()
+        self._reset_registers()
+        self._counts = [0] * spec.num_stats
+
+    @property
+    def cycle_autonomous(self):
+        return self._autonomous
+
+    @property
+    def cycle_count(self):
+        return self._cycle_count
+
+    @property
+    def counts(self):
+        '''
+        List of the values of the statistics counters
+        '''
+        return list(self._counts)
+
+    def _reset_cycle_control(self):
+        self._autonomous = False
+        self._cycle_count = 0
+        self._clk_en = False
+
+    def _reset_registers(self):
+        self._ex_res_opcode_res = 0
+        self._ex_res_nop = True
+        self._ex_res_cycle_count = 0
+        self._ex_res_addr = 0
+        self._ex_res_stat_value = 0
+        self._ex_res_rx_free = 0
+        self._ex_res_event = False
+        self._autonomous_reg = False
+        self._event_pending = False
+
+    def tick(self):
+        # Constants and registers are read into locals once, as attribute
+        # lookups dominate the cost of a cycle
+        (opcode_shift, opcode_mask, addr_shift, addr_mask, data_mask,
+                value_mask, count_max, num_stats, cmd_write, cmd_reset,
+                cmd_step, cmd_start, cmd_pause, res_event_manual,
+                res_event_autonomous, stall_bit, command_bit, events_mask,
+                res_opcodes, compose_kinds) = self._constants
+        reset = self.reset
+        rx_msg = self.rx_msg
+        rx_ready = self.rx_ready
+        tx_ready = self.tx_ready
+        autonomous_reg = self._autonomous_reg
+        ex_res_nop = self._ex_res_nop
+
+        # EX stage, using the mode registered on the previous rising edge
+        opcode_cmd = (rx_msg >> opcode_shift) & opcode_mask
+        cmd_addr = (rx_msg >> addr_shift) & addr_mask
+        execute = not (not rx_ready or not tx_ready or self._ex_res_event or
+                reset)
+
+        # Cycle control, clocked on the falling edge
+        autonomous = self._autonomous
+        cycle_count = self._cycle_count
+        if reset:
+            autonomous = False
+            cycle_count = 0
+            clk_en = False
+        elif not autonomous:
+            if execute and not autonomous_reg and (opcode_cmd == cmd_step or
+                    opcode_cmd == cmd_start):
+                cycle_count = (cycle_count + 1) & value_mask
+                clk_en = True
+                autonomous = opcode_cmd == cmd_start
+            else:
+                clk_en = False
+        elif (execute and opcode_cmd == cmd_pause and autonomous_reg) or \
+                self.exp_break:
+            clk_en = False
+            autonomous = False
+        else:
+            clk_en = True
+            cycle_count = (cycle_count + 1) & value_mask
+        self._autonomous = autonomous
+        self._cycle_count = cycle_count
+        self._clk_en = clk_en
+
+        # Outputs sampled by the rising edge
+        self.rx_next = execute
+        self.exp_addr = cmd_addr
+        self.exp_data_write = rx_msg & data_mask
+        self.exp_wen = (execute and opcode_cmd == cmd_write and
+                not autonomous_reg)
+        if reset or (execute and opcode_cmd == cmd_reset):
+            self.exp_reset = self.exp_reset_active
+        else:
+            self.exp_reset = not self.exp_reset_active
+        self.exp_clk_en = clk_en
+        self.tx_next = tx_ready and not ex_res_nop
+
+        # Response compose
+        opcode_res = self._ex_res_opcode_res
+        tx_msg = opcode_res << opcode_shift
+        kind = compose_kinds[opcode_res]
+        if kind == _COMPOSE_NONE:
+            pass
+        elif kind == _COMPOSE_ADDR_DATA:
+            tx_msg |= ((self._ex_res_addr << addr_shift) |
+                    (self.exp_data_read & data_mask))
+        elif kind == _COMPOSE_ADDR:
+            tx_msg |= self._ex_res_addr << addr_shift
+        elif kind == _COMPOSE_STEP:
+            tx_msg |= (self._ex_res_cycle_count + 1) & value_mask
+        elif kind == _COMPOSE_CYCLE_COUNT:
+            tx_msg |= self._ex_res_cycle_count
+        elif kind == _COMPOSE_STAT:
+            tx_msg |= self._ex_res_stat_value
+        else:
+            tx_msg |= self._ex_res_rx_free
+        self.tx_msg = tx_msg
+
+        # Rising edge
+        counts = self._counts
+        if reset:
+            self._reset_registers()
+            counts[:] = [0] * num_stats
+            return
+
+        event_inject = (self._event_pending and not execute and ex_res_nop
+                and tx_ready)
+        if event_inject:
+            self._ex_res_opcode_res = (res_event_autonomous if autonomous
+                    else res_event_manual)
+            self._ex_res_nop = False
+            self._event_pending = autonomous != autonomous_reg
+        else:
+            self._ex_res_opcode_res = res_opcodes[autonomous_reg][opcode_cmd]
+            self._ex_res_nop = not execute
+            if autonomous != autonomous_reg:
+                self._event_pending = True
+        self._ex_res_cycle_count = cycle_count
+        self._ex_res_addr = cmd_addr
+        self._ex_res_stat_value = (counts[cmd_addr] if cmd_addr < num_stats
+                else 0)
+        self._ex_res_rx_free = self.rx_free & value_mask
+        self._ex_res_event = event_inject
+        self._autonomous_reg = autonomous
+
+        events = self.stat_events & events_mask
+        if rx_ready and not tx_ready:
+            events |= stall_bit
+        if execute:
+            events |= command_bit
+        while events:
+            # Visits the set bits only
+            bit = events & -events
+            events ^= bit
+            i = bit.bit_length() - 1
+            if i < num_stats and counts[i] != count_max:
+                counts[i] += 1
+
+    def _quiet(self):
+        '''
+        Returns whether a tick with the current inputs only waits, or only
+        counts a cycle in autonomous mode, after which the controller is in
+        a state that further ticks with the same inputs do not change,
+        apart from the cycle count.
+        '''
+        return not (self.rx_ready or self.reset or self.stat_events or
+                self._event_pending or self._ex_res_event or
+                self._autonomous != self._autonomous_reg or
+                (self._autonomous and self.exp_break))
+
+    def run(self, cycles):
+        '''
+        Ticks cycles times with the current inputs. The cycles in which the
+        controller only waits, or only counts cycles in autonomous mode,
+        are skipped at once, so that long stretches between commands take
+        no time.
+        '''
+        tick = self.tick
+        while cycles > 0 and not self._quiet():
+            tick()
+            cycles -= 1
+        if cycles > 2:
+            # After this tick, ticks only count cycles in autonomous mode
+            tick()
+            skipped = cycles - 2
+            if self._autonomous:
+                self._cycle_count = ((self._cycle_count + skipped) &
+                        self._constants[_VALUE_MASK])
+                self._ex_res_cycle_count = self._cycle_count
+            cycles = 1
+        for _ in range(cycles):
+            tick()
+
+# Index of the value mask in ControllerModel._constants
+_VALUE_MASK = 5
+
+# How the response compose fills in the fields of a response, by opcode
+_COMPOSE_NONE = 0
+_COMPOSE_ADDR_DATA = 1
+_COMPOSE_ADDR = 2
+_COMPOSE_STEP = 3
+_COMPOSE_CYCLE_COUNT = 4
+_COMPOSE_STAT = 5
+_COMPOSE_CREDIT = 6
+
+def _compose_kinds(spec):
+    kinds = [_COMPOSE_NONE] * 2**spec.width_opcode
+    kinds[spec.opcode_res_read_success] = _COMPOSE_ADDR_DATA
+    kinds[spec.opcode_res_write_success] = _COMPOSE_ADDR_DATA
+    kinds[spec.opcode_res_read_error_mode] = _COMPOSE_ADDR
+    kinds[spec.opcode_res_write_error_mode] = _COMPOSE_ADDR
+    kinds[spec.opcode_res_step_success] = _COMPOSE_STEP
+    for opcode in (spec.opcode_res_start_success,
+            spec.opcode_res_pause_success, spec.opcode_res_status,
+            spec.opcode_res_event_manual, spec.opcode_res_event_autonomous):
+        kinds[opcode] = _COMPOSE_CYCLE_COUNT
+    kinds[spec.opcode_res_stat] = _COMPOSE_STAT
+    kinds[spec.opcode_res_credit] = _COMPOSE_CREDIT
+    return kinds
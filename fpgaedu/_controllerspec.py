@@ -1,5 +1,18 @@
 from math import ceil
-from myhdl import intbv
+
+def _insert(message, high, low, value):
+    '''
+    Returns message with bits high down to low set to value, which raises
+    ValueError if value does not fit, as intbv slice assignment does.
+    '''
+    value = int(value)
+    if value < 0 or value >> (high + 1 - low):
+        raise ValueError('%d does not fit in bits %d to %d' % (value, high,
+            low))
+    return message | (value << low)
+
+def _extract(message, high, low):
+    return (int(message) >> low) & ((1 << (high + 1 - low)) - 1)
 
 class ControllerSpec():
     '''
@@ -38,6 +51,9 @@ class ControllerSpec():
     _OPCODE_CMD_START = 4
     _OPCODE_CMD_PAUSE = 5
     _OPCODE_CMD_STATUS = 6
+    _OPCODE_CMD_STAT = 7
+    # - addr (statistics counter index)
+    _OPCODE_CMD_CREDIT = 8
 
     _OPCODE_RES_READ_SUCCESS = 0
     # - addr
@@ -62,11 +78,38 @@ class ControllerSpec():
     _OPCODE_RES_PAUSE_ERROR_MODE = 10
     _OPCODE_RES_STATUS = 11 
     # - value (mode + cycle count)
-
-    _ADDR_TYPE_CMD_OPCODES = [_OPCODE_CMD_READ, _OPCODE_CMD_WRITE] 
+    _OPCODE_RES_STAT = 12
+    # - value (statistics counter value)
+    _OPCODE_RES_CREDIT = 13
+    # - value (free receive buffer capacity in bytes)
+    # Event responses are not sent in response to a command, but whenever
+    # the controller changes mode.
+    _OPCODE_RES_EVENT_MANUAL = 14
+    # - value (cycle count)
+    _OPCODE_RES_EVENT_AUTONOMOUS = 15
+    # - value (cycle count)
+
+    _ADDR_TYPE_CMD_OPCODES = [_OPCODE_CMD_READ, _OPCODE_CMD_WRITE, 
+            _OPCODE_CMD_STAT] 
     _ADDR_TYPE_RES_OPCODES = [_OPCODE_RES_READ_SUCCESS, 
             _OPCODE_RES_READ_ERROR_MODE, _OPCODE_RES_WRITE_SUCCESS, 
             _OPCODE_RES_WRITE_ERROR_MODE]
+    _EVENT_RES_OPCODES = [_OPCODE_RES_EVENT_MANUAL, 
+            _OPCODE_RES_EVENT_AUTONOMOUS]
+
+    # Statistics counter indexes. Every counter saturates at its maximum
+    # value and is only cleared by the controller reset signal.
+    _STAT_RX_BYTES = 0
+    _STAT_RX_FRAME_ERRORS = 1
+    _STAT_RX_OVERFLOWS = 2
+    _STAT_RX_MESSAGES = 3
+    _STAT_RX_MESSAGE_ERRORS = 4
+    _STAT_TX_BYTES = 5
+    _STAT_TX_STALLS = 6
+    _STAT_COMMANDS = 7
+    _STAT_NAMES = ('rx_bytes', 'rx_frame_errors', 'rx_overflows', 
+            'rx_messages', 'rx_message_errors', 'tx_bytes', 'tx_stalls', 
+            'commands')
 
     _CHR_START = 0x12
     _CHR_STOP = 0x13
@@ -82,6 +125,9 @@ class ControllerSpec():
         self._width_addr = width_addr
         self._width_data = width_data
 
+    def __repr__(self):
+        return 'ControllerSpec(%d, %d)' % (self._width_addr, self._width_data)
+
     @property
     def width_opcode(self):
         return self._WIDTH_OPCODE
@@ -167,6 +213,14 @@ class ControllerSpec():
     @property
     def opcode_cmd_status(self):
         return self._OPCODE_CMD_STATUS
+
+    @property
+    def opcode_cmd_stat(self):
+        return self._OPCODE_CMD_STAT
+
+    @property
+    def opcode_cmd_credit(self):
+        return self._OPCODE_CMD_CREDIT
     
     # Repsonse opcodes
     @property
@@ -217,6 +271,63 @@ class ControllerSpec():
     def opcode_res_status(self):
         return self._OPCODE_RES_STATUS
 
+    @property
+    def opcode_res_stat(self):
+        return self._OPCODE_RES_STAT
+
+    @property
+    def opcode_res_credit(self):
+        return self._OPCODE_RES_CREDIT
+
+    @property
+    def opcode_res_event_manual(self):
+        return self._OPCODE_RES_EVENT_MANUAL
+
+    @property
+    def opcode_res_event_autonomous(self):
+        return self._OPCODE_RES_EVENT_AUTONOMOUS
+
+    # Statistics counter indexes
+    @property
+    def stat_rx_bytes(self):
+        return self._STAT_RX_BYTES
+
+    @property
+    def stat_rx_frame_errors(self):
+        return self._STAT_RX_FRAME_ERRORS
+
+    @property
+    def stat_rx_overflows(self):
+        return self._STAT_RX_OVERFLOWS
+
+    @property
+    def stat_rx_messages(self):
+        return self._STAT_RX_MESSAGES
+
+    @property
+    def stat_rx_message_errors(self):
+        return self._STAT_RX_MESSAGE_ERRORS
+
+    @property
+    def stat_tx_bytes(self):
+        return self._STAT_TX_BYTES
+
+    @property
+    def stat_tx_stalls(self):
+        return self._STAT_TX_STALLS
+
+    @property
+    def stat_commands(self):
+        return self._STAT_COMMANDS
+
+    @property
+    def stat_names(self):
+        return self._STAT_NAMES
+
+    @property
+    def num_stats(self):
+        return len(self._STAT_NAMES)
+
     def is_addr_type_command(self, opcode):
         return (opcode in self._ADDR_TYPE_CMD_OPCODES)
 
@@ -229,36 +340,35 @@ class ControllerSpec():
     def is_value_type_response(self, opcode):
         return not self.is_addr_type_response(opcode)
 
-    def value_type_message(self, opcode, value):
-        message = intbv(0)[self.width_message:0]
-        message[self.index_opcode_high+1:self.index_opcode_low] = opcode
-        message[self.index_value_high+1:self.index_value_low] = value
+    def is_event_response(self, opcode):
+        return (opcode in self._EVENT_RES_OPCODES)
 
-        return int(message)
+    def value_type_message(self, opcode, value):
+        message = _insert(0, self.index_opcode_high, self.index_opcode_low,
+                opcode)
+        return _insert(message, self.index_value_high, self.index_value_low,
+                value)
 
     def addr_type_message(self, opcode, address, data):
-        message = intbv(0)[self.width_message:0]
-        message[self.index_opcode_high+1:self.index_opcode_low] = opcode
-        message[self.index_addr_high+1:self.index_addr_low] = address
-        message[self.index_data_high+1:self.index_data_low] = data
-
-        return int(message)
+        message = _insert(0, self.index_opcode_high, self.index_opcode_low,
+                opcode)
+        message = _insert(message, self.index_addr_high, self.index_addr_low,
+                address)
+        return _insert(message, self.index_data_high, self.index_data_low,
+                data)
 
     def parse_opcode(self, message):
-        m = intbv(message)
-        return int(m[self.index_opcode_high+1:self.index_opcode_low])
+        return _extract(message, self.index_opcode_high,
+                self.index_opcode_low)
 
     def parse_addr(self, message):
-        m = intbv(message)
-        return int(m[self.index_addr_high+1:self.index_addr_low])
+        return _extract(message, self.index_addr_high, self.index_addr_low)
 
     def parse_data(self, message):
-        m = intbv(message)
-        return int(m[self.index_data_high+1:self.index_data_low])
+        return _extract(message, self.index_data_high, self.index_data_low)
 
     def parse_value(self, message):
-        m = intbv(message)
-        return int(m[self.index_value_high+1:self.index_value_low])
+        return _extract(message, self.index_value_high, self.index_value_low)
 
     @property
     def chr_start(self):
@@ -0,0 +1,157 @@
+import os, json, threading
+from collections import namedtuple
+
+from ._controllerspec import ControllerSpec
+from ._client import Client, ResponseTimeoutError
+from ._transport import open_transport
+
+BoardInfo = namedtuple('BoardInfo', ['port', 'baudrate', 'spec',
+    'cycle_count'])
+
+def _default_cache_path():
+    base = os.environ.get('XDG_CACHE_HOME',
+            os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'fpgaedu', 'boards.json')
+
+class DiscoveryCache(object):
+    '''
+    The baudrates and specs of the boards found by discover_boards, by
+    port, kept in a json file. A cached board is probed with its cached
+    settings first, so that finding it again takes a single status command.
+
+    path
+        The path of the file, which defaults to
+        $XDG_CACHE_HOME/fpgaedu/boards.json, or ~/.cache/fpgaedu/boards.json
+    '''
+
+    def __init__(self, path=None):
+        self.path = path or _default_cache_path()
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+        except (IOError, ValueError):
+            self._entries = {}
+
+    def get(self, port):
+        '''
+        Returns the cached (baudrate, spec) of port, or None.
+        '''
+        with self._lock:
+            entry = self._entries.get(port)
+        if entry is None:
+            return None
+        return entry['baudrate'], ControllerSpec(entry['width_addr'],
+                entry['width_data'])
+
+    def put(self, info):
+        with self._lock:
+            self._entries[info.port] = {'baudrate': info.baudrate,
+                    'width_addr': info.spec.width_addr,
+                    'width_data': info.spec.width_data}
+
+    def remove(self, port):
+        with self._lock:
+            self._entries.pop(port, None)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._lock:
+            # Replaced at once, so that concurrent readers never see a
+            # partial file
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump(self._entries, f, indent=1, sort_keys=True)
+            os.rename(self.path + '.tmp', self.path)
+
+def candidate_ports():
+    '''
+    Returns the devices of the serial ports of the system.
+    '''
+    from serial.tools.list_ports import comports
+    return [port.device for port in comports()]
+
+def probe(spec, connection, timeout=0.2):
+    '''
+    Sends a status command over connection and returns the response, or
+    None if no board answers within timeout seconds.
+    '''
+    client = Client(spec, connection, timeout=timeout)
+    try:
+        response = client.status()
+    except ResponseTimeoutError:
+        return None
+    if response.opcode != spec.opcode_res_status:
+        return None
+    return response
+
+def identify(port, specs, baudrates=(9600,), timeout=0.2, cache=None):
+    '''
+    Opens port and probes it with every combination of baudrate and spec,
+    starting with the cached ones. Returns the BoardInfo and open
+    connection of the board that answers, or None if none does, in which
+    case the port is closed.
+
+    A board only answers commands of its own message width, so that specs
+    are told apart by their message width. Of specs with the same message
+    width, the first is reported.
+    '''
+    import serial
+    settings = [(baudrate, spec) for baudrate in baudrates for spec in specs]
+    cached = cache.get(port) if cache is not None else None
+    if cached is not None:
+        settings.insert(0, cached)
+    try:
+        connection = open_transport(port, settings[0][1], settings[0][0])
+    except (serial.SerialException, OSError, ValueError):
+        return None
+    try:
+        for baudrate, spec in settings:
+            # Transports without a uart answer at any baudrate
+            if connection.baudrate not in (None, baudrate):
+                connection.baudrate = baudrate
+            # Drops the answers to earlier probes that arrived too late
+            connection.reset_input_buffer()
+            response = probe(spec, connection, timeout)
+            if response is not None:
+                info = BoardInfo(port, baudrate, spec, response.value)
+                if cache is not None:
+                    cache.put(info)
+                return info, connection
+    except (serial.SerialException, OSError):
+        pass
+    connection.close()
+    if cached is not None:
+        cache.remove(port)
+    return None
+
+def discover_boards(specs, ports=None, baudrates=(9600,), timeout=0.2,
+        cache=None):
+    '''
+    Identifies the boards on all ports, which default to all serial ports
+    of the system, at the same time. Returns a list of (BoardInfo,
+    connection) pairs of the ports on which a board answers, in the order
+    of ports.
+
+    Ports are opened with open_transport, so that they can also be urls
+    such as tcp://HOST:PORT, emulator:// or pyserial's socket://HOST:PORT.
+
+    specs
+        The ControllerSpecs to probe every port with, in order
+    baudrates
+        The baudrates to probe every port at, in order
+    cache
+        Optional DiscoveryCache, which is updated with the boards found
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+    if ports is None:
+        ports = candidate_ports()
+    if not ports:
+        return []
+    with ThreadPoolExecutor(len(ports)) as executor:
+        results = list(executor.map(lambda port: identify(port, specs,
+            baudrates, timeout, cache), ports))
+    if cache is not None:
+        cache.save()
+    return [result for result in results if result is not None]
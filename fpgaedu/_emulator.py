@@ -0,0 +1,214 @@
+import os, pty, select, time, tty
+from collections import deque
+
+from ._codec import encode_frame, FrameDecoder
+
+_UART_BITS_PER_BYTE = 10
+
+def _open_pty():
+    '''
+    Returns the master and slave file descriptors of a new pseudo-terminal
+    in raw mode.
+    '''
+    master, slave = pty.openpty()
+    # The protocol's control characters must not be interpreted by the
+    # terminal line discipline
+    tty.setraw(slave)
+    return master, slave
+
+class BoardEmulator(object):
+    '''
+    Transaction-level emulator of a board running the BoardComponent with a
+    memory experiment. Commands are executed as soon as their frame is
+    complete, answering with the responses the board would send.
+
+    spec
+        The controller specification
+    memory
+        Optional dict with the initial experiment memory contents. Reads of
+        other addresses return 0. A reset command restores the initial
+        contents.
+    baudrate
+        Optional uart baudrate. When set, serve_forever delays commands and
+        responses by their transmission time at this baudrate.
+    clk_freq
+        Frequency at which the experiment clock runs in autonomous mode,
+        determining the cycle count
+    rx_fifo_depth
+        Receive buffer capacity reported in response to the credit command
+    clock
+        Function returning the current time in seconds
+    '''
+
+    def __init__(self, spec, memory=None, baudrate=None, clk_freq=100000000,
+            rx_fifo_depth=2048, clock=time.time):
+        self.spec = spec
+        self.baudrate = baudrate
+        self.clk_freq = clk_freq
+        self.rx_fifo_depth = rx_fifo_depth
+        self.clock = clock
+        self._initial = dict(memory or {})
+        self.memory = dict(self._initial)
+        self.autonomous = False
+        self.stats = [0] * spec.num_stats
+        self._cycle_count = 0
+        self._start_time = None
+        self._value_mask = 2**spec.width_value - 1
+        self._decoder = FrameDecoder(spec)
+        self._master = None
+        self._slave = None
+
+    @property
+    def cycle_count(self):
+        if self.autonomous:
+            elapsed = int((self.clock() - self._start_time) * self.clk_freq)
+            return (self._cycle_count + elapsed) & self._value_mask
+        return self._cycle_count
+
+    def process(self, data):
+        '''
+        Consumes the bytes in data as received over the uart and returns the
+        bytes sent back in response.
+        '''
+        spec = self.spec
+        self._count(spec.stat_rx_bytes, len(data))
+        errors = self._decoder.errors
+        messages = self._decoder.feed(data)
+        self._count(spec.stat_rx_message_errors,
+                self._decoder.errors - errors)
+
+        response = bytearray()
+        for message in messages:
+            self._count(spec.stat_rx_messages)
+            self._count(spec.stat_commands)
+            for res in self.execute(message):
+                response.extend(encode_frame(spec, res))
+        self._count(spec.stat_tx_bytes, len(response))
+        return bytes(response)
+
+    def execute(self, message):
+        '''
+        Executes a command message, returning the list of response
+        messages, which includes a mode change event when the command
+        changes the mode.
+        '''
+        spec = self.spec
+        opcode = spec.parse_opcode(message)
+        addr = spec.parse_addr(message)
+        data = spec.parse_data(message)
+
+        if opcode == spec.opcode_cmd_write and not self.autonomous:
+            self.memory[addr] = data
+            return [spec.addr_type_message(spec.opcode_res_write_success,
+                addr, data)]
+        elif opcode == spec.opcode_cmd_write:
+            return [spec.addr_type_message(spec.opcode_res_write_error_mode,
+                addr, 0)]
+        elif opcode == spec.opcode_cmd_read and self.autonomous:
+            return [spec.addr_type_message(spec.opcode_res_read_error_mode,
+                addr, 0)]
+        elif opcode == spec.opcode_cmd_reset:
+            self.memory = dict(self._initial)
+            return [spec.value_type_message(spec.opcode_res_reset_success,
+                0)]
+        elif opcode == spec.opcode_cmd_step and not self.autonomous:
+            self._cycle_count = (self._cycle_count + 1) & self._value_mask
+            # Like the board, the response holds the count plus one
+            return [spec.value_type_message(spec.opcode_res_step_success,
+                (self._cycle_count + 1) & self._value_mask)]
+        elif opcode == spec.opcode_cmd_step:
+            return [spec.value_type_message(spec.opcode_res_step_error_mode,
+                0)]
+        elif opcode == spec.opcode_cmd_start and not self.autonomous:
+            self._cycle_count = (self._cycle_count + 1) & self._value_mask
+            self._start_time = self.clock()
+            self.autonomous = True
+            return [spec.value_type_message(spec.opcode_res_start_success,
+                self._cycle_count), spec.value_type_message(
+                spec.opcode_res_event_autonomous, self.cycle_count)]
+        elif opcode == spec.opcode_cmd_start:
+            return [spec.value_type_message(
+                spec.opcode_res_start_error_mode, 0)]
+        elif opcode == spec.opcode_cmd_pause and self.autonomous:
+            self._cycle_count = self.cycle_count
+            self.autonomous = False
+            return [spec.value_type_message(spec.opcode_res_pause_success,
+                self._cycle_count), spec.value_type_message(
+                spec.opcode_res_event_manual, self._cycle_count)]
+        elif opcode == spec.opcode_cmd_pause:
+            return [spec.value_type_message(
+                spec.opcode_res_pause_error_mode, 0)]
+        elif opcode == spec.opcode_cmd_status:
+            return [spec.value_type_message(spec.opcode_res_status,
+                self.cycle_count)]
+        elif opcode == spec.opcode_cmd_stat:
+            value = self.stats[addr] if addr < len(self.stats) else 0
+            return [spec.value_type_message(spec.opcode_res_stat, value)]
+        elif opcode == spec.opcode_cmd_credit:
+            return [spec.value_type_message(spec.opcode_res_credit,
+                self.rx_fifo_depth)]
+        else:
+            # Reads, and unknown opcodes, which the board answers as reads
+            return [spec.addr_type_message(spec.opcode_res_read_success,
+                addr, self.memory.get(addr, 0))]
+
+    def _count(self, index, n=1):
+        self.stats[index] = min(self.stats[index] + n, self._value_mask)
+
+    def open(self):
+        '''
+        Creates the pseudo-terminal the emulator is served on and returns
+        the path of its device, which can be opened like a serial port.
+        '''
+        self._master, self._slave = _open_pty()
+        return os.ttyname(self._slave)
+
+    def close(self):
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def serve_forever(self, poll_interval=0.5):
+        '''
+        Serves the emulator on the pseudo-terminal created by open until it
+        is closed.
+        '''
+        byte_time = (_UART_BITS_PER_BYTE / float(self.baudrate)
+                if self.baudrate else 0)
+        # Pending (time, bytes) chunks of both directions. A chunk becomes
+        # due once the uart would have finished transmitting it.
+        rx_queue = deque()
+        tx_queue = deque()
+        rx_busy = tx_busy = 0
+
+        while self._master is not None:
+            now = self.clock()
+            while rx_queue and rx_queue[0][0] <= now:
+                response = self.process(rx_queue.popleft()[1])
+                if response:
+                    tx_busy = max(tx_busy, now) + byte_time * len(response)
+                    tx_queue.append((tx_busy, response))
+            while tx_queue and tx_queue[0][0] <= now:
+                os.write(self._master, tx_queue.popleft()[1])
+
+            due = [queue[0][0] for queue in (rx_queue, tx_queue) if queue]
+            timeout = max(min(due) - now, 0) if due else poll_interval
+            try:
+                readable, _, _ = select.select([self._master], [], [],
+                        timeout)
+                if readable:
+                    data = os.read(self._master, 4096)
+                else:
+                    continue
+            except (OSError, ValueError, TypeError):
+                # The pty was closed
+                break
+            now = self.clock()
+            if byte_time:
+                # Every byte is processed once it is completely received
+                for byte in bytearray(data):
+                    rx_busy = max(rx_busy, now) + byte_time
+                    rx_queue.append((rx_busy, bytes(bytearray([byte]))))
+            else:
+                rx_queue.append((now, data))
@@ -0,0 +1,173 @@
+import mmap
+
+class MemoryMirror(object):
+    '''
+    Host-side copy of the experiment memory, which serves repeated reads
+    without a round trip over the link.
+
+    In manual mode, the value of an address only changes through a write,
+    step, start or reset command. The mirror follows the commands sent and
+    the responses received by the client: successful reads fill it, writes
+    update the written address, and steps, starts, resets and mode change
+    events invalidate it entirely. While such a command awaits its response,
+    reads are not served from the mirror.
+
+    The mirror is sparse. Values are kept in pages of page_size addresses,
+    which are allocated when an address in them is first filled.
+
+    spec
+        The controller specification
+    page_size
+        Number of addresses per page, a power of two
+    path
+        Optional path of a file to map the values of the entire address
+        space to, instead of allocating every page separately. The file is
+        sparse, so that only the pages that are used take up space, which
+        suits address spaces that are too large to keep in memory.
+    write_through
+        Whether a successful write stores the written data, as the memory
+        experiment does. Otherwise, a write invalidates its address.
+    '''
+
+    def __init__(self, spec, page_size=4096, path=None, write_through=True):
+        if page_size <= 0 or page_size & (page_size - 1):
+            raise ValueError('page_size must be a power of two')
+        self.spec = spec
+        self.page_size = page_size
+        self.write_through = write_through
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._word_bytes = (spec.width_data + 7) // 8
+        self._page_shift = page_size.bit_length() - 1
+        # Commands awaiting their response that change the memory
+        self._pending = 0
+        # The valid flags, and without a file the values, of every page
+        self._valid = {}
+        self._pages = {}
+        self._file = None
+        self._map = None
+        if path is not None:
+            self._file = open(path, 'w+b')
+            self._file.truncate(self._word_bytes << spec.width_addr)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+
+        self._mutating_commands = frozenset([spec.opcode_cmd_write,
+            spec.opcode_cmd_reset, spec.opcode_cmd_step,
+            spec.opcode_cmd_start])
+        self._mutating_responses = frozenset([spec.opcode_res_write_success,
+            spec.opcode_res_write_error_mode, spec.opcode_res_reset_success,
+            spec.opcode_res_step_success, spec.opcode_res_step_error_mode,
+            spec.opcode_res_start_success, spec.opcode_res_start_error_mode])
+        self._invalidating_responses = frozenset([
+            spec.opcode_res_reset_success, spec.opcode_res_step_success,
+            spec.opcode_res_start_success])
+
+    @property
+    def pages(self):
+        '''
+        Number of pages holding valid values
+        '''
+        return len(self._valid)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def _offset(self, addr):
+        return addr >> self._page_shift, addr & (self.page_size - 1)
+
+    def _word(self, page, index):
+        '''
+        Returns the buffer holding the values of page, and the position of
+        the value at index in it.
+        '''
+        if self._map is not None:
+            return self._map, ((page << self._page_shift) + index) * \
+                    self._word_bytes
+        return self._pages[page], index * self._word_bytes
+
+    def lookup(self, addr):
+        '''
+        Returns the mirrored value of addr, or None if the value has to be
+        read from the board.
+        '''
+        page, index = self._offset(addr)
+        valid = self._valid.get(page)
+        if self._pending or valid is None or not valid[index]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        values, position = self._word(page, index)
+        return int.from_bytes(values[position:position + self._word_bytes],
+                'little')
+
+    def fill(self, addr, data):
+        page, index = self._offset(addr)
+        if page not in self._valid:
+            self._valid[page] = bytearray(self.page_size)
+            if self._map is None:
+                self._pages[page] = bytearray(self.page_size *
+                        self._word_bytes)
+        values, position = self._word(page, index)
+        values[position:position + self._word_bytes] = data.to_bytes(
+                self._word_bytes, 'little')
+        self._valid[page][index] = 1
+
+    def invalidate(self, addr=None):
+        '''
+        Invalidates the value of addr, or of all addresses if addr is None.
+        '''
+        self.invalidations += 1
+        if addr is None:
+            self._valid.clear()
+            self._pages.clear()
+            return
+        page, index = self._offset(addr)
+        if page in self._valid:
+            self._valid[page][index] = 0
+
+    def sent(self, message):
+        '''
+        Accounts for a command message sent to the board.
+        '''
+        spec = self.spec
+        opcode = spec.parse_opcode(message)
+        if opcode in self._mutating_commands:
+            self._pending += 1
+            if opcode == spec.opcode_cmd_write:
+                self.invalidate(spec.parse_addr(message))
+            else:
+                self.invalidate()
+
+    def received(self, response):
+        '''
+        Accounts for a Response, or event, received from the board.
+        '''
+        opcode = response.opcode
+        if self.spec.is_event_response(opcode):
+            self.invalidate()
+            return
+        if opcode in self._mutating_responses and self._pending:
+            self._pending -= 1
+        if opcode == self.spec.opcode_res_read_success:
+            self.fill(response.addr, response.data)
+        elif opcode == self.spec.opcode_res_write_success:
+            if self.write_through:
+                self.fill(response.addr, response.data)
+            else:
+                self.invalidate(response.addr)
+        elif opcode in self._invalidating_responses:
+            self.invalidate()
+
+    def report(self):
+        return 'memory mirror: %d hits, %d misses (%.1f%% hit rate), %d ' \
+                'pages' % (self.hits, self.misses, 100 * self.hit_rate,
+                        self.pages)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
@@ -0,0 +1,340 @@
+import time, select, socket
+from collections import deque, namedtuple
+
+from ._codec import encode_frame, FrameDecoder
+from ._client import Client, CreditWindow, ResponseTimeoutError
+from ._mirror import MemoryMirror
+
+def _response_message(spec, response):
+    if spec.is_addr_type_response(response.opcode):
+        return spec.addr_type_message(response.opcode, response.addr,
+                response.data)
+    return spec.value_type_message(response.opcode, response.value)
+
+# A command forwarded to the board, awaiting its response
+_Forwarded = namedtuple('_Forwarded', ['peer', 'message', 'size'])
+
+class _Peer(object):
+    '''
+    A tcp client of a MuxServer, with its commands that have not been
+    forwarded to the board yet.
+    '''
+
+    def __init__(self, spec, sock, readonly):
+        self.sock = sock
+        self.readonly = readonly
+        self.decoder = FrameDecoder(spec)
+        self.commands = deque()
+        # Number of forwarded commands awaiting their response
+        self.outstanding = 0
+        self.closed = False
+
+class MuxServer(object):
+    '''
+    Shares the board on a serial connection among many tcp clients that
+    speak the framed protocol, as they would over the serial port.
+
+    The commands of the clients are forwarded to the board one client at a
+    time in turn, pipelined as far as the credit window of the board
+    allows, and every response is sent back to the client whose command it
+    answers. Events are sent to all clients.
+
+    A response answers the oldest forwarded command of which it has one of
+    the response opcodes, and the address if it is an address type
+    response. The commands forwarded before that command have lost their
+    response, as has the oldest command when no response arrives for
+    timeout seconds. Those commands are answered with the error response
+    of the command, or where the protocol has none, by closing the
+    connection of their client. Responses that answer no command, such as
+    the reply to a credit query that timed out, are dropped.
+
+    Clients connected to a read-only address may only read the board. Their
+    reads are served from a MemoryMirror shared by all clients, which
+    every read and write forwarded to the board updates. Their commands
+    that would change the board are answered with the error response of
+    the command, except for resets, for which the protocol has none and
+    which close the connection.
+
+    spec
+        The controller specification
+    connection
+        Transport, or serial-port-like object, connected to the board
+    timeout
+        Number of seconds to wait for the response to a command, and for
+        the credit query when serving starts
+    '''
+
+    def __init__(self, spec, connection, timeout=1.0):
+        self.spec = spec
+        self.timeout = timeout
+        self.client = Client(spec, connection, timeout=timeout,
+                mirror=MemoryMirror(spec))
+        self.client.add_event_handler(self._broadcast)
+        # The credit window of the board, which the server rather than the
+        # client keeps, as only the server knows which command a response
+        # answers
+        self.window = None
+        self.forwarded = 0
+        self.cached = 0
+        # Responses that answered no command, and commands that lost theirs
+        self.dropped = 0
+        self.lost = 0
+        self._servers = {}
+        self._peers = []
+        # The forwarded commands awaiting their response, oldest first
+        self._forwarded = deque()
+        # The last time a response arrived, or the oldest command was
+        # forwarded or given up
+        self._progress = 0.0
+        # Set while the reply to a credit query that timed out may arrive
+        self._credit_pending = False
+        self._turn = 0
+        self._closed = False
+        self._error_responses = {
+                spec.opcode_cmd_write: spec.opcode_res_write_error_mode,
+                spec.opcode_cmd_step: spec.opcode_res_step_error_mode,
+                spec.opcode_cmd_start: spec.opcode_res_start_error_mode,
+                spec.opcode_cmd_pause: spec.opcode_res_pause_error_mode}
+        self._expected_responses = {
+                spec.opcode_cmd_read: (spec.opcode_res_read_success,
+                    spec.opcode_res_read_error_mode),
+                spec.opcode_cmd_write: (spec.opcode_res_write_success,
+                    spec.opcode_res_write_error_mode),
+                spec.opcode_cmd_reset: (spec.opcode_res_reset_success,),
+                spec.opcode_cmd_step: (spec.opcode_res_step_success,
+                    spec.opcode_res_step_error_mode),
+                spec.opcode_cmd_start: (spec.opcode_res_start_success,
+                    spec.opcode_res_start_error_mode),
+                spec.opcode_cmd_pause: (spec.opcode_res_pause_success,
+                    spec.opcode_res_pause_error_mode),
+                spec.opcode_cmd_status: (spec.opcode_res_status,),
+                spec.opcode_cmd_stat: (spec.opcode_res_stat,),
+                spec.opcode_cmd_credit: (spec.opcode_res_credit,)}
+
+    @property
+    def clients(self):
+        return len(self._peers)
+
+    def open(self, host='localhost', port=0, readonly=False):
+        '''
+        Listens for tcp clients, which are read-only if readonly is set,
+        and returns the address listened on.
+        '''
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen(5)
+        self._servers[server] = readonly
+        return server.getsockname()
+
+    def close(self):
+        '''
+        Closes all sockets, which ends serve_forever.
+        '''
+        self._closed = True
+        for peer in list(self._peers):
+            self._drop(peer)
+        for server in self._servers:
+            server.close()
+        self._servers = {}
+
+    def _drop(self, peer):
+        if peer.closed:
+            return
+        peer.closed = True
+        peer.sock.close()
+        self._peers.remove(peer)
+
+    def _reply(self, peer, message):
+        if peer.closed:
+            return
+        try:
+            peer.sock.sendall(encode_frame(self.spec, message))
+        except OSError:
+            self._drop(peer)
+
+    def _broadcast(self, event):
+        for peer in list(self._peers):
+            self._reply(peer, _response_message(self.spec, event))
+
+    def _receive(self, sock):
+        if sock in self._servers:
+            conn, _ = sock.accept()
+            # Responses are small, and each is waited for
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._peers.append(_Peer(self.spec, conn, self._servers[sock]))
+            return
+        peers = [peer for peer in self._peers if peer.sock is sock]
+        if not peers:
+            # Closed while waiting
+            return
+        peer = peers[0]
+        try:
+            data = sock.recv(4096)
+        except OSError:
+            data = b''
+        if not data:
+            # Responses to its forwarded commands are dropped
+            self._drop(peer)
+            return
+        peer.commands.extend(peer.decoder.feed(data))
+
+    def _reply_error(self, peer, message):
+        '''
+        Answers message with its error response, or closes the connection of
+        peer if the protocol has none.
+        '''
+        spec = self.spec
+        opcode = spec.parse_opcode(message)
+        if opcode == spec.opcode_cmd_read:
+            error = spec.opcode_res_read_error_mode
+        else:
+            error = self._error_responses.get(opcode)
+        if error is None:
+            self._drop(peer)
+        elif spec.is_addr_type_response(error):
+            self._reply(peer, spec.addr_type_message(error,
+                spec.parse_addr(message), 0))
+        else:
+            self._reply(peer, spec.value_type_message(error, 0))
+
+    def _serve_locally(self, peer, message):
+        '''
+        Answers a command of a read-only peer without the board if
+        possible, and returns whether it did.
+        '''
+        spec = self.spec
+        opcode = spec.parse_opcode(message)
+        if opcode == spec.opcode_cmd_reset:
+            self._drop(peer)
+            return True
+        if opcode in self._error_responses:
+            self._reply_error(peer, message)
+            return True
+        # Responses must arrive in order of the commands of the peer
+        if opcode == spec.opcode_cmd_read and not peer.outstanding:
+            data = self.client.mirror.lookup(spec.parse_addr(message))
+            if data is not None:
+                self.cached += 1
+                self._reply(peer, spec.addr_type_message(
+                    spec.opcode_res_read_success, spec.parse_addr(message),
+                    data))
+                return True
+        return False
+
+    def _dispatch(self):
+        '''
+        Forwards the commands of the peers, one peer at a time in turn,
+        while the credit window allows.
+        '''
+        window = self.window
+        idle = 0
+        while self._peers and idle < len(self._peers):
+            self._turn %= len(self._peers)
+            peer = self._peers[self._turn]
+            self._turn += 1
+            if not peer.commands:
+                idle += 1
+                continue
+            message = peer.commands[0]
+            if peer.readonly and self._serve_locally(peer, message):
+                peer.commands.popleft()
+                idle = 0
+                continue
+            size = len(encode_frame(self.spec, message))
+            if not window.can_send(size):
+                return
+            peer.commands.popleft()
+            self.client.send(message)
+            window.sent(size)
+            if not self._forwarded:
+                self._progress = time.time()
+            self._forwarded.append(_Forwarded(peer, message, size))
+            peer.outstanding += 1
+            self.forwarded += 1
+            idle = 0
+
+    def _answers(self, response, message):
+        spec = self.spec
+        if response.opcode not in self._expected_responses.get(
+                spec.parse_opcode(message), ()):
+            return False
+        return (not spec.is_addr_type_response(response.opcode) or
+                response.addr == spec.parse_addr(message))
+
+    def _complete(self, command):
+        '''
+        Removes the oldest forwarded command, which is command.
+        '''
+        self._forwarded.popleft()
+        self.window.release()
+        command.peer.outstanding -= 1
+        self._progress = time.time()
+
+    def _fail_oldest(self):
+        command = self._forwarded[0]
+        self._complete(command)
+        self.lost += 1
+        self._reply_error(command.peer, command.message)
+
+    def _route(self):
+        for response in self.client.receive_available():
+            index = next((i for i, command in enumerate(self._forwarded)
+                if self._answers(response, command.message)), None)
+            if index is None:
+                if (self._credit_pending and
+                        response.opcode == self.spec.opcode_res_credit):
+                    # The late reply to the credit query resynchronises
+                    # the window
+                    self._credit_pending = False
+                    self.window.credits = response.value
+                self.dropped += 1
+                continue
+            for _ in range(index):
+                self._fail_oldest()
+            command = self._forwarded[0]
+            self._complete(command)
+            self._reply(command.peer, _response_message(self.spec,
+                response))
+
+    def _expire(self):
+        if self._forwarded and time.time() - self._progress > self.timeout:
+            self._fail_oldest()
+
+    def serve_forever(self, poll_interval=0.05):
+        '''
+        Serves the clients on the addresses opened until closed. While
+        commands are outstanding, the board is polled for responses every
+        millisecond, and otherwise every poll_interval seconds.
+        '''
+        if self.window is None:
+            try:
+                self.window = CreditWindow(self.client.sync_credits())
+            except ResponseTimeoutError:
+                # Without the capacity of the board, one command at a time
+                # until the reply arrives
+                self.window = CreditWindow(0)
+                self._credit_pending = True
+            self.client.window = None
+        try:
+            while not self._closed:
+                busy = self._forwarded or any(peer.commands for peer in
+                        self._peers)
+                sockets = list(self._servers) + [peer.sock for peer in
+                        self._peers]
+                readable, _, _ = select.select(sockets, [], [],
+                        0.001 if busy else poll_interval)
+                for sock in readable:
+                    self._receive(sock)
+                self._route()
+                self._expire()
+                self._dispatch()
+        except (OSError, ValueError):
+            # Raised when closed while waiting
+            if not self._closed:
+                raise
+
+    def report(self):
+        return '%d clients, %d commands forwarded, %d reads served from ' \
+                'the mirror, %d responses lost, %d dropped' % (self.clients,
+                    self.forwarded, self.cached, self.lost, self.dropped)
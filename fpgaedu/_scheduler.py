@@ -0,0 +1,186 @@
+import time, threading
+from collections import deque
+
+from ._client import Client, CreditWindow, ResponseTimeoutError
+
+class Board(object):
+    '''
+    Open connection to a board of the pool of a Scheduler, with the
+    statistics of the jobs it ran.
+
+    port
+        The name of the port of the connection
+    connection
+        Serial-port-like object, which stays open between jobs
+    client
+        The Client of the job that runs, or ran last, on the board
+    '''
+
+    def __init__(self, spec, port, connection, timeout=1.0):
+        self.spec = spec
+        self.port = port
+        self.connection = connection
+        self.timeout = timeout
+        self.client = None
+        self.jobs = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        # Set when the board stops responding, after which it runs no jobs
+        self.retired = False
+
+    def new_client(self):
+        '''
+        Returns a new Client for the next job, so that a batch or event
+        handlers left by the previous job do not affect it. The responses
+        the previous job left unread are waited for and dropped first.
+        '''
+        previous = self.client
+        self.client = Client(self.spec, self.connection,
+                timeout=self.timeout)
+        if previous is not None and previous.window is not None:
+            previous.drain()
+            self.client.window = CreditWindow(previous.window.credits)
+        else:
+            # The window counts the commands of the job awaiting their
+            # response
+            self.client.sync_credits()
+        return self.client
+
+    def close(self):
+        self.connection.close()
+
+class Job(object):
+    '''
+    Experiment job of a Scheduler. Once run, holds the board that ran it,
+    the return value or the exception raised by its function, and its run
+    time.
+    '''
+
+    def __init__(self, func, name):
+        self.func = func
+        self.name = name
+        self.attempts = 0
+        self.board = None
+        self.result = None
+        self.error = None
+        self.seconds = None
+
+class Scheduler(object):
+    '''
+    Runs queued experiment jobs on a pool of boards, every board running
+    one job at a time in a thread of its own.
+
+    A job is a function taking the Client of the board that runs it. A
+    board that stops responding, raising ResponseTimeoutError, is retired
+    and its job is queued again for the other boards.
+
+    boards
+        The Boards of the pool
+    reset
+        Whether the experiment is reset before every job
+    retries
+        Number of times a job is queued again after its board stopped
+        responding
+    '''
+
+    def __init__(self, boards, reset=True, retries=1):
+        self.boards = list(boards)
+        self.reset = reset
+        self.retries = retries
+        self.elapsed = 0.0
+        self._jobs = []
+        self._pending = deque()
+        self._running = 0
+        self._condition = threading.Condition()
+
+    def submit(self, func, name=None):
+        '''
+        Queues func as a job and returns the Job.
+        '''
+        job = Job(func, name or getattr(func, '__name__', 'job'))
+        self._jobs.append(job)
+        self._pending.append(job)
+        return job
+
+    def run(self):
+        '''
+        Runs the queued jobs until all have finished or no board is left,
+        and returns all submitted Jobs in order of submission. The jobs
+        that could not run are left with a ResponseTimeoutError.
+        '''
+        start = time.time()
+        threads = [threading.Thread(target=self._work, args=(board,))
+                for board in self.boards if not board.retired]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed += time.time() - start
+        while self._pending:
+            self._pending.popleft().error = ResponseTimeoutError(
+                    'no board left to run the job')
+        return list(self._jobs)
+
+    def _next_job(self):
+        with self._condition:
+            # A running job may be queued again if its board fails
+            while not self._pending and self._running:
+                self._condition.wait()
+            if not self._pending:
+                return None
+            self._running += 1
+            return self._pending.popleft()
+
+    def _finish(self, job, requeue):
+        with self._condition:
+            self._running -= 1
+            if requeue:
+                self._pending.append(job)
+            self._condition.notify_all()
+
+    def _work(self, board):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            job.attempts += 1
+            job.board = board
+            job.error = None
+            start = time.time()
+            try:
+                client = board.new_client()
+                if self.reset:
+                    client.reset()
+                job.result = job.func(client)
+            except Exception as error:
+                job.error = error
+            job.seconds = time.time() - start
+            board.busy_seconds += job.seconds
+            board.jobs += 1
+            if job.error is not None:
+                board.failures += 1
+            failed = isinstance(job.error, ResponseTimeoutError)
+            self._finish(job, failed and job.attempts <= self.retries)
+            if failed:
+                board.retired = True
+                return
+
+    def report(self):
+        '''
+        Returns the throughput and utilization of every board over the
+        time spent in run.
+        '''
+        lines = []
+        for board in self.boards:
+            utilization = (board.busy_seconds / self.elapsed if self.elapsed
+                    else 0.0)
+            throughput = board.jobs / self.elapsed if self.elapsed else 0.0
+            lines.append('%s: %d jobs, %d failed, %.2f jobs/s, %.1f%% '
+                    'utilization%s' % (board.port, board.jobs,
+                        board.failures, throughput, 100 * utilization,
+                        ' (retired)' if board.retired else ''))
+        return '\n'.join(lines)
+
+    def close(self):
+        for board in self.boards:
+            board.close()
@@ -0,0 +1,182 @@
+import os, array, select, socket
+from abc import ABCMeta, abstractmethod
+
+try:
+    import fcntl, termios
+except ImportError:
+    # Not available on Windows
+    fcntl = termios = None
+
+class Transport(object, metaclass=ABCMeta):
+    '''
+    Byte stream to a board, as used by Client and the shell.
+
+    Reads wait at most timeout seconds for data, so that a timeout of 0
+    makes them non-blocking, and return the data that has arrived, which
+    may be less than was asked for. Writes pass all data on at once.
+    readinto reads into a buffer of the caller, such as a memoryview of a
+    buffer that is reused, without copying the data in between.
+    '''
+
+    timeout = 0
+    # Only transports over a uart have a baudrate
+    baudrate = None
+
+    @property
+    @abstractmethod
+    def in_waiting(self):
+        '''
+        Number of bytes that can be read without waiting
+        '''
+
+    @abstractmethod
+    def write(self, data):
+        pass
+
+    @abstractmethod
+    def readinto(self, buffer):
+        '''
+        Reads at most len(buffer) bytes into buffer and returns the number
+        of bytes read.
+        '''
+
+    def read(self, size):
+        buffer = bytearray(size)
+        return bytes(buffer[:self.readinto(buffer)])
+
+    def reset_input_buffer(self):
+        '''
+        Drops the data that has arrived but has not been read.
+        '''
+        while self.in_waiting:
+            self.read(self.in_waiting)
+
+    def close(self):
+        pass
+
+def _wait_readable(fd, timeout):
+    readable, _, _ = select.select([fd], [], [], timeout)
+    return bool(readable)
+
+class SerialTransport(Transport):
+    '''
+    Transport over a serial port, or any other pyserial url such as
+    socket://HOST:PORT, opened with serial_for_url.
+    '''
+
+    def __init__(self, url, baudrate=9600, timeout=0.1):
+        import serial
+        self.serial = serial.serial_for_url(url, baudrate=baudrate,
+                timeout=timeout)
+        self.timeout = timeout
+        # Ports with a file descriptor are read into the buffer directly,
+        # where the platform can read into a buffer
+        self._fd = getattr(self.serial, 'fd', None) if hasattr(os,
+                'readv') else None
+
+    @property
+    def baudrate(self):
+        return self.serial.baudrate
+
+    @baudrate.setter
+    def baudrate(self, baudrate):
+        self.serial.baudrate = baudrate
+
+    @property
+    def in_waiting(self):
+        return self.serial.in_waiting
+
+    def write(self, data):
+        return self.serial.write(data)
+
+    def readinto(self, buffer):
+        if self._fd is None:
+            return self.serial.readinto(buffer)
+        if not _wait_readable(self._fd, self.timeout):
+            return 0
+        return os.readv(self._fd, [buffer])
+
+    def reset_input_buffer(self):
+        self.serial.reset_input_buffer()
+
+    def close(self):
+        self.serial.close()
+
+class SocketTransport(Transport):
+    '''
+    Transport over a tcp connection, such as to a MuxServer.
+    '''
+
+    def __init__(self, host, port, timeout=0.1):
+        self.sock = socket.create_connection((host, port))
+        # Commands are small, and each is waited for
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.timeout = timeout
+
+    @property
+    def in_waiting(self):
+        if fcntl is None:
+            if not _wait_readable(self.sock, 0):
+                return 0
+            return len(self.sock.recv(65536, socket.MSG_PEEK))
+        size = array.array('i', [0])
+        fcntl.ioctl(self.sock.fileno(), termios.FIONREAD, size)
+        return size[0]
+
+    def write(self, data):
+        self.sock.sendall(data)
+        return len(data)
+
+    def readinto(self, buffer):
+        if not _wait_readable(self.sock, self.timeout):
+            return 0
+        return self.sock.recv_into(buffer)
+
+    def close(self):
+        self.sock.close()
+
+class EmulatorTransport(Transport):
+    '''
+    Transport to a BoardEmulator in the same process, which executes the
+    commands as soon as they are written. Reads never wait.
+    '''
+
+    def __init__(self, emulator):
+        self.emulator = emulator
+        self._buffer = bytearray()
+
+    @property
+    def in_waiting(self):
+        return len(self._buffer)
+
+    def write(self, data):
+        self._buffer.extend(self.emulator.process(data))
+        return len(data)
+
+    def readinto(self, buffer):
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        del self._buffer[:size]
+        return size
+
+_EMULATOR_SCHEME = 'emulator://'
+_TCP_SCHEME = 'tcp://'
+
+def open_transport(url, spec=None, baudrate=9600, timeout=0.1):
+    '''
+    Opens the Transport to the board at url, which is one of
+     - tcp://HOST:PORT, for a SocketTransport
+     - emulator://, for an EmulatorTransport to a new BoardEmulator of spec
+     - a serial port or other pyserial url, for a SerialTransport
+    '''
+    if url.startswith(_TCP_SCHEME):
+        host, _, port = url[len(_TCP_SCHEME):].rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError('invalid tcp url %s' % url)
+        return SocketTransport(host, int(port), timeout)
+    if url.startswith(_EMULATOR_SCHEME):
+        if spec is None:
+            raise ValueError('the emulator needs a spec')
+        from ._emulator import BoardEmulator
+        return EmulatorTransport(BoardEmulator(spec))
+    return SerialTransport(url, baudrate, timeout)
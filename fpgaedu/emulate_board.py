@@ -0,0 +1,27 @@
+import argparse
+from fpgaedu import ControllerSpec, BoardEmulator
+
+def _parse_args():
+    '''
+    Parses the command line arguments.
+    '''
+    parser = argparse.ArgumentParser(description='Emulates a board running \
+            the controller with a memory experiment on a pseudo-terminal.')
+    parser.add_argument('-a', '--addressWidth', required=True, type=int)
+    parser.add_argument('-d', '--dataWidth', required=True, type=int)
+    parser.add_argument('-b', '--baudrate', type=int, default=None,
+            help='Delays commands and responses by their transmission time \
+                    at this baudrate.')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = _parse_args()
+
+    emulator = BoardEmulator(ControllerSpec(args.addressWidth, 
+        args.dataWidth), baudrate=args.baudrate)
+    print('Emulating board on %s' % emulator.open())
+    try:
+        emulator.serve_forever()
+    except KeyboardInterrupt:
+        emulator.close()
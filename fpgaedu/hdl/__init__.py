@@ -1,12 +1,19 @@
 from ._clockgen import ClockGen
 from ._rom import Rom
 from ._ram import Ram
+from ._dual_port_ram import DualPortRam
 from ._uart_tx import UartTx
 from ._uart_rx import UartRx
 from ._baudgen import BaudGen
 from ._baudgen_rx_lookup import BaudGenRxLookup
+from ._statistics import Statistics
 from ._controller import Controller
 from ._fifo import Fifo
+from ._block_ram_fifo import BlockRamFifo
 from ._message_receiver import MessageReceiver
 from ._message_transmitter import MessageTransmitter
 from ._test_experiment import TestExperiment
+from ._uart_stimulus import uart_transitions, UartStimulus
+from ._uart_monitor import UartMonitor, uart_decode
+from ._vhdl_cache import VhdlCache, hdl_sources
+from ._entities import register, entity, generate_entities
@@ -2,8 +2,10 @@ from myhdl import always_seq, always_comb, Signal, intbv
 from math import ceil
 
 from fpgaedu.hdl import Rom
+from fpgaedu.hdl._entities import register
 
-def BaudGen(clk, reset, rx_tick, tx_tick, clk_freq=100000000, baudrate=9600, rx_div=16):
+def BaudGen(clk, reset, rx_tick, tx_tick, clk_freq=100000000, baudrate=9600, 
+        rx_div=16, baud_div=None):
     """
     rss232 standard baud rates
     300
@@ -18,9 +20,20 @@ def BaudGen(clk, reset, rx_tick, tx_tick, clk_freq=100000000, baudrate=9600, rx_
     57600
     115200
     230400
+
+    baud_div
+        Optional parameter setting the number of clock cycles per tx_tick
+        directly, overriding clk_freq and baudrate. Intended for simulation,
+        where a low ratio saves simulating thousands of idle cycles per bit.
     """
    
-    tx_tick_max = int(round(clk_freq/baudrate))
+    if baud_div is not None:
+        tx_tick_max = baud_div
+    else:
+        tx_tick_max = int(round(clk_freq/baudrate))
+    if tx_tick_max < rx_div:
+        raise ValueError('a baud period must last at least rx_div clock '
+                'cycles')
 
     tick_count_reg = Signal(intbv(0, min=0, max=tx_tick_max))
     tick_count_next = Signal(intbv(0, min=0, max=tx_tick_max))
@@ -77,3 +90,6 @@ def BaudGen(clk, reset, rx_tick, tx_tick, clk_freq=100000000, baudrate=9600, rx_
 
     return reg_logic, next_state_logic, output_logic, rx_tick_lookup_rom 
 
+register(BaudGen, 'baudgen', parameters=('clk_freq', 'baudrate', 'rx_div',
+        'baud_div'), inputs=('clk', 'reset'), outputs=('rx_tick', 'tx_tick'),
+        sources=(Rom,))
@@ -0,0 +1,125 @@
+from myhdl import Signal, intbv, always_seq, always_comb, always
+from fpgaedu.hdl._entities import register
+
+def BlockRamFifo(clk, reset, din, enqueue, dout, dequeue, empty, full,
+        data_width=8, depth=1024, count=None, almost_full=None,
+        almost_empty=None, almost_full_offset=1, almost_empty_offset=1):
+    '''
+    Fifo with the same interface and behaviour as Fifo, using a memory
+    with a synchronous read port so that it can be implemented in block
+    ram.
+
+    clk
+        Input clock signal
+    reset
+        Input reset signal
+    din
+        Data in input signal
+    enqueue
+        Input signal that adds the data on din to the buffer. Ignored when
+        the fifo is full.
+    dout
+        Data out output signal. if empty, dout = 0. If not empty, dout is
+        always set to the value of the oldest item in the buffer
+    dequeue
+        Removes the oldest item from the buffer and sets dout to be the next-
+        oldest value. Ignored when the fifo is empty.
+    empty
+        Output signal indicating that the fifo is empty
+    full
+        Output signal indicating that the fifo is full
+    depth
+        Parameter setting the number of items in the buffer, which must be
+        a power of two
+    count
+        Optional output signal exposing the number of items in the buffer
+    almost_full
+        Optional output signal indicating that at most almost_full_offset
+        items can be added before the fifo is full
+    almost_empty
+        Optional output signal indicating that the fifo contains at most
+        almost_empty_offset items
+    '''
+
+    if depth < 2 or depth & (depth - 1) != 0:
+        raise ValueError('depth must be a power of two larger than 1')
+
+    addr_width = depth.bit_length() - 1
+
+    if count is None:
+        count = Signal(intbv(0, min=0, max=depth+1))
+    if almost_full is None:
+        almost_full = Signal(False)
+    if almost_empty is None:
+        almost_empty = Signal(False)
+
+    wr_addr_reg = Signal(intbv(0)[addr_width:0])
+    rd_addr_reg = Signal(intbv(0)[addr_width:0])
+    rd_addr_next = Signal(intbv(0)[addr_width:0])
+    count_reg = Signal(intbv(0, min=0, max=depth+1))
+    do_enqueue = Signal(False)
+    do_dequeue = Signal(False)
+    # The memory is read one cycle ahead, at the address of the item that
+    # is the oldest in the next cycle. When that item is written in the
+    # same cycle, the memory returns stale data and din is bypassed instead.
+    mem_dout = Signal(intbv(0)[data_width:0])
+    bypass_reg = Signal(False)
+    bypass_data_reg = Signal(intbv(0)[data_width:0])
+
+    mem = [Signal(intbv(0)[data_width:]) for i in range(depth)]
+
+    @always_comb
+    def control_logic():
+        do_enqueue.next = enqueue and count_reg != depth
+        do_dequeue.next = dequeue and count_reg != 0
+
+    @always_comb
+    def read_addr_logic():
+        if do_dequeue:
+            rd_addr_next.next = (rd_addr_reg + 1) % depth
+        else:
+            rd_addr_next.next = rd_addr_reg
+
+    @always(clk.posedge)
+    def memory_logic():
+        if do_enqueue:
+            mem[wr_addr_reg].next = din
+        mem_dout.next = mem[rd_addr_next]
+
+    @always_seq(clk.posedge, reset)
+    def register_logic():
+        rd_addr_reg.next = rd_addr_next
+        bypass_reg.next = do_enqueue and wr_addr_reg == rd_addr_next
+        bypass_data_reg.next = din
+
+        if do_enqueue:
+            wr_addr_reg.next = (wr_addr_reg + 1) % depth
+
+        if do_enqueue and not do_dequeue:
+            count_reg.next = count_reg + 1
+        elif do_dequeue and not do_enqueue:
+            count_reg.next = count_reg - 1
+
+    @always_comb
+    def output_logic():
+        count.next = count_reg
+        empty.next = count_reg == 0
+        full.next = count_reg == depth
+        almost_empty.next = count_reg <= almost_empty_offset
+        almost_full.next = count_reg >= depth - almost_full_offset
+
+        if count_reg == 0:
+            dout.next = 0
+        elif bypass_reg:
+            dout.next = bypass_data_reg
+        else:
+            dout.next = mem_dout
+
+    return (control_logic, read_addr_logic, memory_logic, register_logic,
+            output_logic)
+
+register(BlockRamFifo, 'block_ram_fifo', parameters=('data_width', 'depth',
+        'almost_full_offset', 'almost_empty_offset'),
+        inputs=('clk', 'reset', 'din', 'enqueue', 'dequeue'),
+        outputs=('dout', 'empty', 'full', 'count', 'almost_full',
+            'almost_empty'))
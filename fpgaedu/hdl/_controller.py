@@ -4,10 +4,13 @@ from fpgaedu import ControllerSpec
 from fpgaedu.hdl._controller_control import ControllerControl
 from fpgaedu.hdl._controller_cycle_control import ControllerCycleControl
 from fpgaedu.hdl._controller_response_compose import ControllerResponseCompose
+from fpgaedu.hdl._statistics import Statistics
+from fpgaedu.hdl._entities import register
 
 def Controller(spec, clk, reset, rx_msg, rx_next, rx_ready, tx_msg, tx_next, 
         tx_ready, exp_addr, exp_data_write, exp_data_read, exp_wen, exp_reset, 
-        exp_clk_en, exp_reset_active=False):
+        exp_clk_en, exp_reset_active=False, stat_events=None, rx_free=None,
+        exp_break=None):
     '''
     spec
         the controller specification
@@ -33,6 +36,20 @@ def Controller(spec, clk, reset, rx_msg, rx_next, rx_ready, tx_msg, tx_next,
         its initial state
     exp_clk_en
         Output clock enable signal for the experiment
+    stat_events
+        Optional input bit vector of width spec.num_stats carrying the 
+        statistics events of the surrounding board component. The 
+        controller sets the tx_stalls and commands bits itself.
+    rx_free
+        Optional input signal exposing the free capacity of the receive
+        buffer in bytes, returned in response to the credit command
+    exp_break
+        Optional input allowing the experiment to pause autonomous mode
+
+    Whenever the controller switches between manual and autonomous mode, an
+    event response carrying the cycle count is sent, in addition to the 
+    response of the command causing the switch, if any. Events are sent in
+    cycles in which no command response is being sent.
 
     '''
 
@@ -45,23 +62,44 @@ def Controller(spec, clk, reset, rx_msg, rx_next, rx_ready, tx_msg, tx_next,
     ex_res_cycle_count_next = Signal(intbv(0)[spec.width_value:0])
     ex_res_addr_reg = Signal(intbv(0)[spec.width_addr:0])
     ex_res_addr_next = Signal(intbv(0)[spec.width_addr:0])
+    ex_res_stat_value_reg = Signal(intbv(0)[spec.width_value:0])
+    ex_res_stat_value_next = Signal(intbv(0)[spec.width_value:0])
+    ex_res_rx_free_reg = Signal(intbv(0)[spec.width_value:0])
+    ex_res_rx_free_next = Signal(intbv(0)[spec.width_value:0])
 
     #internal signals
     cycle_autonomous = Signal(False)
     cycle_start = Signal(False)
     cycle_pause = Signal(False)
     cycle_step = Signal(False)
+    # The cycle control switches mode on the falling edge before the command
+    # causing the switch is executed, so commands are decoded using the mode
+    # as registered on the previous rising edge.
+    cycle_autonomous_reg = Signal(False)
+
+    ctrl_opcode_res = Signal(intbv(0)[spec.width_opcode:0])
+    ctrl_nop = Signal(True)
+    ctrl_tx_ready = Signal(False)
+    event_pending_reg = Signal(False)
+    event_inject = Signal(False)
+    ex_res_event_reg = Signal(False)
     
     cmd_message = rx_msg
     cmd_opcode = Signal(intbv(0)[spec.width_opcode:0])
     cmd_addr = Signal(intbv(0)[spec.width_addr:0])
     cmd_data = Signal(intbv(0)[spec.width_data:0])
 
+    if stat_events is None:
+        stat_events = Signal(intbv(0)[spec.num_stats:0])
+    stat_events_int = Signal(intbv(0)[spec.num_stats:0])
+    if rx_free is None:
+        rx_free = Signal(intbv(0)[spec.width_value:0])
+
     # EX stage instances
     control = ControllerControl(spec=spec, opcode_cmd=cmd_opcode, reset=reset,
-            opcode_res=ex_res_opcode_res_next, rx_ready=rx_ready,
-            cycle_autonomous=cycle_autonomous, rx_next=rx_next,
-            tx_ready=tx_ready, nop=ex_res_nop_next,
+            opcode_res=ctrl_opcode_res, rx_ready=rx_ready,
+            cycle_autonomous=cycle_autonomous_reg, rx_next=rx_next,
+            tx_ready=ctrl_tx_ready, nop=ctrl_nop,
             exp_wen=exp_wen, exp_reset=exp_reset, cycle_start=cycle_start, 
             cycle_pause=cycle_pause, cycle_step=cycle_step,
             exp_reset_active=exp_reset_active)
@@ -69,13 +107,19 @@ def Controller(spec, clk, reset, rx_msg, rx_next, rx_ready, tx_msg, tx_next,
     cycle_control = ControllerCycleControl(spec=spec, clk=clk, reset=reset,
             start=cycle_start, pause=cycle_pause, step=cycle_step, 
             cycle_autonomous=cycle_autonomous, 
-            cycle_count=ex_res_cycle_count_next, exp_clk_en=exp_clk_en)
+            cycle_count=ex_res_cycle_count_next, exp_clk_en=exp_clk_en,
+            exp_break=exp_break)
+
+    statistics = Statistics(clk=clk, reset=reset, events=stat_events_int,
+            index=cmd_addr, value=ex_res_stat_value_next, 
+            num_stats=spec.num_stats)
 
     # RES stage instances
     res_compose = ControllerResponseCompose(spec=spec, 
             opcode_res=ex_res_opcode_res_reg,
             addr=ex_res_addr_reg, data=exp_data_read,
             nop=ex_res_nop_reg, cycle_count=ex_res_cycle_count_reg,
+            stat_value=ex_res_stat_value_reg, rx_free=ex_res_rx_free_reg,
             tx_ready=tx_ready, tx_next=tx_next, tx_msg=tx_msg)
 
     @always_seq(clk.posedge, reset)
@@ -84,10 +128,47 @@ def Controller(spec, clk, reset, rx_msg, rx_next, rx_ready, tx_msg, tx_next,
         ex_res_nop_reg.next = ex_res_nop_next
         ex_res_cycle_count_reg.next = ex_res_cycle_count_next
         ex_res_addr_reg.next = ex_res_addr_next
+        ex_res_stat_value_reg.next = ex_res_stat_value_next
+        ex_res_rx_free_reg.next = ex_res_rx_free_next
+        ex_res_event_reg.next = event_inject
 
     @always_comb
     def pipeline_next_state_logic():
         ex_res_addr_next.next = cmd_addr
+        ex_res_rx_free_next.next = rx_free
+        if event_inject:
+            ex_res_nop_next.next = False
+            if cycle_autonomous:
+                ex_res_opcode_res_next.next = spec.opcode_res_event_autonomous
+            else:
+                ex_res_opcode_res_next.next = spec.opcode_res_event_manual
+        else:
+            ex_res_nop_next.next = ctrl_nop
+            ex_res_opcode_res_next.next = ctrl_opcode_res
+
+    @always_seq(clk.posedge, reset)
+    def event_register_logic():
+        cycle_autonomous_reg.next = cycle_autonomous
+        if cycle_autonomous != cycle_autonomous_reg:
+            event_pending_reg.next = True
+        elif event_inject:
+            event_pending_reg.next = False
+
+    @always_comb
+    def event_logic():
+        # An event is only injected into an otherwise empty EX stage while 
+        # the RES stage is idle, and no command is executed in the cycle 
+        # after, so that the transmitter is ready for both messages.
+        ctrl_tx_ready.next = tx_ready and not ex_res_event_reg
+        event_inject.next = (event_pending_reg and ctrl_nop and 
+                ex_res_nop_reg and tx_ready and reset != reset.active)
+
+    @always_comb
+    def stat_events_logic():
+        stat_events_int.next = stat_events
+        stat_events_int.next[spec.stat_tx_stalls] = (rx_ready and 
+                not tx_ready and reset != reset.active)
+        stat_events_int.next[spec.stat_commands] = not ctrl_nop
 
     @always_comb
     def experiment_setup_connections():
@@ -103,8 +184,15 @@ def Controller(spec, clk, reset, rx_msg, rx_next, rx_ready, tx_msg, tx_next,
         cmd_data.next = cmd_message[spec.index_data_high+1:
                 spec.index_data_low]
 
-    return (control, cycle_control, res_compose, split_cmd, 
+    return (control, cycle_control, statistics, res_compose, split_cmd, 
             experiment_setup_connections, pipeline_register_logic, 
-            pipeline_next_state_logic)
-
+            pipeline_next_state_logic, stat_events_logic, 
+            event_register_logic, event_logic)
 
+register(Controller, 'controller', parameters=('spec', 'exp_reset_active'),
+        inputs=('clk', 'reset', 'rx_msg', 'rx_ready', 'tx_ready',
+            'exp_data_read', 'stat_events', 'rx_free', 'exp_break'),
+        outputs=('rx_next', 'tx_msg', 'tx_next', 'exp_addr',
+            'exp_data_write', 'exp_wen', 'exp_reset', 'exp_clk_en'),
+        sources=(ControllerSpec, ControllerControl, ControllerCycleControl,
+            ControllerResponseCompose, Statistics))
@@ -69,6 +69,10 @@ def ControllerControl(spec, reset, opcode_cmd, opcode_res, rx_ready,
             opcode_res.next = spec.opcode_res_pause_error_mode
         elif opcode_cmd == spec.opcode_cmd_status:
             opcode_res.next = spec.opcode_res_status
+        elif opcode_cmd == spec.opcode_cmd_stat:
+            opcode_res.next = spec.opcode_res_stat
+        elif opcode_cmd == spec.opcode_cmd_credit:
+            opcode_res.next = spec.opcode_res_credit
 
         cycle_start.next = (opcode_cmd == spec.opcode_cmd_start and 
                 not cycle_autonomous and not nop_int and reset != reset.active)
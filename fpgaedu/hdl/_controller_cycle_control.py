@@ -1,7 +1,7 @@
 from myhdl import always_seq, always_comb, enum, Signal, intbv
 
 def ControllerCycleControl(spec, clk, reset, start, pause, step, 
-        cycle_autonomous, cycle_count, exp_clk_en):
+        cycle_autonomous, cycle_count, exp_clk_en, exp_break=None):
     '''
     spec:
         Controller spec
@@ -21,7 +21,13 @@ def ControllerCycleControl(spec, clk, reset, start, pause, step,
         Output
     exp_clk_en:
         Output
+    exp_break:
+        Optional input, pauses autonomous mode like pause does. Allows the
+        experiment to end an autonomous run by itself.
     '''
+
+    if exp_break is None:
+        exp_break = Signal(False)
     state_t = enum('MANUAL', 'AUTONOMOUS')
 
     state_reg = Signal(state_t.MANUAL)
@@ -52,7 +58,7 @@ def ControllerCycleControl(spec, clk, reset, start, pause, step,
                 state_next.next = state_t.AUTONOMOUS
                 exp_clk_en_next.next = True
         elif state_reg == state_t.AUTONOMOUS:
-            if pause:
+            if pause or exp_break:
                 exp_clk_en_next.next = False
                 state_next.next = state_t.MANUAL
             else:
@@ -1,7 +1,7 @@
-from myhdl import always_comb
+from myhdl import always_comb, Signal, intbv
 
 def ControllerResponseCompose(spec, opcode_res, addr, data, nop, cycle_count,
-        tx_ready, tx_next, tx_msg):
+        tx_ready, tx_next, tx_msg, stat_value=None, rx_free=None):
     '''
     opcode_res:
         input signal
@@ -15,8 +15,17 @@ def ControllerResponseCompose(spec, opcode_res, addr, data, nop, cycle_count,
         input signal
     tx_next:
         output signal
+    stat_value:
+        optional input signal
+    rx_free:
+        optional input signal
     '''
 
+    if stat_value is None:
+        stat_value = Signal(intbv(0)[spec.width_value:0])
+    if rx_free is None:
+        rx_free = Signal(intbv(0)[spec.width_value:0])
+
     @always_comb
     def output_logic():
         tx_next.next = False
@@ -44,9 +53,17 @@ def ControllerResponseCompose(spec, opcode_res, addr, data, nop, cycle_count,
                     cycle_count + 1
         elif (opcode_res == spec.opcode_res_start_success or
                 opcode_res == spec.opcode_res_pause_success or
-                opcode_res == spec.opcode_res_status):
+                opcode_res == spec.opcode_res_status or
+                opcode_res == spec.opcode_res_event_manual or
+                opcode_res == spec.opcode_res_event_autonomous):
             tx_msg.next[spec.index_value_high+1:
                     spec.index_value_low] = cycle_count
+        elif (opcode_res == spec.opcode_res_stat):
+            tx_msg.next[spec.index_value_high+1:
+                    spec.index_value_low] = stat_value
+        elif (opcode_res == spec.opcode_res_credit):
+            tx_msg.next[spec.index_value_high+1:
+                    spec.index_value_low] = rx_free
         else:
             tx_msg.next[spec.index_value_high+1:
                     spec.index_value_low] = 0
@@ -0,0 +1,87 @@
+from myhdl import Signal, ConcatSignal, intbv, always, always_comb
+
+def DualPortRam(clk, din, waddr, wen, dout, raddr, data_width=8, depth=128,
+        byte_width=None, output_register=False):
+    '''
+    Simple dual-port ram model with independent write and read ports,
+    following the block ram inference templates.
+
+    clk
+        Input clock signal
+    din
+        Input data to write
+    waddr
+        Input write address
+    wen
+        Input write enable. When byte_width is set, wen is a bit vector
+        holding one enable bit per byte lane, bit i enabling the write of
+        din[(i+1)*byte_width:i*byte_width].
+    dout
+        Output data read from raddr. The read is synchronous, so that dout
+        shows the data at the raddr of the previous clock cycle, or of two
+        clock cycles back when output_register is set. A simultaneous write
+        to the address being read returns the old data.
+    raddr
+        Input read address
+    data_width
+        Parameter setting the width of a memory word
+    depth
+        Parameter setting the number of memory words
+    byte_width
+        Optional parameter setting the width of a write enable lane, which
+        must divide data_width
+    output_register
+        Parameter adding a register stage to the read port
+    '''
+
+    if byte_width is None:
+        byte_width = data_width
+    if data_width % byte_width != 0:
+        raise ValueError('byte_width must divide data_width')
+    lanes = data_width // byte_width
+
+    mem_dout = Signal(intbv(0)[data_width:0])
+
+    if lanes == 1:
+        lane_instances = _RamLane(clk=clk, din=din, waddr=waddr, wen=wen,
+                dout=mem_dout, raddr=raddr, width=data_width, depth=depth)
+    else:
+        lane_instances = []
+        lane_douts = []
+        for i in range(lanes):
+            lane_dout = Signal(intbv(0)[byte_width:0])
+            lane_instances.append(_RamLane(clk=clk,
+                din=din((i+1)*byte_width, i*byte_width), waddr=waddr,
+                wen=wen(i), dout=lane_dout, raddr=raddr, width=byte_width,
+                depth=depth))
+            lane_douts.append(lane_dout)
+        lane_concat = ConcatSignal(*reversed(lane_douts))
+
+        @always_comb
+        def lane_concat_logic():
+            mem_dout.next = lane_concat
+
+        lane_instances.append(lane_concat_logic)
+
+    if output_register:
+        @always(clk.posedge)
+        def output_logic():
+            dout.next = mem_dout
+    else:
+        @always_comb
+        def output_logic():
+            dout.next = mem_dout
+
+    return lane_instances, output_logic
+
+def _RamLane(clk, din, waddr, wen, dout, raddr, width, depth):
+
+    mem = [Signal(intbv(0)[width:]) for i in range(depth)]
+
+    @always(clk.posedge)
+    def logic():
+        if wen:
+            mem[waddr].next = din
+        dout.next = mem[raddr]
+
+    return logic
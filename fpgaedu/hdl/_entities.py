@@ -0,0 +1,282 @@
+import os, time, inspect, hashlib
+from functools import partial
+
+from myhdl import toVHDL, instance, SignalType, ResetSignal
+
+# The instantiations that this module renders are part of every conversion
+_ENTITIES_SOURCE = os.path.abspath(__file__)
+
+_registry = {}
+# The generation in progress, if any
+_active = {'generation': None}
+
+def _source_file(obj):
+    return os.path.abspath(inspect.getsourcefile(obj))
+
+class _Block(object):
+
+    def __init__(self, func, name, parameters, inputs, outputs, sources):
+        self.func = func
+        self.name = name
+        self.parameters = tuple(parameters)
+        self.directions = dict([(port, 'in') for port in inputs] +
+                [(port, 'out') for port in outputs])
+        self.sources = sorted(set([_source_file(func), _ENTITIES_SOURCE] +
+            [_source_file(source) for source in sources]))
+        self.signature = inspect.signature(func)
+
+    def bind(self, args, kwargs):
+        '''
+        Returns the parameters and the port signals of a call as ordered
+        lists of (name, value) pairs. Optional ports that are None are
+        left out.
+        '''
+        arguments = self.signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        parameters = []
+        ports = []
+        for name, value in arguments.arguments.items():
+            if name in self.parameters:
+                parameters.append((name, value))
+            elif isinstance(value, SignalType):
+                ports.append((name, value))
+            elif value is not None:
+                raise ValueError('port %s of %s is not a signal' % (name,
+                    self.name))
+        return parameters, ports
+
+def register(func, name, parameters=(), inputs=(), outputs=(), sources=()):
+    '''
+    Registers the hdl block func, which generate_entities converts to a
+    separate vhdl entity when it is instantiated through entity. Every
+    argument of func must be declared as a parameter, an input or an
+    output.
+
+    name
+        The base name of the vhdl entities, to which a hash of the
+        parameters and port types is appended
+    parameters
+        The names of the arguments of func that are not port signals, which
+        together with the port types determine the entity
+    inputs
+        The names of the input port arguments of func
+    outputs
+        The names of the output port arguments of func
+    sources
+        The functions, classes or modules besides func whose source files
+        the conversion of func depends on. These are the blocks that func
+        converts inline rather than as entities, and the code that they
+        use.
+    '''
+    arguments = inspect.signature(func).parameters
+    declared = list(parameters) + list(inputs) + list(outputs)
+    for argument in declared:
+        if argument not in arguments:
+            raise ValueError('%s has no argument %s' % (func.__name__,
+                argument))
+        if declared.count(argument) > 1:
+            raise ValueError('argument %s of %s is declared more than once'
+                    % (argument, func.__name__))
+    for argument in arguments:
+        if argument not in declared:
+            raise ValueError('argument %s of %s is not declared' % (argument,
+                func.__name__))
+    _registry[func] = _Block(func, name, parameters, inputs, outputs,
+            sources)
+
+def entity(func):
+    '''
+    Returns the registered hdl block func, or while generate_entities
+    converts a design, a function that instantiates the separately
+    converted entity of func in its place.
+    '''
+    if func not in _registry:
+        raise ValueError('%s is not registered' % func.__name__)
+    if _active['generation'] is None:
+        return func
+    return partial(_instantiate, _registry[func])
+
+def _port_type(signal):
+    if isinstance(signal, ResetSignal):
+        return ('reset', signal.active)
+    if isinstance(signal.val, bool):
+        return ('bool',)
+    return ('intbv', len(signal), signal.min, signal.max)
+
+def _entity_name(block, parameters, ports):
+    description = repr((block.name, parameters,
+        [(name, _port_type(signal)) for name, signal in ports]))
+    return '%s_%s' % (block.name,
+            hashlib.sha256(description.encode()).hexdigest()[:8])
+
+class _InstanceCode(object):
+    '''
+    The vhdl instantiation of an entity. It is rendered once the
+    conversion has named the signals, which is what a signal converts to
+    in user-defined code.
+    '''
+
+    def __init__(self, label, entity_name, ports):
+        self.label = label
+        self.entity_name = entity_name
+        self.ports = ports
+
+    def __str__(self):
+        port_map = ',\n'.join('        %s => %s' % (name, signal)
+                for name, signal in self.ports)
+        return '%s: entity work.%s(MyHDL)\n    port map (\n%s\n    );\n' % (
+                self.label, self.entity_name, port_map)
+
+def _Connection(signal):
+    # Referring to signal has the conversion declare it, also when it only
+    # connects entities. The instantiation replaces the generator.
+    @instance
+    def connection():
+        yield signal
+
+    return connection
+
+def _instantiate(block, *args, **kwargs):
+    generation = _active['generation']
+    parameters, ports = block.bind(args, kwargs)
+    entity_name = _entity_name(block, parameters, ports)
+    if generation.converting:
+        # The conversion does not see into user-defined code, which
+        # therefore declares how it uses the signals
+        for name, signal in ports:
+            if block.directions[name] == 'in':
+                signal.read = True
+            else:
+                signal.driven = 'wire'
+        instance_code = _InstanceCode('%s_inst%d' % (block.name,
+            generation.instances), entity_name, ports)
+        generation.instances += 1
+    else:
+        generation.record(entity_name, block, args, kwargs)
+
+    return [_Connection(signal) for _, signal in ports]
+
+_instantiate.vhdl_code = '$instance_code'
+
+class _Generation(object):
+    '''
+    State of generate_entities, which converts every entity after the
+    entities that it instantiates.
+    '''
+
+    def __init__(self, output_dir, cache, use_clauses):
+        self.output_dir = output_dir
+        self.cache = cache
+        self.use_clauses = use_clauses
+        self.converting = False
+        self.instances = 0
+        self.converted = set()
+        self.results = []
+        self._children = None
+
+    def record(self, entity_name, block, args, kwargs):
+        if entity_name not in self._children:
+            self._children[entity_name] = (block, args, kwargs)
+
+    def _elaborate(self, func, args, kwargs):
+        '''
+        Elaborates func without converting it, and returns the entities
+        that it instantiates.
+        '''
+        self._children = {}
+        try:
+            func(*args, **kwargs)
+        finally:
+            children, self._children = self._children, None
+        return children
+
+    def generate(self, func, name, args, kwargs, std_logic_ports):
+        '''
+        Converts the entities instantiated by func, then func itself as the
+        entity name.
+        '''
+        children = self._elaborate(func, args, kwargs)
+        for entity_name, (block, child_args, child_kwargs) in \
+                children.items():
+            if entity_name not in self.converted:
+                self.generate(block.func, entity_name, child_args,
+                        child_kwargs, False)
+
+        def conversion(directory):
+            self.converting = True
+            self.instances = 0
+            toVHDL.std_logic_ports = std_logic_ports
+            toVHDL.name = name
+            toVHDL.directory = directory
+            toVHDL.use_clauses = self.use_clauses
+            try:
+                toVHDL(func, *args, **kwargs)
+            finally:
+                self.converting = False
+
+        start = time.time()
+        if self.cache is None:
+            conversion(self.output_dir)
+            cached = False
+        else:
+            if func in _registry:
+                sources = _registry[func].sources
+            else:
+                sources = [_source_file(func), _ENTITIES_SOURCE]
+            # Converting an entity depends on the ports, but not on the
+            # contents, of the entities that it instantiates
+            arguments = {'std_logic_ports': std_logic_ports,
+                    'use_clauses': self.use_clauses,
+                    'arguments': _describe_arguments(func, args, kwargs),
+                    'children': sorted((child, sorted(
+                        block.directions.items())) for child, (block, _, _)
+                        in children.items())}
+            cached = self.cache.convert(name, arguments, self.output_dir,
+                    conversion, sources)
+        self.converted.add(name)
+        self.results.append((name, time.time() - start, cached))
+
+def _describe_arguments(func, args, kwargs):
+    arguments = inspect.signature(func).bind(*args, **kwargs)
+    arguments.apply_defaults()
+    return [(name, _port_type(value) if isinstance(value, SignalType) else
+        value) for name, value in arguments.arguments.items()]
+
+def generate_entities(output_dir, name, func, *args, **kwargs):
+    '''
+    Converts func with the given arguments to the vhdl entity name in
+    output_dir, like toVHDL. Every registered block that func instantiates
+    through entity is converted to a separate entity, once for every set of
+    parameters and port types, and instantiated by the entity that uses it.
+
+    Returns a list of (entity name, seconds, cached) tuples, with the
+    conversion time of every entity and whether it was copied from the
+    cache.
+
+    cache
+        Optional VhdlCache keyword argument. An entity is only converted if
+        its arguments or the source files that register declares for its
+        block changed, so that changing a block only converts that block.
+        An unregistered func depends on its own source file only.
+    use_clauses
+        Optional keyword argument with the use clauses of every entity
+    std_logic_ports
+        Optional keyword argument setting whether the ports of the top
+        level entity are std_logic_vector, which defaults to True. The
+        ports of the other entities are unsigned.
+    '''
+    cache = kwargs.pop('cache', None)
+    use_clauses = kwargs.pop('use_clauses', None)
+    std_logic_ports = kwargs.pop('std_logic_ports', True)
+    if _active['generation'] is not None:
+        raise ValueError('entities are already being generated')
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    generation = _Generation(output_dir, cache, use_clauses)
+    _active['generation'] = generation
+    try:
+        generation.generate(func, name, args, kwargs, std_logic_ports)
+    finally:
+        _active['generation'] = None
+    return generation.results
@@ -1,9 +1,10 @@
 from myhdl import now, Signal, intbv, always_seq, always_comb, always
 #from math import log2, ceil
 from fpgaedu.hdl import Ram
+from fpgaedu.hdl._entities import register
 
-def Fifo(clk, reset, din, enqueue, dout, dequeue, empty, full, 
-        data_width=8, depth=16):
+def Fifo(clk, reset, din, enqueue, dout, dequeue, empty, full,
+        data_width=8, depth=16, count=None):
     '''
     clk
         Input clock signal
@@ -12,68 +13,74 @@ def Fifo(clk, reset, din, enqueue, dout, dequeue, empty, full,
     din
         Data in input signal
     enqueue
-        Input signal that adds the data on din to the buffer
+        Input signal that adds the data on din to the buffer. Ignored when
+        the fifo is full.
     dout
-        Data out output signal. if empty, dout = 0. If not empty, dout is 
+        Data out output signal. if empty, dout = 0. If not empty, dout is
         always set to the value of the oldest item in the buffer
     dequeue
         Removes the oldest item from the buffer and sets dout to be the next-
-        oldest value
+        oldest value. Ignored when the fifo is empty.
     empty
         Output signal indicating that the fifo is empty
     full
         Output signal indicating that the fifo is full
+    count
+        Optional output signal exposing the number of items in the buffer
 
     '''
-    
+
     #addr_width = int(ceil(log2(depth)))
 
+    if count is None:
+        count = Signal(intbv(0, min=0, max=depth+1))
+
     oldest_addr_reg = Signal(intbv(0, min=0, max=depth))
-    oldest_addr_next = Signal(intbv(0, min=0, max=depth))
     count_reg = Signal(intbv(0, min=0, max=depth+1))
-    count_next = Signal(intbv(0, min=0, max=depth+1))
+    do_enqueue = Signal(False)
+    do_dequeue = Signal(False)
 
     #ram_addr = Signal(intbv(0)[addr_width:0])
-    #ram = Ram(clk=clk, dout=dout, din=din, addr=ram_addr, wen=wen, 
+    #ram = Ram(clk=clk, dout=dout, din=din, addr=ram_addr, wen=wen,
     #        data_width=data_width, depth=depth)
 
     mem = [Signal(intbv(0)[data_width:]) for i in range(depth)]
 
+    @always_comb
+    def control_logic():
+        do_enqueue.next = enqueue and count_reg != depth
+        do_dequeue.next = dequeue and count_reg != 0
+
     @always_seq(clk.posedge, reset)
     def register_logic():
-        oldest_addr_reg.next = oldest_addr_next
-        count_reg.next = count_next
+        if do_enqueue:
+            mem[(oldest_addr_reg + count_reg) % depth].next = din
 
-        if dequeue:
-            oldest_addr_next.next = (oldest_addr_reg + 1) % depth
-        else:
-            oldest_addr_next.next = oldest_addr_reg
+        if do_dequeue:
+            oldest_addr_reg.next = (oldest_addr_reg + 1) % depth
 
-        if enqueue and not dequeue:
-            if not(count_reg == depth):
-                count_next.next = count_reg + 1
-                mem[(oldest_addr_reg + count_reg) % depth].next = din
-        elif not enqueue and dequeue:
-            if count_reg == 0:
-                count_next.next = count_reg
-            else:
-                count_next.next = count_reg - 1
-        else:
-            count_next.next = count_reg
+        if do_enqueue and not do_dequeue:
+            count_reg.next = count_reg + 1
+        elif do_dequeue and not do_enqueue:
+            count_reg.next = count_reg - 1
 
     @always_comb
     def output_logic():
         empty.next = False
         full.next = False
+        count.next = count_reg
         if count_reg == 0:
             dout.next = 0
         else:
             dout.next = mem[oldest_addr_reg]
-        
+
         if count_reg == 0:
             empty.next = True
         elif count_reg == depth:
             full.next = True
 
-    #return register_logic, next_state_logic, output_logic
-    return register_logic, output_logic
+    return control_logic, register_logic, output_logic
+
+register(Fifo, 'fifo', parameters=('data_width', 'depth'),
+        inputs=('clk', 'reset', 'din', 'enqueue', 'dequeue'),
+        outputs=('dout', 'empty', 'full', 'count'))
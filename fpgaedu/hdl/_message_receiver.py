@@ -1,7 +1,8 @@
 from myhdl import (enum, always_comb, always_seq, Signal, intbv, always)
 
 def MessageReceiver(spec, clk, reset, rx_fifo_data_read, rx_fifo_empty, 
-        rx_fifo_dequeue, message, message_ready, receive_next):
+        rx_fifo_dequeue, message, message_ready, receive_next, 
+        message_received=None, message_error=None):
 
     '''
     Input signals:
@@ -14,8 +15,18 @@ def MessageReceiver(spec, clk, reset, rx_fifo_data_read, rx_fifo_empty,
         rx_fifo_dequeue
         message
         message_ready
+        message_received (optional)
+            pulse indicating that a complete frame has been received
+        message_error (optional)
+            pulse indicating that a partially received frame has been 
+            discarded because of an unescaped start or stop character
     '''
 
+    if message_received is None:
+        message_received = Signal(False)
+    if message_error is None:
+        message_error = Signal(False)
+
     state_t = enum('READ_START', 'READ_DATA', 'READ_STOP', 'READY')
 
     state_reg = Signal(state_t.READ_START)
@@ -44,19 +55,29 @@ def MessageReceiver(spec, clk, reset, rx_fifo_data_read, rx_fifo_empty,
         state_next.next = state_reg
         message_next.next = message_reg
         byte_count_next.next = byte_count_reg
+        message_received.next = False
+        message_error.next = False
 
-        esc_next.next = not rx_fifo_empty and rx_fifo_data_read == spec.chr_esc
+        esc_next.next = esc_reg
+        if state_reg != state_t.READY and not rx_fifo_empty:
+            # an escaped escape character does not start a new escape
+            esc_next.next = not esc_reg and rx_fifo_data_read == spec.chr_esc
 
         if state_reg == state_t.READ_START:
             if rx_fifo_data_read == spec.chr_start and not rx_fifo_empty and \
                     not esc_reg:
                 state_next.next = state_t.READ_DATA
         elif state_reg == state_t.READ_DATA:
-            if not esc_reg and rx_fifo_data_read == spec.chr_start:
+            # The fifo output is not valid while the fifo is empty
+            if rx_fifo_empty:
+                pass
+            elif not esc_reg and rx_fifo_data_read == spec.chr_start:
                 byte_count_next.next = 0
+                message_error.next = byte_count_reg != 0
             elif not esc_reg and rx_fifo_data_read == spec.chr_stop:
                 byte_count_next.next = 0
                 state_next.next = state_t.READ_START
+                message_error.next = True
             elif (not esc_reg and not rx_fifo_empty and rx_fifo_data_read != \
                     spec.chr_esc) or (esc_reg and not rx_fifo_empty):
                 byte_count_next.next = (byte_count_reg + 1) % \
@@ -72,9 +93,19 @@ def MessageReceiver(spec, clk, reset, rx_fifo_data_read, rx_fifo_empty,
                 if byte_count_reg == spec.width_message_bytes-1:
                     state_next.next = state_t.READ_STOP
         elif state_reg == state_t.READ_STOP:
-            if rx_fifo_data_read == spec.chr_stop and not rx_fifo_empty and \
-                    not esc_reg:
+            if rx_fifo_empty:
+                pass
+            elif rx_fifo_data_read == spec.chr_stop and not esc_reg:
                 state_next.next = state_t.READY
+                message_received.next = True
+            elif rx_fifo_data_read == spec.chr_start and not esc_reg:
+                # restart the frame
+                state_next.next = state_t.READ_DATA
+                message_error.next = True
+            elif rx_fifo_data_read != spec.chr_esc or esc_reg:
+                # a frame with too many bytes is discarded
+                state_next.next = state_t.READ_START
+                message_error.next = True
         elif state_reg == state_t.READY:
             if receive_next:
                 state_next.next = state_t.READ_START
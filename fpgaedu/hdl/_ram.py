@@ -10,7 +10,7 @@ def Ram(clk, dout, din, addr, wen, data_width=8, depth=128):
 
     @always(clk.posedge)
     def write():
-        if we:
+        if wen:
             mem[addr].next = din
 
     @always_comb
@@ -0,0 +1,41 @@
+from myhdl import always_seq, always_comb, Signal, intbv
+
+def Statistics(clk, reset, events, index, value, num_stats=8):
+    '''
+    clk
+        Clock input
+    reset
+        Reset input, clears all counters
+    events
+        Input bit vector. Every clock cycle in which bit i is set increments
+        counter i
+    index
+        Input selecting the counter to expose on value
+    value
+        Output exposing the value of the counter selected by index, or 0 if
+        index is out of range. The counter width equals the width of value.
+    num_stats
+        Parameter setting the number of counters
+
+    All counters saturate at their maximum value instead of wrapping around.
+    '''
+
+    counts = [Signal(intbv(0)[len(value):0]) for i in range(num_stats)]
+
+    @always_seq(clk.posedge, reset)
+    def register_logic():
+        for i in range(num_stats):
+            # A counter is saturated when all its bits are set. Comparing
+            # with the maximum value would take a literal that does not fit
+            # in a VHDL integer for wide counters.
+            if events[i] and ~counts[i] != 0:
+                counts[i].next = counts[i] + 1
+
+    @always_comb
+    def output_logic():
+        if index < num_stats:
+            value.next = counts[index]
+        else:
+            value.next = 0
+
+    return register_logic, output_logic
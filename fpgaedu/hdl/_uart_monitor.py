@@ -0,0 +1,77 @@
+from bisect import bisect_left, bisect_right
+
+from myhdl import instance, now
+
+_LVL_START = False
+_LVL_STOP = True
+
+def UartMonitor(line, transitions):
+    '''
+    Records the (time, level) transitions of line, for decoding with
+    uart_decode, without waking up on clock edges.
+
+    line
+        Input
+        The uart line
+    transitions
+        List to which the transitions are appended
+    '''
+
+    @instance
+    def logic():
+        while True:
+            yield line
+            transitions.append((now(), bool(line)))
+
+    return logic
+
+def uart_decode(transitions, bit_time, data_bits=8, stop_bits=1, start=0,
+        end=None):
+    '''
+    Decodes the uart frames on a line with the given (time, level)
+    transitions into bytes, sampling every bit in its middle. Frames with a
+    missing stop bit are discarded, as UartRx does.
+
+    Returns the decoded bytes and the time from which decoding must resume.
+    Only frames of which the last stop bit is sampled before end are
+    decoded, so that decoding can proceed while the line is recorded: pass
+    the returned time as start to the next call, together with the
+    transitions recorded since, and at least those at or after that time.
+    '''
+
+    times = [time for time, _ in transitions]
+    levels = [level for _, level in transitions]
+    half_bit = bit_time // 2
+    frame_bits = 1 + data_bits + stop_bits
+    data = bytearray()
+
+    def level_at(time, lo):
+        return levels[bisect_right(times, time, lo) - 1]
+
+    i = bisect_left(times, start)
+    while i < len(times):
+        if levels[i] != _LVL_START:
+            i += 1
+            continue
+        frame_start = times[i]
+        last_sample = frame_start + (frame_bits - 1) * bit_time + half_bit
+        if end is not None and last_sample > end:
+            return data, frame_start
+        if level_at(frame_start + half_bit, i) != _LVL_START:
+            # A glitch rather than a start bit
+            i += 1
+            continue
+
+        byte = 0
+        for bit in range(data_bits):
+            if level_at(frame_start + (1 + bit) * bit_time + half_bit, i):
+                byte |= 1 << bit
+        if all(level_at(frame_start + bit * bit_time + half_bit, i) ==
+                _LVL_STOP for bit in range(1 + data_bits, frame_bits)):
+            data.append(byte)
+        i = bisect_right(times, last_sample, i)
+
+    resume = times[-1] + 1 if times else start
+    if end is not None:
+        resume = max(resume, end)
+    return data, max(resume, start)
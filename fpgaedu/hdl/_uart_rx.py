@@ -1,7 +1,8 @@
 from myhdl import (always_comb, always_seq, Signal, enum, intbv, now)
+from fpgaedu.hdl._entities import register
 
 def UartRx(clk, reset, rx, rx_data, rx_finish, rx_busy, rx_baud_tick, 
-        data_bits=8, stop_bits=1, rx_div=16):
+        data_bits=8, stop_bits=1, rx_div=16, rx_error=None):
     '''
     clk
         input
@@ -27,8 +28,15 @@ def UartRx(clk, reset, rx, rx_data, rx_finish, rx_busy, rx_baud_tick,
     rx_div
         Parameter
         Specifying the number of subsamples per tx_tick
+    rx_error
+        Optional output
+        Pulse signal indicating that a frame was discarded because its stop
+        bit was not received
     '''
 
+    if rx_error is None:
+        rx_error = Signal(False)
+
     state_t = enum('WAIT_START', 'RECV_START', 'RECV_DATA', 'RECV_STOP')
 
     state_reg = Signal(state_t.WAIT_START)
@@ -61,6 +69,7 @@ def UartRx(clk, reset, rx, rx_data, rx_finish, rx_busy, rx_baud_tick,
         data_count_reg and data_reg based on current state and input signals
         '''
         rx_finish.next = False
+        rx_error.next = False
         rx_data.next = 0
         state_next.next = state_reg
         baud_count_next.next = baud_count_reg
@@ -70,6 +79,8 @@ def UartRx(clk, reset, rx, rx_data, rx_finish, rx_busy, rx_baud_tick,
 
         if state_reg == state_t.WAIT_START:
             data_next.next = 0
+            # Sample the next frame in the middle of its bits
+            baud_count_next.next = 0
 
             if rx == LVL_START and rx_baud_tick == True:
                 state_next.next = state_t.RECV_START
@@ -101,6 +112,8 @@ def UartRx(clk, reset, rx, rx_data, rx_finish, rx_busy, rx_baud_tick,
                 if rx == LVL_STOP:
                     rx_data.next = data_reg
                     rx_finish.next = True
+                else:
+                    rx_error.next = True
 
     @always_comb
     def output_logic():
@@ -116,3 +129,6 @@ def UartRx(clk, reset, rx, rx_data, rx_finish, rx_busy, rx_baud_tick,
 
     return register_logic, next_state_logic, output_logic
 
+register(UartRx, 'uart_rx', parameters=('data_bits', 'stop_bits', 'rx_div'),
+        inputs=('clk', 'reset', 'rx', 'rx_baud_tick'),
+        outputs=('rx_data', 'rx_finish', 'rx_busy', 'rx_error'))
@@ -0,0 +1,84 @@
+import random
+
+from myhdl import instance, delay
+
+_LVL_START = False
+_LVL_STOP = True
+_LVL_IDLE = True
+
+def uart_transitions(data, bit_time, data_bits=8, stop_bits=1, idle_bits=0,
+        jitter=0, seed=None):
+    '''
+    Returns the list of (time, level) transitions of a uart line sending the
+    bytes in data, with the times relative to the start of the first frame.
+    Runs of equal bits are merged, so that a driver replaying the list
+    only wakes up when the line changes. The first entry sets the line idle
+    and the last entry, which does not change the level, marks the end of
+    the final stop bit.
+
+    bit_time
+        Duration of a uart bit in simulation time units
+    idle_bits
+        Number of idle bits preceding every frame
+    jitter
+        Maximum number of time units by which each transition is moved
+        earlier or later, drawn from a random generator seeded with seed.
+        Must be less than half a bit time.
+    '''
+
+    if 2 * jitter >= bit_time:
+        raise ValueError('jitter must be less than half a bit time')
+    rand = random.Random(seed) if jitter else None
+
+    levels = []
+    for byte in bytearray(data):
+        levels.extend([_LVL_IDLE] * idle_bits)
+        levels.append(_LVL_START)
+        levels.extend(bool((byte >> i) & 1) for i in range(data_bits))
+        levels.extend([_LVL_STOP] * stop_bits)
+
+    transitions = [(0, _LVL_IDLE)]
+    level = _LVL_IDLE
+    for i, bit in enumerate(levels):
+        if bit != level:
+            time = i * bit_time
+            if rand is not None:
+                time = max(time + rand.randint(-jitter, jitter),
+                        transitions[-1][0] + 1)
+            transitions.append((time, bit))
+            level = bit
+    transitions.append((len(levels) * bit_time, level))
+    return transitions
+
+def UartStimulus(line, transitions, repeat=False):
+    '''
+    Drives line with precomputed transitions, as returned by
+    uart_transitions, jumping from one transition to the next.
+
+    line
+        Output
+        The uart line
+    transitions
+        List of (time, level) pairs with increasing times
+    repeat
+        Parameter
+        When True, the transitions are replayed indefinitely, each replay
+        starting at the end time of the previous one.
+    '''
+
+    if repeat and transitions[-1][0] <= 0:
+        raise ValueError('repeated transitions must take time')
+
+    @instance
+    def logic():
+        while True:
+            time = 0
+            for next_time, level in transitions:
+                if next_time > time:
+                    yield delay(next_time - time)
+                    time = next_time
+                line.next = level
+            if not repeat:
+                break
+
+    return logic
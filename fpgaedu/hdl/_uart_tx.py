@@ -1,4 +1,5 @@
 from myhdl import *
+from fpgaedu.hdl._entities import register
 
 def UartTx(clk, reset, tx, tx_data, tx_start, tx_busy, baud_tick, data_bits=8, 
         stop_bits=1):
@@ -94,5 +95,6 @@ def UartTx(clk, reset, tx, tx_data, tx_start, tx_busy, baud_tick, data_bits=8,
 
     return reg_logic, next_state_logic, output_logic
 
-
-
+register(UartTx, 'uart_tx', parameters=('data_bits', 'stop_bits'),
+        inputs=('clk', 'reset', 'tx_data', 'tx_start', 'baud_tick'),
+        outputs=('tx', 'tx_busy'))
@@ -0,0 +1,146 @@
+import os, shutil, hashlib, tempfile
+
+import myhdl
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# The hdl modules depend on the controller specification of the host package
+_SPEC_SOURCE = os.path.join(os.path.dirname(_PACKAGE_DIR),
+        '_controllerspec.py')
+
+def _default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME',
+            os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'fpgaedu', 'vhdl')
+
+def hdl_sources():
+    '''
+    Returns the paths of the source files that the conversion of the
+    fpgaedu.hdl modules depends on, in a stable order.
+    '''
+    sources = [_SPEC_SOURCE]
+    for directory, dirnames, filenames in os.walk(_PACKAGE_DIR):
+        dirnames.sort()
+        sources.extend(os.path.join(directory, filename) for filename in
+                sorted(filenames) if filename.endswith('.py'))
+    return sources
+
+class VhdlCache(object):
+    '''
+    Content-addressed cache of converted vhdl. An entry is keyed by a hash
+    of the hdl sources, the myhdl version, the name of the conversion and
+    its arguments, and holds all files that the conversion wrote.
+
+    cache_dir
+        Directory of the entries, which defaults to fpgaedu/vhdl in the
+        user's cache directory
+    force
+        When True, every conversion is performed and replaces its entry
+    sources
+        Optional list of additional source files that all conversions
+        depend on, such as the generating script
+    '''
+
+    def __init__(self, cache_dir=None, force=False, sources=()):
+        self.cache_dir = cache_dir or _default_cache_dir()
+        self.force = force
+        self.hits = []
+        self.misses = []
+        self._sources = list(sources)
+        self._file_digests = {}
+        self._hdl_digest = self._sources_digest(hdl_sources())
+
+    def _sources_digest(self, sources):
+        digest = hashlib.sha256(myhdl.__version__.encode())
+        for path in list(sources) + self._sources:
+            if path not in self._file_digests:
+                with open(path, 'rb') as f:
+                    self._file_digests[path] = hashlib.sha256(
+                            f.read()).digest()
+            digest.update(self._file_digests[path])
+        return digest.hexdigest()
+
+    def key(self, name, arguments, sources=None):
+        '''
+        Returns the key of the conversion name with a dict of arguments,
+        which must have a stable repr. sources lists the files that the
+        conversion depends on, which defaults to all hdl sources.
+        '''
+        if sources is None:
+            sources_digest = self._hdl_digest
+        else:
+            sources_digest = self._sources_digest(sorted(sources))
+        digest = hashlib.sha256(sources_digest.encode())
+        digest.update(repr((name, sorted(arguments.items()))).encode())
+        return digest.hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def lookup(self, name, arguments, output_dir, sources=None):
+        '''
+        Copies the files of the entry of a conversion to output_dir and
+        returns True, or returns False if there is no entry or the cache is
+        forced. Counts the conversion as a hit or miss.
+        '''
+        entry = self._entry(self.key(name, arguments, sources))
+        if self.force or not os.path.isdir(entry):
+            self.misses.append(name)
+            return False
+        _copy_files(entry, output_dir)
+        self.hits.append(name)
+        return True
+
+    def reserve(self):
+        '''
+        Returns a new empty directory to which a missed conversion writes
+        its files, before being stored with store.
+        '''
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        return tempfile.mkdtemp(prefix='.pending', dir=self.cache_dir)
+
+    def store(self, name, arguments, pending_dir, output_dir, sources=None):
+        '''
+        Stores the files written to pending_dir, as returned by reserve, as
+        the entry of a conversion and copies them to output_dir.
+        '''
+        _copy_files(pending_dir, output_dir)
+        entry = self._entry(self.key(name, arguments, sources))
+        if os.path.isdir(entry):
+            shutil.rmtree(entry)
+        try:
+            os.rename(pending_dir, entry)
+        except OSError:
+            # Stored concurrently by another process
+            shutil.rmtree(pending_dir)
+
+    def convert(self, name, arguments, output_dir, conversion, sources=None):
+        '''
+        Copies the files of a conversion to output_dir from its entry, or
+        calls conversion with a directory to write them to and stores them.
+        Returns whether the entry was used.
+        '''
+        if self.lookup(name, arguments, output_dir, sources):
+            return True
+        pending_dir = self.reserve()
+        try:
+            conversion(pending_dir)
+        except BaseException:
+            shutil.rmtree(pending_dir)
+            raise
+        self.store(name, arguments, pending_dir, output_dir, sources)
+        return False
+
+    def report(self):
+        '''
+        Returns a line summarising the hits and misses
+        '''
+        return 'vhdl cache: %d hits, %d misses (%s)' % (len(self.hits),
+                len(self.misses), self.cache_dir)
+
+def _copy_files(source_dir, output_dir):
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    for filename in os.listdir(source_dir):
+        shutil.copy2(os.path.join(source_dir, filename),
+                os.path.join(output_dir, filename))
@@ -2,3 +2,4 @@ from ._clock_enable_buffer import ClockEnableBuffer
 from ._board_component import BoardComponent
 from ._board_component_rx import BoardComponentRx
 from ._board_component_tx import BoardComponentTx
+from ._board_simulation import BoardSimulation
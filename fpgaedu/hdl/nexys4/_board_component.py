@@ -1,8 +1,9 @@
-from myhdl import Signal, intbv, always_comb
+from myhdl import Signal, intbv, always_comb, always_seq
 
 from fpgaedu import ControllerSpec
-from fpgaedu.hdl import (Controller, UartRx, UartTx, BaudGen, Fifo,
-        MessageReceiver, MessageTransmitter)
+from fpgaedu.hdl import (Controller, BaudGen, MessageReceiver,
+        MessageTransmitter)
+from fpgaedu.hdl._entities import register, entity
 from ._clock_enable_buffer import ClockEnableBuffer
 from ._board_component_tx import BoardComponentTx
 from ._board_component_rx import BoardComponentRx
@@ -12,15 +13,26 @@ from ._board_component_rx import BoardComponentRx
 _CLK_FREQ = 100000000
 _RX_DIV = 8
 
-_TX_FIFO_DEPTH = 16
-_RX_FIFO_DEPTH = 16
+_TX_FIFO_DEPTH = 256
+_RX_FIFO_DEPTH = 2048
 
 _DATA_BITS=8
 _STOP_BITS=1
 
 def BoardComponent(spec, clk, reset, rx, tx,
         exp_addr, exp_data_write, exp_data_read, exp_wen, exp_reset, 
-        exp_clk, exp_clk_en, exp_reset_active=True, baudrate=9600):
+        exp_clk, exp_clk_en, exp_reset_active=True, baudrate=9600,
+        rx_fifo_depth=_RX_FIFO_DEPTH, tx_fifo_depth=_TX_FIFO_DEPTH,
+        exp_break=None, baud_div=None):
+    '''
+    baudrate
+        Parameter setting the uart baudrate, for a 100 MHz clk
+    baud_div
+        Optional parameter overriding baudrate with the number of clk cycles
+        per uart bit. Intended for simulation only: at the default baudrate a
+        bit lasts over 10000 clock cycles. The protocol behaviour is the same
+        for any ratio, as all uart timing derives from the baud ticks.
+    '''
 
     tx_baud_tick = Signal(False)
     rx_baud_tick = Signal(False)
@@ -34,7 +46,24 @@ def BoardComponent(spec, clk, reset, rx, tx,
     message_tx_ready = Signal(False)
     message_tx_trans_next = Signal(False)
 
-    controller = Controller(spec=spec, clk=clk, reset=reset, 
+    stat_events = Signal(intbv(0)[spec.num_stats:0])
+    stat_events_rx = Signal(intbv(0)[spec.num_stats:0])
+    stat_events_tx = Signal(intbv(0)[spec.num_stats:0])
+    rx_free = Signal(intbv(0, min=0, max=rx_fifo_depth+1))
+
+    exp_break_logic = ()
+    if exp_break is None:
+        # Tied low, so that the break input of the controller is driven in
+        # the vhdl. always_comb needs an input signal to be sensitive to.
+        exp_break = Signal(False)
+
+        @always_seq(clk.posedge, reset)
+        def tie_exp_break():
+            exp_break.next = False
+
+        exp_break_logic = (tie_exp_break,)
+
+    controller = entity(Controller)(spec=spec, clk=clk, reset=reset, 
             rx_msg=message_rx_data, 
             rx_next=message_rx_recv_next, 
             rx_ready=message_rx_ready,
@@ -43,27 +72,44 @@ def BoardComponent(spec, clk, reset, rx, tx,
             tx_ready= message_tx_ready,
             exp_addr=exp_addr, exp_data_write=exp_data_write, 
             exp_data_read=exp_data_read, exp_wen=exp_wen, exp_reset=exp_reset, 
-            exp_clk_en=exp_clk_en_internal, exp_reset_active=exp_reset_active)
+            exp_clk_en=exp_clk_en_internal, exp_reset_active=exp_reset_active,
+            stat_events=stat_events, rx_free=rx_free, exp_break=exp_break)
 
     component_rx = BoardComponentRx(spec=spec, clk=clk, reset=reset, rx=rx,
             rx_msg=message_rx_data, rx_ready=message_rx_ready, 
             rx_next=message_rx_recv_next, uart_rx_baud_tick=rx_baud_tick,
-            uart_rx_baud_div=_RX_DIV)
+            uart_rx_baud_div=_RX_DIV, stat_events=stat_events_rx,
+            rx_free=rx_free, fifo_depth=rx_fifo_depth)
 
     component_tx = BoardComponentTx(spec=spec, clk=clk, reset=reset, tx=tx,
             tx_msg=message_tx_data, tx_ready=message_tx_ready,
-            tx_next=message_tx_trans_next, uart_tx_baud_tick=tx_baud_tick)
+            tx_next=message_tx_trans_next, uart_tx_baud_tick=tx_baud_tick,
+            stat_events=stat_events_tx, fifo_depth=tx_fifo_depth)
 
-    baudgen = BaudGen(clk=clk, reset=reset, rx_tick=rx_baud_tick, 
-            tx_tick=tx_baud_tick, baudrate=baudrate, rx_div=_RX_DIV)
+    baudgen = entity(BaudGen)(clk=clk, reset=reset, rx_tick=rx_baud_tick, 
+            tx_tick=tx_baud_tick, baudrate=baudrate, rx_div=_RX_DIV, 
+            baud_div=baud_div)
 
-    clock_enable_buffer = ClockEnableBuffer(clk_in=clk, clk_out=exp_clk, 
-            clk_en=exp_clk_en_internal)
+    clock_enable_buffer = entity(ClockEnableBuffer)(clk_in=clk, 
+            clk_out=exp_clk, clk_en=exp_clk_en_internal)
 
     @always_comb
     def expose_exp_clk_en():
         exp_clk_en.next = exp_clk_en_internal
 
+    @always_comb
+    def stat_events_logic():
+        stat_events.next = stat_events_rx | stat_events_tx
+
     return (controller, baudgen, clock_enable_buffer, component_rx, 
-            component_tx, expose_exp_clk_en)
+            component_tx, expose_exp_clk_en, stat_events_logic,
+            exp_break_logic)
+
+register(BoardComponent, 'board_component', parameters=('spec',
+    'exp_reset_active', 'baudrate', 'rx_fifo_depth', 'tx_fifo_depth',
+    'baud_div'), inputs=('clk', 'reset', 'rx', 'exp_data_read', 'exp_break'),
+    outputs=('tx', 'exp_addr', 'exp_data_write', 'exp_wen', 'exp_reset',
+        'exp_clk', 'exp_clk_en'),
+    sources=(ControllerSpec, BoardComponentRx, BoardComponentTx,
+        MessageReceiver, MessageTransmitter))
 
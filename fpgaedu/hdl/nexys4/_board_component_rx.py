@@ -1,8 +1,10 @@
-from myhdl import Signal, intbv
-from fpgaedu.hdl import UartRx, Fifo, MessageReceiver
+from myhdl import Signal, intbv, always_comb
+from fpgaedu.hdl import UartRx, BlockRamFifo, MessageReceiver
+from fpgaedu.hdl._entities import entity
 
 def BoardComponentRx(spec, clk, reset, rx, rx_msg, rx_ready, rx_next, 
-        uart_rx_baud_tick, uart_rx_baud_div=8):
+        uart_rx_baud_tick, uart_rx_baud_div=8, stat_events=None, 
+        rx_free=None, fifo_depth=16):
     '''
     clk
         Clock input
@@ -17,32 +19,70 @@ def BoardComponentRx(spec, clk, reset, rx, rx_msg, rx_ready, rx_next,
         and is ready to be read the message is output on recv_data
     rx_next
         Input signalling the component to start receiving the next message
+    stat_events
+        Optional output bit vector of width spec.num_stats on which the 
+        receive related statistics events are set
+    rx_free
+        Optional output exposing the number of bytes that can be received
+        before the receive fifo overflows
+    fifo_depth
+        Parameter setting the receive fifo depth in bytes, which must be a 
+        power of two
     '''
 
+    if stat_events is None:
+        stat_events = Signal(intbv(0)[spec.num_stats:0])
+    if rx_free is None:
+        rx_free = Signal(intbv(0, min=0, max=fifo_depth+1))
+
     uart_rx_data = Signal(intbv(0)[8:0])
     uart_rx_finish = Signal(False)
     uart_rx_busy = Signal(False)
+    uart_rx_error = Signal(False)
 
     fifo_rx_dout = Signal(intbv(0)[8:0])
     fifo_rx_dequeue = Signal(False)
     fifo_rx_empty = Signal(False)
     fifo_rx_full = Signal(False)
-    
-    uart_rx = UartRx(clk=clk, reset=reset, rx=rx, rx_data=uart_rx_data, 
-            rx_finish=uart_rx_finish, rx_busy=uart_rx_busy,
+    fifo_rx_count = Signal(intbv(0, min=0, max=fifo_depth+1))
+
+    receiver_message_received = Signal(False)
+    receiver_message_error = Signal(False)
+
+    uart_rx = entity(UartRx)(clk=clk, reset=reset, rx=rx, 
+            rx_data=uart_rx_data, rx_finish=uart_rx_finish, 
+            rx_busy=uart_rx_busy,
             rx_baud_tick=uart_rx_baud_tick, data_bits=8, stop_bits=1,
-            rx_div=uart_rx_baud_div)
+            rx_div=uart_rx_baud_div, rx_error=uart_rx_error)
 
-    fifo_rx = Fifo(clk=clk, reset=reset, din=uart_rx_data, dout=fifo_rx_dout,
-            enqueue=uart_rx_finish, dequeue=fifo_rx_dequeue,
+    fifo_rx = entity(BlockRamFifo)(clk=clk, reset=reset, din=uart_rx_data,
+            dout=fifo_rx_dout, enqueue=uart_rx_finish, 
+            dequeue=fifo_rx_dequeue,
             empty=fifo_rx_empty, full=fifo_rx_full, data_width=8,
-            depth=12)
+            depth=fifo_depth, count=fifo_rx_count)
 
     receiver = MessageReceiver(spec=spec, clk=clk, reset=reset, 
             rx_fifo_data_read=fifo_rx_dout, rx_fifo_empty=fifo_rx_empty,
             rx_fifo_dequeue=fifo_rx_dequeue, message=rx_msg, 
-            message_ready=rx_ready, receive_next=rx_next)
+            message_ready=rx_ready, receive_next=rx_next,
+            message_received=receiver_message_received,
+            message_error=receiver_message_error)
+
+    @always_comb
+    def rx_free_logic():
+        rx_free.next = fifo_depth - fifo_rx_count
+
+    @always_comb
+    def stat_events_logic():
+        stat_events.next = 0
+        stat_events.next[spec.stat_rx_bytes] = uart_rx_finish
+        stat_events.next[spec.stat_rx_frame_errors] = uart_rx_error
+        stat_events.next[spec.stat_rx_overflows] = (uart_rx_finish and 
+                fifo_rx_full)
+        stat_events.next[spec.stat_rx_messages] = receiver_message_received
+        stat_events.next[spec.stat_rx_message_errors] = \
+                receiver_message_error
 
-    return uart_rx, fifo_rx, receiver
+    return uart_rx, fifo_rx, receiver, rx_free_logic, stat_events_logic
 
 
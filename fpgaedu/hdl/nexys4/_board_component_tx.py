@@ -1,8 +1,9 @@
 from myhdl import Signal, intbv, always_comb
-from fpgaedu.hdl import UartTx, Fifo, MessageTransmitter
+from fpgaedu.hdl import UartTx, BlockRamFifo, MessageTransmitter
+from fpgaedu.hdl._entities import entity
 
 def BoardComponentTx(spec, clk, reset, tx, tx_msg, tx_ready, tx_next, 
-        uart_tx_baud_tick):
+        uart_tx_baud_tick, stat_events=None, fifo_depth=16):
     '''
     clk
         Clock input
@@ -18,8 +19,17 @@ def BoardComponentTx(spec, clk, reset, tx, tx_msg, tx_ready, tx_next,
     tx_next
         Input signal instructing the component to transmit the message 
         as set on tx_msg
+    stat_events
+        Optional output bit vector of width spec.num_stats on which the 
+        transmit related statistics events are set
+    fifo_depth
+        Parameter setting the transmit fifo depth in bytes, which must be a 
+        power of two
     '''
-    
+
+    if stat_events is None:
+        stat_events = Signal(intbv(0)[spec.num_stats:0])
+
     uart_tx_data = Signal(intbv(0)[8:0])
     uart_tx_start = Signal(False)
     uart_tx_busy = Signal(False)
@@ -31,32 +41,33 @@ def BoardComponentTx(spec, clk, reset, tx, tx_msg, tx_ready, tx_next,
     fifo_tx_empty = Signal(False)
     fifo_tx_full = Signal(False)
 
-    uart_tx = UartTx(clk=clk, reset=reset, tx=tx, tx_data=uart_tx_data, 
+    uart_tx = entity(UartTx)(clk=clk, reset=reset, tx=tx, 
+            tx_data=uart_tx_data, 
             tx_start=uart_tx_start, tx_busy=uart_tx_busy, 
             baud_tick=uart_tx_baud_tick, data_bits=8, stop_bits=1)
 
-    #fifo_tx = Fifo(clk=clk, reset=reset, din=fifo_tx_din, 
-    #        enqueue=fifo_tx_enqueue, dout=fifo_tx_dout, 
-    #        dequeue=fifo_tx_dequeue, empty=fifo_tx_empty, full=fifo_tx_full,
-    #        data_width=8, depth=12)
-
-    #transmitter = MessageTransmitter(spec=spec, clk=clk, reset=reset,
-    #        tx_fifo_data_write=fifo_tx_din, tx_fifo_full=fifo_tx_full,
-    #        tx_fifo_enqueue=fifo_tx_enqueue, message=tx_msg, 
-    #        ready=tx_ready, transmit_next=tx_next)
+    fifo_tx = entity(BlockRamFifo)(clk=clk, reset=reset, din=fifo_tx_din, 
+            enqueue=fifo_tx_enqueue, dout=fifo_tx_dout, 
+            dequeue=fifo_tx_dequeue, empty=fifo_tx_empty, full=fifo_tx_full,
+            data_width=8, depth=fifo_depth)
 
     transmitter = MessageTransmitter(spec=spec, clk=clk, reset=reset,
-            tx_fifo_data_write=uart_tx_data, tx_fifo_full=uart_tx_busy,
-            tx_fifo_enqueue=uart_tx_start, message=tx_msg, 
+            tx_fifo_data_write=fifo_tx_din, tx_fifo_full=fifo_tx_full,
+            tx_fifo_enqueue=fifo_tx_enqueue, message=tx_msg, 
             ready=tx_ready, transmit_next=tx_next)
 
-    #@always_comb
-    #def fifo_to_uart_logic():
-    #    uart_tx_data.next = fifo_tx_dout
-    #    uart_tx_start.next = (not uart_tx_busy and not fifo_tx_empty)
-    #    fifo_tx_dequeue.next = (not uart_tx_busy and not fifo_tx_empty)
+    @always_comb
+    def fifo_to_uart_logic():
+        uart_tx_data.next = fifo_tx_dout
+        uart_tx_start.next = (not uart_tx_busy and not fifo_tx_empty)
+        fifo_tx_dequeue.next = (not uart_tx_busy and not fifo_tx_empty)
+
+    @always_comb
+    def stat_events_logic():
+        stat_events.next = 0
+        stat_events.next[spec.stat_tx_bytes] = uart_tx_start
 
-    #return uart_tx, fifo_tx, transmitter, fifo_to_uart_logic
-    return uart_tx, transmitter
+    return (uart_tx, fifo_tx, transmitter, fifo_to_uart_logic, 
+            stat_events_logic)
 
 
@@ -0,0 +1,239 @@
+import os, select, socket
+from collections import deque
+
+from myhdl import (Signal, ResetSignal, intbv, always, instance, delay, 
+        now, Simulation)
+
+from fpgaedu._emulator import _open_pty
+from fpgaedu.hdl import ClockGen, uart_transitions, UartMonitor, uart_decode
+from fpgaedu.hdl.nexys4 import BoardComponent
+
+_HALF_PERIOD = 5
+# Number of polls without traffic after which the simulation is considered
+# idle. Responses follow commands within a few bits.
+_IDLE_POLLS = 2
+_LVL_IDLE = True
+
+def _MemoryExperiment(clk, exp_addr, exp_data_write, exp_data_read, exp_wen,
+        exp_reset, exp_reset_active, memory):
+
+    initial = dict(memory)
+
+    @always(clk.posedge)
+    def logic():
+        if exp_reset == exp_reset_active:
+            memory.clear()
+            memory.update(initial)
+        elif exp_wen:
+            memory[int(exp_addr.val)] = int(exp_data_write.val)
+        exp_data_read.next = memory.get(int(exp_addr.val), 0)
+
+    return logic
+
+class BoardSimulation(object):
+    '''
+    Runs the myhdl BoardComponent with a memory experiment in simulation,
+    with its uart bridged to a byte stream. Bytes passed to write are shifted
+    into the rx line, and the bytes on the tx line are returned by read. The
+    simulation can be served on a pseudo-terminal or tcp socket, so that the
+    host client can be tested against the real hdl.
+
+    spec
+        The controller specification
+    memory
+        Optional dict with the initial experiment memory contents
+    baud_div
+        Number of clock cycles per uart bit. The default ratio is far lower
+        than that of the board, so that simulating a byte takes little time.
+    rx_fifo_depth, tx_fifo_depth
+        Fifo depths of the BoardComponent
+    '''
+
+    def __init__(self, spec, memory=None, baud_div=16, rx_fifo_depth=2048,
+            tx_fifo_depth=256):
+        self.spec = spec
+        self.baud_div = baud_div
+        self.rx_fifo_depth = rx_fifo_depth
+        self.tx_fifo_depth = tx_fifo_depth
+        self.memory = dict(memory or {})
+        self.bit_time = 2 * _HALF_PERIOD * baud_div
+        self._rx_queue = deque()
+        self._rx_busy = False
+        # Transitions of the tx line from _tx_resume on, which are decoded
+        # when read
+        self._tx_transitions = []
+        self._tx_resume = 0
+        self._master = None
+        self._slave = None
+        self._server = None
+        self._conn = None
+        self._closed = False
+        self._serving = False
+
+        self.clk = Signal(False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
+        self.rx = Signal(_LVL_IDLE)
+        self.tx = Signal(_LVL_IDLE)
+        exp_addr = Signal(intbv(0)[spec.width_addr:0])
+        exp_data_write = Signal(intbv(0)[spec.width_data:0])
+        exp_data_read = Signal(intbv(0)[spec.width_data:0])
+        exp_wen = Signal(False)
+        exp_reset = Signal(False)
+        exp_clk = Signal(False)
+        exp_clk_en = Signal(False)
+
+        clockgen = ClockGen(self.clk, _HALF_PERIOD)
+        board_component = BoardComponent(spec=spec, clk=self.clk,
+                reset=self.reset, rx=self.rx, tx=self.tx, exp_addr=exp_addr,
+                exp_data_write=exp_data_write, exp_data_read=exp_data_read,
+                exp_wen=exp_wen, exp_reset=exp_reset, exp_clk=exp_clk,
+                exp_clk_en=exp_clk_en, baud_div=baud_div,
+                rx_fifo_depth=rx_fifo_depth, tx_fifo_depth=tx_fifo_depth)
+        experiment = _MemoryExperiment(self.clk, exp_addr, exp_data_write,
+                exp_data_read, exp_wen, exp_reset, True, self.memory)
+        tx_monitor = UartMonitor(self.tx, self._tx_transitions)
+
+        self._sim = Simulation(clockgen, board_component, experiment,
+                self._rx_driver(), tx_monitor)
+
+    def _rx_driver(self):
+        @instance
+        def rx_driver():
+            while True:
+                if not self._rx_queue:
+                    yield delay(self.bit_time)
+                    continue
+                # Shift in all queued bytes, jumping from one line
+                # transition to the next
+                data = bytearray(self._rx_queue)
+                self._rx_queue.clear()
+                self._rx_busy = True
+                time = 0
+                for next_time, level in uart_transitions(data,
+                        self.bit_time):
+                    if next_time > time:
+                        yield delay(next_time - time)
+                        time = next_time
+                    self.rx.next = level
+                self._rx_busy = False
+
+        return rx_driver
+
+    @property
+    def idle(self):
+        '''
+        Whether all bytes passed to write have been shifted into the board
+        '''
+        return not self._rx_queue and not self._rx_busy
+
+    def reset_board(self, bits=10):
+        '''
+        Holds the board in reset for the given number of uart bits
+        '''
+        self.reset.next = self.reset.active
+        self.run(bits)
+        self.reset.next = not self.reset.active
+
+    def run(self, bits):
+        '''
+        Advances the simulation by the time of the given number of uart bits
+        '''
+        self._sim.run(bits * self.bit_time, quiet=True)
+
+    def write(self, data):
+        self._rx_queue.extend(bytearray(data))
+
+    def read(self):
+        '''
+        Returns the bytes received from the board since the previous read
+        '''
+        data, self._tx_resume = uart_decode(self._tx_transitions,
+                self.bit_time, start=self._tx_resume, end=now())
+        self._tx_transitions[:] = [transition for transition in
+                self._tx_transitions if transition[0] >= self._tx_resume]
+        return bytes(data)
+
+    def open_pty(self):
+        '''
+        Creates a pseudo-terminal for serve_forever and returns the path of
+        its device.
+        '''
+        self._master, self._slave = _open_pty()
+        return os.ttyname(self._slave)
+
+    def open_tcp(self, host='localhost', port=0):
+        '''
+        Listens for tcp connections for serve_forever and returns the
+        address listened on. One connection is served at a time.
+        '''
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen(1)
+        return self._server.getsockname()
+
+    def close(self):
+        '''
+        Closes the pseudo-terminal or socket, which ends serve_forever, and
+        ends the simulation.
+        '''
+        self._closed = True
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        for sock in (self._conn, self._server):
+            if sock is not None:
+                sock.close()
+        if not self._serving:
+            self._sim.quit()
+
+    def serve_forever(self, poll_interval=0.05, bits_per_poll=100):
+        '''
+        Resets the board and runs the simulation, exchanging bytes with the
+        pseudo-terminal or tcp connection, until closed. While there is no 
+        traffic, the simulation advances bits_per_poll bits every 
+        poll_interval seconds.
+        '''
+        self._serving = True
+        try:
+            self.reset_board()
+            idle_polls = 0
+
+            while not self._closed:
+                if self._master is None and self._conn is None:
+                    # Closing the socket does not interrupt a blocking accept
+                    readable, _, _ = select.select([self._server], [], [],
+                            poll_interval)
+                    if readable:
+                        self._conn, _ = self._server.accept()
+                    continue
+                fd = self._master if self._master is not None else self._conn
+                if not self.idle:
+                    idle_polls = 0
+                readable, _, _ = select.select([fd], [], [],
+                        0 if idle_polls < _IDLE_POLLS else poll_interval)
+                if readable:
+                    if self._master is not None:
+                        data = os.read(self._master, 4096)
+                    else:
+                        data = self._conn.recv(4096)
+                        if not data:
+                            # The client disconnected
+                            self._conn.close()
+                            self._conn = None
+                            continue
+                    self.write(data)
+                self.run(bits_per_poll)
+                data = self.read()
+                idle_polls = 0 if data else idle_polls + 1
+                if data and self._master is not None:
+                    os.write(self._master, data)
+                elif data:
+                    self._conn.sendall(data)
+        except (OSError, ValueError):
+            # Raised when closed while waiting
+            if not self._closed:
+                raise
+        finally:
+            self._serving = False
+            self._sim.quit()
@@ -1,4 +1,5 @@
 from myhdl import always_comb
+from fpgaedu.hdl._entities import register
 
 def ClockEnableBuffer(clk_in, clk_out, clk_en):
 
@@ -41,3 +42,6 @@ BUFGCE BUFGCE_inst (
         );
 // End of BUFGCE_inst instantiation
 '''
+
+register(ClockEnableBuffer, 'clock_enable_buffer', inputs=('clk_in', 'clk_en'),
+        outputs=('clk_out',))
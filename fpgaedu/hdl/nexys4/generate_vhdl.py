@@ -1,47 +1,96 @@
-import os, sys, argparse
-from myhdl import toVHDL, toVerilog, Signal, ResetSignal, intbv
+import os, sys, time, shutil, argparse, itertools, multiprocessing
+from collections import namedtuple
+import myhdl
+from myhdl import Signal, ResetSignal, intbv
 from fpgaedu import ControllerSpec
+from fpgaedu.hdl import VhdlCache, generate_entities
 from fpgaedu.hdl.nexys4 import BoardComponent
 
 _UART_BAUDRATE = 9600
 # NEXYS 4 board reset signal is active-low
 _RESET_ACTIVE = False
 
+# toVHDL names its vhdl package after the myhdl version without the
+# subminor number, such as pck_myhdl_011 for myhdl 0.11.52
+USE_CLAUSES = \
+'''
+Library UNISIM;
+use UNISIM.vcomponents.all;
+
+use work.pck_myhdl_%s.all;
+''' % myhdl.__version__.replace('dev', '').rpartition('.')[0].replace('.', '')
+
+Configuration = namedtuple('Configuration', ['width_addr', 'width_data',
+    'exp_reset_active', 'baudrate'])
+
+def _parse_bool(value):
+    '''
+    Parses "True" or "False", which bool would both parse as True.
+    '''
+    if value.lower() in ('true', '1'):
+        return True
+    if value.lower() in ('false', '0'):
+        return False
+    raise argparse.ArgumentTypeError('expected "True" or "False"')
+
 def _parse_args():
     '''
-    Parses the command line arguments.
+    Parses the command line arguments. Every configuration argument takes
+    one or more values, and all combinations of them are generated.
     '''
     parser = argparse.ArgumentParser(description='Generates digilent nexys \
             board component vhdl source files.')
     parser.add_argument('-o', '--outputDir', required=True, 
-            help='The source file output directory.');
-    parser.add_argument('-a', '--addressWidth', required=True, type=int)
-    parser.add_argument('-d', '--dataWidth', required=True, type=int)
+            help='The source file output directory. When more than one \
+                    configuration is given, each is written to its own \
+                    subdirectory.');
+    parser.add_argument('-a', '--addressWidth', required=True, type=int,
+            nargs='+')
+    parser.add_argument('-d', '--dataWidth', required=True, type=int,
+            nargs='+')
     parser.add_argument('-t', '--topLevel', required=True, 
             help='The output top-level file\'s file name.')
-    parser.add_argument('-r', '--resetActive', required=True, type=bool,
+    parser.add_argument('-r', '--resetActive', required=True, 
+            type=_parse_bool, nargs='+',
             help='Whether the experiment setup reset is active-high ("True") or \
                     active-low ("False").')
+    parser.add_argument('-b', '--baudrate', type=int, nargs='+',
+            default=[_UART_BAUDRATE])
+    parser.add_argument('-j', '--processes', type=int, default=None,
+            help='The number of parallel conversions, which defaults to the \
+                    number of cpus.')
+    parser.add_argument('-c', '--cacheDir', default=None,
+            help='The directory of the cache of generated sources, which \
+                    defaults to ~/.cache/fpgaedu/vhdl.')
+    parser.add_argument('-f', '--force', action='store_true',
+            help='Regenerates all sources, replacing their cached copies.')
     
     return parser.parse_args()
 
-def _generate_vhdl(output_dir, width_addr, width_data, top_level_file_name, \
-        exp_reset_active):
-    toVHDL.std_logic_ports = True
-    toVHDL.name = os.path.splitext(top_level_file_name)[0]
-    toVHDL.directory = output_dir 
-    toVHDL.use_clauses = \
-'''
-Library UNISIM;
-use UNISIM.vcomponents.all;
+def configuration_dir(configuration):
+    '''
+    Returns the name of the output subdirectory of a configuration.
+    '''
+    return 'addr%d_data%d_reset%s_%d' % (configuration.width_addr,
+            configuration.width_data,
+            'high' if configuration.exp_reset_active else 'low',
+            configuration.baudrate)
 
-use work.pck_myhdl_090.all;
-'''
-    
+def generate_vhdl(output_dir, width_addr, width_data, top_level_file_name,
+        exp_reset_active, baudrate=_UART_BAUDRATE, cache=None):
+    '''
+    Converts the board component of a single configuration to vhdl in
+    output_dir and returns the conversion time in seconds. The blocks of
+    the board component are converted to separate entities, which are only
+    converted again if they changed when a VhdlCache is given. The
+    conversion is configured through the global toVHDL attributes, so
+    conversions in the same process cannot run concurrently.
+    '''
+    start = time.time()
     spec = ControllerSpec(width_addr, width_data)
 
     clk = Signal(False)
-    reset = ResetSignal(not _RESET_ACTIVE, active=_RESET_ACTIVE, async=False)
+    reset = ResetSignal(not _RESET_ACTIVE, active=_RESET_ACTIVE, isasync=False)
     rx = Signal(False)
     tx = Signal(False)
     exp_addr = Signal(intbv(0)[width_addr:0])
@@ -52,15 +101,120 @@ use work.pck_myhdl_090.all;
     exp_clk = Signal(False)
     exp_clk_en = Signal(False)
 
-    toVHDL(BoardComponent, spec=spec, clk=clk, reset=reset,
+    generate_entities(output_dir, os.path.splitext(top_level_file_name)[0],
+            BoardComponent, spec=spec, clk=clk, reset=reset,
             rx=rx, tx=tx, exp_addr=exp_addr, exp_data_write=exp_din, 
             exp_data_read=exp_dout, exp_wen=exp_wen, exp_reset=exp_reset, 
             exp_clk=exp_clk, exp_clk_en=exp_clk_en,
-            exp_reset_active=exp_reset_active, baudrate=_UART_BAUDRATE)
+            exp_reset_active=exp_reset_active, baudrate=baudrate,
+            cache=cache, use_clauses=USE_CLAUSES)
+
+    return time.time() - start
+
+def _generate_configuration(arguments):
+    output_dir, top_level_file_name, configuration, cache = arguments
+    return generate_vhdl(output_dir, configuration.width_addr,
+            configuration.width_data, top_level_file_name,
+            configuration.exp_reset_active, configuration.baudrate, cache)
+
+def _entity_cache(cache):
+    # Keeps the hits and misses of the entities out of the report of the
+    # configurations
+    if cache is not None:
+        return VhdlCache(cache.cache_dir, cache.force)
+
+def _cache_arguments(top_level_file_name, configuration):
+    arguments = dict(configuration._asdict())
+    arguments['top_level_file_name'] = top_level_file_name
+    return arguments
+
+def generate_vhdl_cached(output_dir, top_level_file_name, configuration,
+        cache):
+    '''
+    Generates a single configuration in output_dir through cache, a
+    VhdlCache. Returns the time taken in seconds and whether the sources
+    were cached.
+    '''
+    start = time.time()
+    cached = cache.convert('board_component', _cache_arguments(
+        top_level_file_name, configuration), output_dir,
+        lambda pending_dir: _generate_configuration((pending_dir,
+            top_level_file_name, configuration, _entity_cache(cache))))
+    return time.time() - start, cached
+
+def generate_vhdl_matrix(output_dir, top_level_file_name, configurations,
+        processes=None, cache=None):
+    '''
+    Converts the board component of every configuration in parallel
+    processes, each to its own subdirectory of output_dir as named by
+    configuration_dir. Returns a list of (configuration, seconds, cached)
+    tuples, in the order of configurations.
+
+    Every process performs a single conversion, so that no toVHDL state
+    carries over from one configuration to the next. When a VhdlCache is
+    given, cached configurations are copied from it instead, and the
+    others are stored in it.
+    '''
+    configurations = list(configurations)
+    if len(set(configurations)) != len(configurations):
+        raise ValueError('configurations must be unique')
+
+    results = {}
+    tasks = []
+    for configuration in configurations:
+        directory = os.path.join(output_dir, configuration_dir(configuration))
+        if cache is None:
+            tasks.append((directory, configuration, None))
+            continue
+        start = time.time()
+        if cache.lookup('board_component', _cache_arguments(
+                top_level_file_name, configuration), directory):
+            results[configuration] = (time.time() - start, True)
+        else:
+            tasks.append((directory, configuration, cache.reserve()))
+
+    if tasks:
+        pool = multiprocessing.Pool(processes, maxtasksperchild=1)
+        try:
+            seconds = pool.map(_generate_configuration, [(pending_dir or
+                directory, top_level_file_name, configuration,
+                _entity_cache(cache)) for directory, configuration,
+                pending_dir in tasks], chunksize=1)
+        except BaseException:
+            for _, _, pending_dir in tasks:
+                if pending_dir is not None:
+                    shutil.rmtree(pending_dir, ignore_errors=True)
+            raise
+        finally:
+            pool.close()
+            pool.join()
+        for (directory, configuration, pending_dir), task_seconds in zip(
+                tasks, seconds):
+            if pending_dir is not None:
+                cache.store('board_component', _cache_arguments(
+                    top_level_file_name, configuration), pending_dir,
+                    directory)
+            results[configuration] = (task_seconds, False)
+
+    return [(configuration,) + results[configuration] for configuration in
+            configurations]
 
 if __name__ == '__main__':
     args = _parse_args()
 
-    _generate_vhdl(args.outputDir, args.addressWidth, args.dataWidth, 
-            args.topLevel, args.resetActive)
+    configurations = [Configuration(*values) for values in itertools.product(
+        args.addressWidth, args.dataWidth, args.resetActive, args.baudrate)]
+    cache = VhdlCache(args.cacheDir, force=args.force)
+    if len(configurations) == 1:
+        # A single configuration is written to the output directory itself
+        configuration = configurations[0]
+        results = [(configuration,) + generate_vhdl_cached(args.outputDir,
+            args.topLevel, configuration, cache)]
+    else:
+        results = generate_vhdl_matrix(args.outputDir, args.topLevel,
+                configurations, args.processes, cache)
 
+    for configuration, seconds, cached in results:
+        sys.stdout.write('%s: %.2f s%s\n' % (configuration_dir(configuration),
+            seconds, ' (cached)' if cached else ''))
+    sys.stdout.write(cache.report() + '\n')
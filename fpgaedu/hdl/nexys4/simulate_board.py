@@ -0,0 +1,34 @@
+import argparse
+from fpgaedu import ControllerSpec
+from fpgaedu.hdl.nexys4 import BoardSimulation
+
+def _parse_args():
+    '''
+    Parses the command line arguments.
+    '''
+    parser = argparse.ArgumentParser(description='Simulates the board \
+            component hdl with a memory experiment, bridging its uart to a \
+            pseudo-terminal or tcp socket.')
+    parser.add_argument('-a', '--addressWidth', required=True, type=int)
+    parser.add_argument('-d', '--dataWidth', required=True, type=int)
+    parser.add_argument('-b', '--baudDiv', type=int, default=16,
+            help='The number of simulated clock cycles per uart bit.')
+    parser.add_argument('-p', '--port', type=int, default=None,
+            help='Serves on this tcp port instead of a pseudo-terminal.')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = _parse_args()
+
+    simulation = BoardSimulation(ControllerSpec(args.addressWidth,
+        args.dataWidth), baud_div=args.baudDiv)
+    if args.port is None:
+        print('Simulating board on %s' % simulation.open_pty())
+    else:
+        print('Simulating board on %s:%s' % simulation.open_tcp('', 
+            args.port))
+    try:
+        simulation.serve_forever()
+    except KeyboardInterrupt:
+        simulation.close()
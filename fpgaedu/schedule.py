@@ -0,0 +1,65 @@
+import argparse, os, runpy
+from fpgaedu import (ControllerSpec, Board, Scheduler, DiscoveryCache,
+        discover_boards)
+
+def _parse_args():
+    '''
+    Parses the command line arguments.
+    '''
+    parser = argparse.ArgumentParser(description='Runs experiment scripts \
+            on all boards connected to the system in parallel. Every script \
+            is run with the client of its board as the global client, and \
+            may leave its outcome in the global result.')
+    parser.add_argument('scripts', nargs='+')
+    parser.add_argument('-a', '--addressWidth', required=True, type=int)
+    parser.add_argument('-d', '--dataWidth', required=True, type=int)
+    parser.add_argument('-p', '--ports', nargs='+', default=None,
+            help='The ports or pyserial urls to probe for boards, which \
+                    default to all serial ports.')
+    parser.add_argument('-b', '--baudrate', type=int, default=9600)
+    parser.add_argument('-c', '--cacheFile', default=None,
+            help='The file caching the boards found, which defaults to \
+                    ~/.cache/fpgaedu/boards.json.')
+    parser.add_argument('-t', '--timeout', type=float, default=1.0,
+            help='The number of seconds after which a board that does not \
+                    respond is retired.')
+
+    return parser.parse_args()
+
+def script_job(path):
+    '''
+    Returns a job running the script at path with the global client, which
+    returns the global result of the script.
+    '''
+    def job(client):
+        return runpy.run_path(path, init_globals={'client': client},
+                run_name='__main__').get('result')
+
+    job.__name__ = os.path.basename(path)
+    return job
+
+if __name__ == '__main__':
+    args = _parse_args()
+
+    spec = ControllerSpec(args.addressWidth, args.dataWidth)
+    boards = [Board(info.spec, info.port, connection, timeout=args.timeout)
+            for info, connection in discover_boards([spec], args.ports,
+                [args.baudrate], cache=DiscoveryCache(args.cacheFile))]
+    if not boards:
+        raise SystemExit('no boards found')
+    print('Running %d scripts on %s' % (len(args.scripts),
+        ', '.join(board.port for board in boards)))
+
+    scheduler = Scheduler(boards)
+    for path in args.scripts:
+        scheduler.submit(script_job(path))
+    try:
+        for job in scheduler.run():
+            port = job.board.port if job.board else '-'
+            outcome = ('error: %r' % job.error if job.error is not None else
+                    'result: %r' % (job.result,))
+            print('%s on %s, %.2f s, %s' % (job.name, port,
+                job.seconds or 0.0, outcome))
+        print(scheduler.report())
+    finally:
+        scheduler.close()
@@ -0,0 +1,43 @@
+import argparse
+from fpgaedu import ControllerSpec, MuxServer, open_transport
+
+def _parse_args():
+    '''
+    Parses the command line arguments.
+    '''
+    parser = argparse.ArgumentParser(description='Shares the board on a \
+            serial port among many clients, which connect over tcp with \
+            the tcp://HOST:PORT transport url, or pyserial\'s \
+            socket://HOST:PORT url.')
+    parser.add_argument('port', help='The serial port of the board, or \
+            another transport url, such as emulator://.')
+    parser.add_argument('-a', '--addressWidth', required=True, type=int)
+    parser.add_argument('-d', '--dataWidth', required=True, type=int)
+    parser.add_argument('-b', '--baudrate', type=int, default=9600)
+    parser.add_argument('-l', '--listen', default='localhost',
+            help='The host address to listen on.')
+    parser.add_argument('-p', '--tcpPort', type=int, default=0)
+    parser.add_argument('-r', '--readOnlyPort', type=int, default=None,
+            help='Also listens on this tcp port for clients that may only \
+                    read the board.')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = _parse_args()
+
+    spec = ControllerSpec(args.addressWidth, args.dataWidth)
+    connection = open_transport(args.port, spec, args.baudrate)
+    server = MuxServer(spec, connection)
+    print('Serving %s on %s:%s' % ((args.port,) + server.open(args.listen,
+        args.tcpPort)))
+    if args.readOnlyPort is not None:
+        print('Serving %s read-only on %s:%s' % ((args.port,) +
+            server.open(args.listen, args.readOnlyPort, readonly=True)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+        print(server.report())
+    finally:
+        connection.close()
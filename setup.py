@@ -5,8 +5,11 @@ from setuptools import setup
 setup(name='fpgaedu',
         version='0.1',
         author='Matthijs Bos',
-        packages=['fpgaedu'],
-        install_requires=['myhdl', 'pytest-runner'],
+        packages=['fpgaedu', 'fpgaedu.hdl', 'fpgaedu.hdl.nexys4'],
+        install_requires=['pyserial', 'pytest-runner'],
+        # Only the hdl subpackages depend on myhdl
+        extras_require={'hdl': ['myhdl>=0.10']},
+        python_requires='>=3.7',
         test_suite='pytest-runner',
         tests_require=['pytest', 'pytest-xdist']
         )
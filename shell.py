@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 
-import struct
-import cmd, sys
+import cmd, sys, time
 import serial
 from serial.tools.list_ports import comports
-from fpgaedu import ControllerSpec
+from fpgaedu import (ControllerSpec, Client, MemoryMirror,
+        ResponseTimeoutError, DiscoveryCache, discover_boards, open_transport)
 import argparse
 
 #BAUDRATE = 115200
@@ -22,7 +22,14 @@ class FpgaEduShell(cmd.Cmd):
     intro = 'Welcome to the fpgaedu shell'
     prompty = '(fpgaedu)'
     connection = None
-    spec = ControllerSpec(1,8)
+    client = None
+    spec = ControllerSpec(32,8)
+    stats_prev = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Read when the shell is created rather than when it is imported
+        self.discovery = DiscoveryCache()
 
     def do_list_ports(self, arg):
         ports = comports()
@@ -31,23 +38,53 @@ class FpgaEduShell(cmd.Cmd):
         for port in ports:
             print(port.name)
 
+    def do_discover(self, arg):
+        boards = discover_boards([self.spec], baudrates=[BAUDRATE],
+                cache=self.discovery)
+        if len(boards) <= 0:
+            print('no boards found')
+        for info, connection in boards:
+            connection.close()
+            print('%s: address width=%s, data width=%s, baudrate=%s, '
+                    'cycle count=%s' % (info.port, info.spec.width_addr,
+                        info.spec.width_data, info.baudrate,
+                        info.cycle_count))
+
     def postloop(self):
         self.do_disconnect()
 
     def do_connect(self, arg):
+        # Boards found by discover are connected to with their settings
+        baudrate = BAUDRATE
+        for port in (arg, '/dev/'+arg):
+            cached = self.discovery.get(port)
+            if cached is not None:
+                baudrate, self.spec = cached
+                break
+        # Serial ports, tcp://HOST:PORT of a board server, or emulator://
         try:
-            self.connection = serial.Serial(arg, baudrate=BAUDRATE) 
-            print('Started connection')
-        except serial.SerialException:
+            self.connection = open_transport(arg, self.spec, baudrate)
+        except (serial.SerialException, OSError, ValueError):
             try:
-                self.connection = serial.Serial('/dev/'+arg, baudrate=BAUDRATE)
-            except serial.SerialException:
+                self.connection = open_transport('/dev/'+arg, self.spec,
+                        baudrate)
+            except (serial.SerialException, OSError, ValueError):
                 print('Unable to open the specified port')
+                return
+        print('Started connection')
+        self.client = Client(self.spec, self.connection,
+                mirror=MemoryMirror(self.spec))
+        self.client.add_event_handler(self.print_res)
+        try:
+            print('receive credits: %s' % self.client.sync_credits())
+        except ResponseTimeoutError:
+            print('no response to credit query, continuing without credits')
 
-    def do_disconnect(self, arg):
-        if self.connection is serial.Serial:
+    def do_disconnect(self, arg=None):
+        if self.connection is not None:
             self.connection.close()
-            del self.connection
+            self.connection = None
+            self.client = None
 
     def do_read(self, arg):
         readparser = FpgaEduArgumentParser()
@@ -57,8 +94,7 @@ class FpgaEduShell(cmd.Cmd):
         except FpgaEduArgumentError as err:
             return
         
-        self.write_addr_type_cmd(self.spec.opcode_cmd_read, n.addr, 0)
-        self.read_res()
+        self.command(lambda: self.client.read(n.addr))
 
     def do_write(self, arg):
         writeparser = FpgaEduArgumentParser()
@@ -69,110 +105,116 @@ class FpgaEduShell(cmd.Cmd):
         except FpgaEduArgumentError as err:
             return
         
-        self.write_addr_type_cmd(self.spec.opcode_cmd_write, n.addr, n.data)
-        self.read_res()
-
-        pass
+        self.command(lambda: self.client.write(n.addr, n.data))
 
     def do_reset(self, arg):
-        self.write_value_type_cmd(self.spec.opcode_cmd_reset, 0)
-        self.read_res()
+        self.command(lambda: self.client.reset())
 
     def do_step(self, arg):
-        self.write_value_type_cmd(self.spec.opcode_cmd_step, 0)
-        self.read_res()
-
+        self.command(lambda: self.client.step())
 
     def do_start(self, arg):
-        self.write_value_type_cmd(self.spec.opcode_cmd_start, 0)
-        self.read_res()
+        self.command(lambda: self.client.start())
 
     def do_pause(self, arg):
-        self.write_value_type_cmd(self.spec.opcode_cmd_pause, 0)
-        self.read_res()
+        self.command(lambda: self.client.pause())
 
     def do_status(self, arg):
-        self.write_value_type_cmd(self.spec.opcode_cmd_status, 0)
-        self.read_res()
-
-    def write_addr_type_cmd(self, opcode, addr, data):
-        cmd = struct.pack('>BBIBB', self.spec.chr_start, opcode,
-                addr, data, self.spec.chr_stop)
-        print('sending address-type command')
-        print(repr(cmd))
-        self.connection.write(cmd)
-
-    def write_value_type_cmd(self, opcode, value):
-        cmd = struct.pack('>BBIBB', self.spec.chr_start, opcode, 0, value, self.spec.chr_stop)
-        print('sending value-type command')
-        print(repr(cmd))
-        self.connection.write(cmd)
-
-    def read_res(self):
-        message = [None for i in range(6)]
-        if self.connection:
-            self.connection.timeout = 0.1
-            esc = False
-            message = bytes(0)
-            
-
-            #read start byte
-            while True:
-                res = self.connection.read(1)
-                if not esc and res == bytes([self.spec.chr_start]):
-                    break
-                if not esc and res == bytes([self.spec.chr_esc]):
-                    esc = True
-                else:
-                    esc = False
-            #read message bytes
-            while True:
-                res = self.connection.read(1)
-                if not esc and res == bytes([self.spec.chr_start]):
-                    message = bytes(0) 
-                elif not esc and res == bytes([self.spec.chr_stop]):
-                    break
-                else:
-                    message += res
-
-                if not esc and res == bytes([self.spec.chr_esc]):
-                    esc = True
-                else:
-                    esc = False
-
-            print(repr(message))
-
-            opcode = int.from_bytes(message[0:1], byteorder='big')
-            addr = int.from_bytes(message[1:5], byteorder='big')
-            data = int.from_bytes(message[5:6], byteorder='big')
-            value = int.from_bytes(message[1:6], byteorder='big')
-
-            if opcode == self.spec.opcode_res_read_success:
-                print('read success: addr=%s, data=%s' % (addr, data))
-            elif opcode == self.spec.opcode_res_read_error_mode:
-                print('read error: controller in autonomous mode')
-            elif opcode == self.spec.opcode_res_write_success:
-                print('write success: addr=%s, data=%s' % (addr, data))
-            elif opcode == self.spec.opcode_res_write_error_mode:
-                print('write error: controller in autonomous mode')
-            elif opcode == self.spec.opcode_res_reset_success:
-                print('reset success')
-            elif opcode == self.spec.opcode_res_step_success:
-                print('step success: cycle count=%s' % value)
-            elif opcode == self.spec.opcode_res_step_error_mode:
-                print('step error: controller in autonomous mode')
-            elif opcode == self.spec.opcode_res_start_success:
-                print('start success: cycle count at start=%s' % value)
-            elif opcode == self.spec.opcode_res_start_error_mode:
-                print('start error: already in autonomous mode')
-            elif opcode == self.spec.opcode_res_pause_success:
-                print('pause success: cycle_count=%s' % value)
-            elif opcode == self.spec.opcode_res_pause_error_mode:
-                print('pause error: already in manual mode')
-            elif opcode == self.spec.opcode_res_status:
-                print('status: cycle count=%s' % value)
-        else:
-            print('unable to read response: not connected')
+        self.command(lambda: self.client.status())
+
+    def do_credits(self, arg):
+        if not self.client:
+            print('unable to query credits: not connected')
+            return
+        try:
+            print('receive credits: %s' % self.client.sync_credits())
+        except ResponseTimeoutError:
+            print('no response received')
+
+    def do_mirror(self, arg):
+        if not self.client:
+            print('unable to report the memory mirror: not connected')
+            return
+        print(self.client.mirror.report())
+
+    def do_stats(self, arg):
+        if not self.client:
+            print('unable to read statistics: not connected')
+            return
+
+        values = []
+        for index in range(self.spec.num_stats):
+            try:
+                res = self.client.stat(index)
+            except ResponseTimeoutError:
+                print('no response received')
+                return
+            if res.opcode != self.spec.opcode_res_stat:
+                print('stats error: unexpected response opcode %s' % 
+                        res.opcode)
+                return
+            values.append(res.value)
+        now = time.time()
+
+        for index, name in enumerate(self.spec.stat_names):
+            if self.stats_prev is None:
+                print('%-20s %12d' % (name, values[index]))
+            else:
+                prev_time, prev_values = self.stats_prev
+                rate = (values[index] - prev_values[index]) / (now - prev_time)
+                print('%-20s %12d %12.1f/s' % (name, values[index], rate))
+        self.stats_prev = (now, values)
+
+    def precmd(self, line):
+        # Show the events that arrived while waiting for input
+        if self.client:
+            self.client.poll()
+        return line
+
+    def command(self, func):
+        if not self.client:
+            print('unable to send command: not connected')
+            return
+        try:
+            self.print_res(func())
+        except ResponseTimeoutError:
+            print('no response received')
+
+    def print_res(self, res):
+        opcode, addr, data, value = res
+
+        if opcode == self.spec.opcode_res_read_success:
+            print('read success: addr=%s, data=%s' % (addr, data))
+        elif opcode == self.spec.opcode_res_read_error_mode:
+            print('read error: controller in autonomous mode')
+        elif opcode == self.spec.opcode_res_write_success:
+            print('write success: addr=%s, data=%s' % (addr, data))
+        elif opcode == self.spec.opcode_res_write_error_mode:
+            print('write error: controller in autonomous mode')
+        elif opcode == self.spec.opcode_res_reset_success:
+            print('reset success')
+        elif opcode == self.spec.opcode_res_step_success:
+            print('step success: cycle count=%s' % value)
+        elif opcode == self.spec.opcode_res_step_error_mode:
+            print('step error: controller in autonomous mode')
+        elif opcode == self.spec.opcode_res_start_success:
+            print('start success: cycle count at start=%s' % value)
+        elif opcode == self.spec.opcode_res_start_error_mode:
+            print('start error: already in autonomous mode')
+        elif opcode == self.spec.opcode_res_pause_success:
+            print('pause success: cycle_count=%s' % value)
+        elif opcode == self.spec.opcode_res_pause_error_mode:
+            print('pause error: already in manual mode')
+        elif opcode == self.spec.opcode_res_status:
+            print('status: cycle count=%s' % value)
+        elif opcode == self.spec.opcode_res_stat:
+            print('stat: value=%s' % value)
+        elif opcode == self.spec.opcode_res_credit:
+            print('credit: free receive capacity=%s' % value)
+        elif opcode == self.spec.opcode_res_event_manual:
+            print('event: entered manual mode, cycle count=%s' % value)
+        elif opcode == self.spec.opcode_res_event_autonomous:
+            print('event: entered autonomous mode, cycle count=%s' % value)
 
 
  
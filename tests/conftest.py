@@ -0,0 +1,5 @@
+import os, sys
+
+# Makes the helper modules of the tests directory, such as differential,
+# importable by the tests in its subdirectories
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,179 @@
+from unittest import TestCase
+from fpgaedu import (ControllerSpec, Client, CreditWindow, FrameDecoder, 
+        ResponseTimeoutError, encode_frame)
+
+class MockBoard(object):
+    '''
+    Serial-port-like object answering every command with a response. A
+    command only counts as processed once its response is read, which 
+    allows tracking the number of unanswered bytes in flight.
+    '''
+
+    def __init__(self, spec, credits):
+        self.spec = spec
+        self.credits = credits
+        self.decoder = FrameDecoder(spec)
+        self.pending = []
+        self.events = []
+        self.unanswered = 0
+        self.max_unanswered = 0
+        self.messages = []
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        self.unanswered += len(data)
+        self.max_unanswered = max(self.max_unanswered, self.unanswered)
+        for message in self.decoder.feed(data):
+            self.messages.append(message)
+            self.pending.append((message, len(encode_frame(self.spec,
+                message))))
+
+    @property
+    def in_waiting(self):
+        return len(self.events)
+
+    def read(self, size):
+        if self.events:
+            return self.events.pop(0)
+        if not self.pending:
+            return b''
+        message, size = self.pending.pop(0)
+        self.unanswered -= size
+        spec = self.spec
+        opcode = spec.parse_opcode(message)
+        if opcode == spec.opcode_cmd_credit:
+            response = spec.value_type_message(spec.opcode_res_credit, 
+                    self.credits)
+        else:
+            response = spec.addr_type_message(spec.opcode_res_read_success,
+                    spec.parse_addr(message), spec.parse_addr(message) % 256)
+        if opcode == spec.opcode_cmd_start:
+            return encode_frame(spec, response) + self.event(
+                    spec.opcode_res_event_autonomous, 1)
+        return encode_frame(spec, response)
+
+    def event(self, opcode, cycle_count):
+        return encode_frame(self.spec, self.spec.value_type_message(opcode, 
+                cycle_count))
+
+class ClientTestCase(TestCase):
+
+    def setUp(self):
+        self.spec = ControllerSpec(32, 8)
+        self.board = MockBoard(self.spec, credits=20)
+        self.client = Client(self.spec, self.board, timeout=0)
+
+    def test_credit_window(self):
+        window = CreditWindow(10)
+        self.assertTrue(window.can_send(12))
+        window.sent(8)
+        self.assertTrue(window.can_send(2))
+        self.assertFalse(window.can_send(3))
+        window.release()
+        self.assertEquals(window.used, 0)
+        self.assertEquals(window.outstanding, 0)
+
+    def test_sync_credits(self):
+        self.assertEquals(self.client.sync_credits(), 20)
+        self.assertEquals(self.client.window.credits, 20)
+
+    def test_transact(self):
+        messages = [self.spec.addr_type_message(self.spec.opcode_cmd_read, 
+                addr, 0) for addr in range(100)]
+        responses = self.client.transact(messages)
+        self.assertEquals([res.addr for res in responses], list(range(100)))
+        self.assertTrue(self.board.max_unanswered <= 20)
+        self.assertEquals(self.client.window.used, 0)
+
+    def test_timeout(self):
+        with self.assertRaises(ResponseTimeoutError):
+            self.client.receive()
+
+    def test_timeout_noise(self):
+        # A line that keeps sending bytes outside of frames
+        self.board.read = lambda size: b'\x00'
+        with self.assertRaises(ResponseTimeoutError):
+            self.client.receive()
+
+    def test_events(self):
+        events = []
+        self.client.add_event_handler(events.append)
+        self.client.sync_credits()
+
+        response = self.client.start()
+        self.assertEquals(response.opcode, self.spec.opcode_res_read_success)
+        self.assertEquals(self.client.window.outstanding, 0)
+        self.assertEquals([(e.opcode, e.value) for e in events], 
+                [(self.spec.opcode_res_event_autonomous, 1)])
+
+        self.board.events.append(self.board.event(
+            self.spec.opcode_res_event_manual, 100))
+        self.client.poll()
+        self.assertEquals(events[-1].opcode, self.spec.opcode_res_event_manual)
+        self.assertEquals(events[-1].value, 100)
+        with self.assertRaises(ResponseTimeoutError):
+            self.client.receive()
+
+        self.client.remove_event_handler(events.append)
+        self.board.events.append(self.board.event(
+            self.spec.opcode_res_event_manual, 200))
+        self.client.poll()
+        self.assertEquals(len(events), 2)
+
+    def written(self):
+        spec = self.spec
+        return [(spec.parse_addr(message), spec.parse_data(message)) for
+                message in self.board.messages if spec.parse_opcode(message)
+                == spec.opcode_cmd_write]
+
+    def test_batch(self):
+        with self.client.batch() as batch:
+            self.assertIsNone(self.client.write(1, 1))
+            self.client.write(2, 2)
+            self.client.write(1, 3)
+            self.assertEquals(self.board.writes, 0)
+        self.assertEquals(self.board.writes, 1)
+        self.assertEquals(self.written(), [(2, 2), (1, 3)])
+        self.assertEquals(batch.coalesced, 1)
+        self.assertEquals([res.addr for res in batch.responses], [2, 1])
+        self.assertEquals(self.client.write(4, 4).addr, 4)
+
+    def test_batch_dependencies(self):
+        with self.client.batch() as batch:
+            self.client.write(1, 1)
+            self.client.read(2)
+            self.assertEquals(self.written(), [])
+            self.client.read(1)
+            self.assertEquals(self.written(), [(1, 1)])
+            self.client.write(1, 2)
+            self.client.step()
+            self.assertEquals(self.written(), [(1, 1), (1, 2)])
+        self.assertEquals(len(batch.responses), 2)
+        self.assertEquals(self.board.pending, [])
+
+    def test_batch_credit_window(self):
+        self.client.sync_credits()
+        with self.client.batch():
+            for addr in range(10):
+                self.client.write(addr, addr)
+        self.assertEquals(len(self.written()), 10)
+        self.assertTrue(self.board.max_unanswered <= 20)
+        self.assertEquals(self.client.window.used, 0)
+
+    def test_batch_exception(self):
+        with self.assertRaises(KeyError):
+            with self.client.batch() as batch:
+                self.client.write(1, 1)
+                self.client.step()
+                self.client.write(2, 2)
+                raise KeyError()
+        # Only the writes sent before the step reached the board
+        self.assertEquals(self.written(), [(1, 1)])
+        self.assertEquals(len(batch.responses), 1)
+        self.assertEquals(self.client.write(3, 3).addr, 3)
+
+    def test_nested_batch(self):
+        with self.client.batch():
+            with self.assertRaises(ValueError):
+                self.client.batch()
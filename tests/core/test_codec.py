@@ -0,0 +1,52 @@
+from unittest import TestCase
+from fpgaedu import ControllerSpec, FrameDecoder, encode_frame, decode_response
+
+class CodecTestCase(TestCase):
+
+    def setUp(self):
+        self.spec = ControllerSpec(32, 8)
+
+    def test_encode_frame(self):
+        message = self.spec.addr_type_message(self.spec.opcode_cmd_write, 
+                0x01020304, 0x05)
+        frame = encode_frame(self.spec, message)
+        self.assertEquals(bytearray(frame), 
+                bytearray([0x12, 0x01, 0x01, 0x02, 0x03, 0x04, 0x05, 0x13]))
+
+    def test_encode_frame_escape(self):
+        message = self.spec.addr_type_message(self.spec.opcode_cmd_write, 
+                0x12137D00, 0x7D)
+        frame = encode_frame(self.spec, message)
+        self.assertEquals(bytearray(frame), 
+                bytearray([0x12, 0x01, 0x7D, 0x12, 0x7D, 0x13, 0x7D, 0x7D, 
+                    0x00, 0x7D, 0x7D, 0x13]))
+
+    def test_decode_roundtrip(self):
+        decoder = FrameDecoder(self.spec)
+        messages = [self.spec.addr_type_message(self.spec.opcode_res_read_success,
+                addr, addr % 256) for addr in [0, 0x12, 0x7D137D12, 0xFFFFFFFF]]
+        data = b''.join(encode_frame(self.spec, m) for m in messages)
+
+        decoded = []
+        # feed in uneven chunks
+        for i in range(0, len(data), 5):
+            decoded.extend(decoder.feed(data[i:i+5]))
+        self.assertEquals(decoded, messages)
+
+    def test_decode_discard(self):
+        decoder = FrameDecoder(self.spec)
+        message = self.spec.value_type_message(self.spec.opcode_res_status, 
+                1234)
+        frame = bytearray(encode_frame(self.spec, message))
+        # truncated frame, interrupted frame, garbage and a valid frame
+        data = frame[:4] + bytearray([0x13, 0x55]) + frame[:3] + frame
+        self.assertEquals(decoder.feed(data), [message])
+        self.assertEquals(decoder.errors, 2)
+
+    def test_decode_response(self):
+        message = self.spec.addr_type_message(
+                self.spec.opcode_res_read_success, 23, 4)
+        res = decode_response(self.spec, message)
+        self.assertEquals(res.opcode, self.spec.opcode_res_read_success)
+        self.assertEquals(res.addr, 23)
+        self.assertEquals(res.data, 4)
@@ -49,13 +49,16 @@ class ControllerSpecTestCase(TestCase):
         self.assertIsInstance(spec.opcode_cmd_start, int)
         self.assertIsInstance(spec.opcode_cmd_pause, int)
         self.assertIsInstance(spec.opcode_cmd_status, int)
+        self.assertIsInstance(spec.opcode_cmd_stat, int)
+        self.assertIsInstance(spec.opcode_cmd_credit, int)
 
     def test_cmd_opcodes_unique(self):
         spec = ControllerSpec(1,1)
         cmd_opcodes = [spec.opcode_cmd_read, spec.opcode_cmd_write,
                 spec.opcode_cmd_reset, spec.opcode_cmd_step, 
                 spec.opcode_cmd_start, spec.opcode_cmd_pause,
-                spec.opcode_cmd_status]
+                spec.opcode_cmd_status, spec.opcode_cmd_stat,
+                spec.opcode_cmd_credit]
         self.assertEquals(len(set(cmd_opcodes)), len(cmd_opcodes))
 
     def test_res_opcodes_defined(self):
@@ -72,6 +75,10 @@ class ControllerSpecTestCase(TestCase):
         self.assertIsInstance(spec.opcode_res_pause_success, int)
         self.assertIsInstance(spec.opcode_res_pause_error_mode, int)
         self.assertIsInstance(spec.opcode_res_status, int)
+        self.assertIsInstance(spec.opcode_res_stat, int)
+        self.assertIsInstance(spec.opcode_res_credit, int)
+        self.assertIsInstance(spec.opcode_res_event_manual, int)
+        self.assertIsInstance(spec.opcode_res_event_autonomous, int)
 
     def test_res_opcodes_unique(self):
         spec = ControllerSpec(1,1)
@@ -84,8 +91,28 @@ class ControllerSpecTestCase(TestCase):
                 spec.opcode_res_start_error_mode,
                 spec.opcode_res_pause_success, 
                 spec.opcode_res_pause_error_mode,
-                spec.opcode_res_status]
+                spec.opcode_res_status, spec.opcode_res_stat,
+                spec.opcode_res_credit, spec.opcode_res_event_manual,
+                spec.opcode_res_event_autonomous]
         self.assertEquals(len(set(res_opcodes)), len(res_opcodes))
+        self.assertTrue(max(res_opcodes) < 2**spec.width_opcode)
+        events = [opcode for opcode in res_opcodes 
+                if spec.is_event_response(opcode)]
+        self.assertEquals(events, [spec.opcode_res_event_manual, 
+                spec.opcode_res_event_autonomous])
+        self.assertTrue(spec.is_value_type_response(
+                spec.opcode_res_event_manual))
+
+    def test_stat_indexes(self):
+        spec = ControllerSpec(1,1)
+        stat_indexes = [spec.stat_rx_bytes, spec.stat_rx_frame_errors,
+                spec.stat_rx_overflows, spec.stat_rx_messages,
+                spec.stat_rx_message_errors, spec.stat_tx_bytes,
+                spec.stat_tx_stalls, spec.stat_commands]
+        self.assertEquals(sorted(stat_indexes), list(range(spec.num_stats)))
+        self.assertEquals(len(spec.stat_names), spec.num_stats)
+        self.assertTrue(spec.is_addr_type_command(spec.opcode_cmd_stat))
+        self.assertTrue(spec.is_value_type_response(spec.opcode_res_stat))
 
     def test_message_classification(self):
         spec = ControllerSpec(1,1)
@@ -0,0 +1,101 @@
+import os, shutil, tempfile, threading, time
+from unittest import TestCase, mock
+from fpgaedu import (ControllerSpec, BoardEmulator, EmulatorTransport,
+        DiscoveryCache, probe, identify, discover_boards)
+from fpgaedu._emulator import _open_pty
+
+_TIMEOUT = 0.2
+
+class DiscoveryTestCase(TestCase):
+
+    def setUp(self):
+        self.spec = ControllerSpec(16, 8)
+        self.other_spec = ControllerSpec(32, 8)
+        self.emulator = BoardEmulator(self.spec)
+        self.path = self.emulator.open()
+        self.thread = threading.Thread(target=self.emulator.serve_forever,
+                kwargs={'poll_interval': 0.05})
+        self.thread.daemon = True
+        self.thread.start()
+        # Ports on which no board answers
+        self.ptys = [_open_pty() for _ in range(4)]
+        self.silent = [os.ttyname(slave) for _, slave in self.ptys]
+        self.directory = tempfile.mkdtemp()
+        self.cache = DiscoveryCache(os.path.join(self.directory,
+            'boards.json'))
+
+    def tearDown(self):
+        self.emulator.close()
+        self.thread.join()
+        for master, slave in self.ptys:
+            os.close(master)
+            os.close(slave)
+        shutil.rmtree(self.directory)
+
+    def test_probe(self):
+        emulator = BoardEmulator(self.spec)
+        connection = EmulatorTransport(emulator)
+        self.assertEquals(probe(self.spec, connection).opcode,
+                self.spec.opcode_res_status)
+        with mock.patch.object(emulator, 'process', return_value=b''):
+            self.assertIsNone(probe(self.spec, connection, timeout=0.05))
+
+    def test_discover_boards(self):
+        boards = discover_boards([self.spec], self.silent + [self.path,
+            '/nonexistent'], timeout=_TIMEOUT)
+        try:
+            self.assertEquals([info.port for info, _ in boards], [self.path])
+            info = boards[0][0]
+            self.assertEquals(info.baudrate, 9600)
+            self.assertEquals(info.spec, self.spec)
+            self.assertEquals(info.cycle_count, 0)
+        finally:
+            for _, connection in boards:
+                connection.close()
+
+    def test_concurrent(self):
+        start = time.time()
+        discover_boards([self.spec], self.silent, timeout=_TIMEOUT)
+        # Probed one by one, the ports would take a timeout each
+        self.assertTrue(time.time() - start < 0.5 * len(self.silent) *
+                _TIMEOUT)
+
+    def test_identify_spec(self):
+        info, connection = identify(self.path, [self.other_spec, self.spec],
+                baudrates=[19200, 9600], timeout=_TIMEOUT)
+        connection.close()
+        self.assertEquals(info.spec, self.spec)
+
+    def test_identify_transport(self):
+        # Opened like every other host connection
+        info, connection = identify('emulator://', [self.spec],
+                baudrates=[19200, 9600], timeout=_TIMEOUT)
+        connection.close()
+        self.assertIsInstance(connection, EmulatorTransport)
+        self.assertEquals(info.spec, self.spec)
+        self.assertEquals(info.baudrate, 19200)
+
+    def test_cache(self):
+        specs = [self.other_spec, self.spec]
+        for _, connection in discover_boards(specs, [self.path],
+                timeout=_TIMEOUT, cache=self.cache):
+            connection.close()
+        cache = DiscoveryCache(self.cache.path)
+        self.assertEquals(cache.get(self.path)[0], 9600)
+        self.assertEquals(cache.get(self.path)[1].width_message,
+                self.spec.width_message)
+
+        # Found with the first probe
+        start = time.time()
+        info, connection = identify(self.path, specs, timeout=_TIMEOUT,
+                cache=cache)
+        connection.close()
+        self.assertTrue(time.time() - start < _TIMEOUT)
+        self.assertEquals(info.spec.width_addr, 16)
+
+    def test_stale_cache(self):
+        self.cache.put(identify(self.path, [self.spec],
+            timeout=_TIMEOUT)[0]._replace(port=self.silent[0]))
+        self.assertIsNone(identify(self.silent[0], [self.spec],
+            timeout=_TIMEOUT, cache=self.cache))
+        self.assertIsNone(self.cache.get(self.silent[0]))
@@ -0,0 +1,128 @@
+import threading, time
+from unittest import TestCase
+
+import serial
+
+from fpgaedu import (ControllerSpec, BoardEmulator, Client, encode_frame,
+        FrameDecoder, decode_response)
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+class BoardEmulatorTestCase(TestCase):
+
+    def setUp(self):
+        self.spec = ControllerSpec(32, 8)
+        self.clock = FakeClock()
+        self.emulator = BoardEmulator(self.spec, memory={3: 4}, 
+                clk_freq=1000, clock=self.clock)
+
+    def command(self, opcode, addr=0, data=0):
+        message = self.spec.addr_type_message(opcode, addr, data)
+        decoder = FrameDecoder(self.spec)
+        responses = decoder.feed(self.emulator.process(
+            encode_frame(self.spec, message)))
+        return [decode_response(self.spec, res) for res in responses]
+
+    def test_memory(self):
+        spec = self.spec
+        res, = self.command(spec.opcode_cmd_read, 3)
+        self.assertEquals((res.opcode, res.addr, res.data), 
+                (spec.opcode_res_read_success, 3, 4))
+        res, = self.command(spec.opcode_cmd_write, 0x13, 0x7D)
+        self.assertEquals((res.opcode, res.addr, res.data), 
+                (spec.opcode_res_write_success, 0x13, 0x7D))
+        res, = self.command(spec.opcode_cmd_read, 0x13)
+        self.assertEquals(res.data, 0x7D)
+        res, = self.command(spec.opcode_cmd_reset)
+        self.assertEquals(res.opcode, spec.opcode_res_reset_success)
+        res, = self.command(spec.opcode_cmd_read, 0x13)
+        self.assertEquals(res.data, 0)
+
+    def test_modes(self):
+        spec = self.spec
+        res, = self.command(spec.opcode_cmd_step)
+        self.assertEquals(res.opcode, spec.opcode_res_step_success)
+        self.assertEquals(self.emulator.cycle_count, 1)
+
+        res, event = self.command(spec.opcode_cmd_start)
+        self.assertEquals(res.opcode, spec.opcode_res_start_success)
+        self.assertEquals(event.opcode, spec.opcode_res_event_autonomous)
+        self.clock.time = 2.0
+        res, = self.command(spec.opcode_cmd_status)
+        self.assertEquals(res.value, 2002)
+        res, = self.command(spec.opcode_cmd_write, 1, 1)
+        self.assertEquals(res.opcode, spec.opcode_res_write_error_mode)
+        res, = self.command(spec.opcode_cmd_step)
+        self.assertEquals(res.opcode, spec.opcode_res_step_error_mode)
+
+        res, event = self.command(spec.opcode_cmd_pause)
+        self.assertEquals(res.opcode, spec.opcode_res_pause_success)
+        self.assertEquals((event.opcode, event.value), 
+                (spec.opcode_res_event_manual, 2002))
+        self.clock.time = 3.0
+        self.assertEquals(self.emulator.cycle_count, 2002)
+
+    def test_stats(self):
+        spec = self.spec
+        self.emulator.process(b'\x12\x00\x13')
+        self.command(spec.opcode_cmd_read, 3)
+        res, = self.command(spec.opcode_cmd_stat, spec.stat_commands)
+        self.assertEquals(res.value, 2)
+        res, = self.command(spec.opcode_cmd_stat, spec.stat_rx_message_errors)
+        self.assertEquals(res.value, 1)
+        res, = self.command(spec.opcode_cmd_credit)
+        self.assertEquals(res.value, self.emulator.rx_fifo_depth)
+
+class BoardEmulatorPtyTestCase(TestCase):
+
+    BAUDRATE = None
+
+    def setUp(self):
+        self.spec = ControllerSpec(32, 8)
+        self.emulator = BoardEmulator(self.spec, baudrate=self.BAUDRATE)
+        path = self.emulator.open()
+        self.thread = threading.Thread(target=self.emulator.serve_forever,
+                kwargs={'poll_interval': 0.05})
+        self.thread.daemon = True
+        self.thread.start()
+        self.connection = serial.Serial(path, timeout=0.1)
+        self.client = Client(self.spec, self.connection)
+
+    def tearDown(self):
+        self.connection.close()
+        self.emulator.close()
+        self.thread.join()
+
+    def test_client(self):
+        events = []
+        self.client.add_event_handler(events.append)
+        self.assertEquals(self.client.sync_credits(), 
+                self.emulator.rx_fifo_depth)
+        messages = [self.spec.addr_type_message(self.spec.opcode_cmd_write,
+            addr, addr) for addr in range(0x10, 0x20)]
+        responses = self.client.transact(messages)
+        self.assertEquals([res.data for res in responses], 
+                list(range(0x10, 0x20)))
+        self.assertEquals(self.client.read(0x13).data, 0x13)
+        self.client.start()
+        self.client.pause()
+        self.assertEquals([event.opcode for event in events], 
+                [self.spec.opcode_res_event_autonomous, 
+                self.spec.opcode_res_event_manual])
+
+class BoardEmulatorBaudrateTestCase(BoardEmulatorPtyTestCase):
+
+    BAUDRATE = 19200
+
+    def test_client(self):
+        start = time.time()
+        super(BoardEmulatorBaudrateTestCase, self).test_client()
+        # 21 commands of at least 8 bytes, which are received one by one
+        byte_time = 10.0 / self.BAUDRATE
+        self.assertTrue(time.time() - start > 21 * 8 * byte_time)
@@ -0,0 +1,52 @@
+import os, sys, subprocess
+from unittest import TestCase
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+# Budget for importing the host package, in microseconds. It takes a few
+# tens of milliseconds without myhdl, and several hundreds with it.
+_IMPORT_BUDGET = 250000
+
+def _import_times(statement):
+    '''
+    Runs statement in a new interpreter with -X importtime and returns the
+    cumulative import time of every module in microseconds.
+    '''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([_ROOT] +
+            [path for path in [env.get('PYTHONPATH')] if path])
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+        statement], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        times[module.strip()] = int(cumulative)
+    return times
+
+class ImportsTestCase(TestCase):
+
+    def test_host_package_without_myhdl(self):
+        times = _import_times('import fpgaedu')
+        self.assertNotIn('myhdl', times)
+
+    def test_emulator_imported_lazily(self):
+        # The emulator needs pty and tty, which are not available everywhere
+        times = _import_times('import fpgaedu')
+        self.assertNotIn('fpgaedu._emulator', times)
+        self.assertNotIn('tty', times)
+        times = _import_times('import fpgaedu; fpgaedu.BoardEmulator')
+        self.assertIn('pty', times)
+
+    def test_host_package_import_time(self):
+        # The best of several runs, which excludes a cold file cache
+        best = min(_import_times('import fpgaedu')['fpgaedu']
+                for _ in range(3))
+        self.assertLess(best, _IMPORT_BUDGET)
+
+    def test_hdl_imported_lazily(self):
+        times = _import_times('import fpgaedu; fpgaedu.hdl.Controller')
+        self.assertIn('fpgaedu.hdl._controller', times)
+        self.assertIn('myhdl', times)
@@ -0,0 +1,110 @@
+import os, tempfile
+from unittest import TestCase
+from fpgaedu import (ControllerSpec, Client, MemoryMirror, BoardEmulator,
+        EmulatorTransport)
+
+class MemoryMirrorTestCase(TestCase):
+
+    def setUp(self):
+        self.spec = ControllerSpec(16, 8)
+        self.emulator = BoardEmulator(self.spec, memory={3: 30, 4: 40})
+        self.connection = EmulatorTransport(self.emulator)
+        self.mirror = MemoryMirror(self.spec, page_size=16)
+        self.client = Client(self.spec, self.connection, timeout=0,
+                mirror=self.mirror)
+
+    def commands(self):
+        return self.emulator.stats[self.spec.stat_commands]
+
+    def test_page_size(self):
+        with self.assertRaises(ValueError):
+            MemoryMirror(self.spec, page_size=12)
+
+    def test_repeated_reads(self):
+        self.assertEquals(self.client.read(3).data, 30)
+        response = self.client.read(3)
+        self.assertEquals(response.opcode, self.spec.opcode_res_read_success)
+        self.assertEquals((response.addr, response.data), (3, 30))
+        self.assertEquals(self.commands(), 1)
+        self.assertEquals((self.mirror.hits, self.mirror.misses), (1, 1))
+        self.assertEquals(self.mirror.hit_rate, 0.5)
+        self.assertEquals(self.mirror.pages, 1)
+
+    def test_write(self):
+        self.client.read(4)
+        self.client.write(4, 41)
+        self.assertEquals(self.client.read(4).data, 41)
+        self.assertEquals(self.commands(), 2)
+
+    def test_write_invalidate(self):
+        self.mirror.write_through = False
+        self.client.write(4, 41)
+        self.assertEquals(self.client.read(4).data, 41)
+        self.assertEquals(self.commands(), 2)
+
+    def test_write_error_mode(self):
+        self.client.read(4)
+        self.emulator.autonomous = True
+        self.emulator._start_time = 0
+        self.client.write(4, 41)
+        self.assertIsNone(self.mirror.lookup(4))
+
+    def test_invalidating_commands(self):
+        for command in (self.client.step, self.client.reset):
+            self.client.read(3)
+            self.client.read(100)
+            command()
+            self.assertEquals(self.mirror.pages, 0)
+            hits = self.mirror.hits
+            self.client.read(3)
+            self.assertEquals(self.mirror.hits, hits)
+
+    def test_start_pause(self):
+        self.client.read(3)
+        self.client.start()
+        self.assertEquals(self.client.read(3).opcode,
+                self.spec.opcode_res_read_error_mode)
+        self.client.pause()
+        self.client.read(3)
+        self.assertEquals(self.mirror.hits, 0)
+        self.assertEquals(self.client.read(3).data, 30)
+        self.assertEquals(self.mirror.hits, 1)
+
+    def test_pending(self):
+        self.client.read(3)
+        self.client.send(self.spec.value_type_message(
+            self.spec.opcode_cmd_step, 0))
+        self.assertIsNone(self.mirror.lookup(3))
+        self.client.receive()
+        self.client.read(3)
+        self.assertEquals(self.mirror.lookup(3), 30)
+
+    def test_event(self):
+        self.client.read(3)
+        self.mirror.received(self.client.status()._replace(
+            opcode=self.spec.opcode_res_event_manual))
+        self.assertIsNone(self.mirror.lookup(3))
+
+    def test_report(self):
+        self.client.read(3)
+        self.client.read(3)
+        self.assertEquals(self.mirror.report(), 'memory mirror: 1 hits, '
+                '1 misses (50.0% hit rate), 1 pages')
+
+    def test_mapped_file(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'mirror')
+        mirror = MemoryMirror(ControllerSpec(32, 16), path=path)
+        try:
+            mirror.fill(0xfffffffe, 0xabcd)
+            mirror.fill(7, 1)
+            self.assertEquals(mirror.lookup(0xfffffffe), 0xabcd)
+            self.assertEquals(mirror.lookup(7), 1)
+            self.assertIsNone(mirror.lookup(8))
+            self.assertEquals(mirror.pages, 2)
+            mirror.invalidate()
+            self.assertIsNone(mirror.lookup(7))
+        finally:
+            mirror.close()
+            os.remove(path)
+            os.rmdir(directory)
@@ -0,0 +1,178 @@
+import threading
+from unittest import TestCase, mock
+import serial
+from fpgaedu import (ControllerSpec, BoardEmulator, Client, MuxServer,
+        EmulatorTransport)
+
+_TIMEOUT = 0.2
+
+class MuxServerTestCase(TestCase):
+
+    def setUp(self):
+        self.spec = ControllerSpec(16, 8)
+        self.emulator = BoardEmulator(self.spec, memory={3: 30})
+        self.connections = []
+        self.serve()
+
+    def serve(self):
+        self.server = MuxServer(self.spec, EmulatorTransport(self.emulator),
+                timeout=_TIMEOUT)
+        self.address = self.server.open()
+        self.readonly_address = self.server.open(readonly=True)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                kwargs={'poll_interval': 0.01})
+        self.thread.daemon = True
+        self.thread.start()
+
+    def withhold(self, count=1, late=False):
+        '''
+        Makes the board withhold the responses to the next count writes to
+        it, and send them along with the response to the write after them
+        if late is set.
+        '''
+        process = self.emulator.process
+        writes = []
+        withheld = []
+
+        def withholding(data):
+            response = process(data)
+            writes.append(data)
+            if len(writes) <= count:
+                withheld.append(response)
+                return b''
+            if late and withheld:
+                response = b''.join(withheld) + response
+                del withheld[:]
+            return response
+
+        patch = mock.patch.object(self.emulator, 'process', withholding)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.close()
+        self.server.close()
+        self.thread.join()
+
+    def connect(self, readonly=False):
+        connection = serial.serial_for_url('socket://%s:%s' %
+                (self.readonly_address if readonly else self.address),
+                timeout=0.1)
+        self.connections.append(connection)
+        return Client(self.spec, connection)
+
+    def test_clients(self):
+        clients = [self.connect() for _ in range(4)]
+        for i, client in enumerate(clients):
+            self.assertEquals(client.write(0x10 + i, i).opcode,
+                    self.spec.opcode_res_write_success)
+        for i, client in enumerate(clients):
+            self.assertEquals(client.read(0x10 + i).data, i)
+        self.assertEquals(self.emulator.memory[0x13], 3)
+
+    def test_pipelined(self):
+        clients = [self.connect() for _ in range(3)]
+        messages = [[self.spec.addr_type_message(self.spec.opcode_cmd_write,
+            i * 0x100 + addr, addr) for addr in range(50)] for i in
+            range(len(clients))]
+        for client, client_messages in zip(clients, messages):
+            for message in client_messages:
+                client.send(message)
+        for i, client in enumerate(clients):
+            responses = [client.receive() for _ in range(50)]
+            self.assertEquals([res.addr for res in responses],
+                    [i * 0x100 + addr for addr in range(50)])
+
+    def test_events(self):
+        client, observer = self.connect(), self.connect(readonly=True)
+        events = []
+        observer.add_event_handler(events.append)
+        client.status()
+        observer.status()
+        client.start()
+        client.pause()
+        observer.status()
+        self.assertEquals([event.opcode for event in events],
+                [self.spec.opcode_res_event_autonomous,
+                    self.spec.opcode_res_event_manual])
+
+    def test_readonly(self):
+        client, observer = self.connect(), self.connect(readonly=True)
+        self.assertEquals(observer.read(3).data, 30)
+        forwarded = self.server.forwarded
+        self.assertEquals(observer.read(3).data, 30)
+        self.assertEquals(self.server.forwarded, forwarded)
+        self.assertEquals(self.server.cached, 1)
+
+        self.assertEquals(observer.write(3, 31).opcode,
+                self.spec.opcode_res_write_error_mode)
+        self.assertEquals(observer.step().opcode,
+                self.spec.opcode_res_step_error_mode)
+        self.assertEquals(self.emulator.memory[3], 30)
+
+        client.write(3, 32)
+        self.assertEquals(observer.read(3).data, 32)
+        client.step()
+        cached = self.server.cached
+        self.assertEquals(observer.read(3).data, 32)
+        self.assertEquals(self.server.cached, cached)
+        self.assertIn('2 clients', self.server.report())
+
+    def test_missing_response(self):
+        client = self.connect()
+        client.status()
+        self.withhold()
+        self.assertEquals(client.write(1, 1).opcode,
+                self.spec.opcode_res_write_error_mode)
+        # The window is freed, and the next response is not taken for the
+        # one that is missing
+        self.assertEquals(client.read(3).data, 30)
+        self.assertEquals(self.server.window.used, 0)
+        self.assertEquals(self.server.lost, 1)
+
+    def test_missing_response_without_error(self):
+        client, other = self.connect(), self.connect()
+        client.status()
+        self.withhold()
+        # The protocol has no error response to status, so that the
+        # connection is closed
+        with self.assertRaises(serial.SerialException):
+            client.status()
+        self.assertEquals(self.server.clients, 1)
+        self.assertEquals(other.read(3).data, 30)
+
+    def test_skipped_response(self):
+        client = self.connect()
+        client.status()
+        self.withhold()
+        for addr in (1, 2):
+            client.send(self.spec.addr_type_message(
+                self.spec.opcode_cmd_write, addr, addr))
+        # Answered before the timeout by the response to the next command
+        self.assertEquals([(res.opcode, res.addr) for res in
+            (client.receive(), client.receive())],
+            [(self.spec.opcode_res_write_error_mode, 1),
+                (self.spec.opcode_res_write_success, 2)])
+        self.assertEquals(self.server.window.used, 0)
+
+    def test_late_response(self):
+        client, other = self.connect(), self.connect()
+        client.status()
+        self.withhold(late=True)
+        self.assertEquals(client.write(1, 1).opcode,
+                self.spec.opcode_res_write_error_mode)
+        self.assertEquals(other.read(3).data, 30)
+        self.assertEquals(self.server.dropped, 1)
+        self.assertEquals(client.read(1).data, 1)
+
+    def test_late_credits(self):
+        self.server.close()
+        self.thread.join()
+        self.withhold(late=True)
+        self.serve()
+        client = self.connect()
+        self.assertEquals(client.read(3).data, 30)
+        self.assertEquals(self.server.window.credits,
+                self.emulator.rx_fifo_depth)
+        self.assertEquals(self.server.dropped, 1)
@@ -0,0 +1,99 @@
+import threading
+from unittest import TestCase, mock
+from fpgaedu import (ControllerSpec, BoardEmulator, EmulatorTransport, Board,
+        Scheduler, ResponseTimeoutError)
+
+class SchedulerTestCase(TestCase):
+
+    def setUp(self):
+        self.spec = ControllerSpec(16, 8)
+        self.emulators = [BoardEmulator(self.spec) for _ in range(3)]
+        self.connections = [EmulatorTransport(emulator) for emulator in
+                self.emulators]
+        self.boards = [Board(self.spec, 'board%d' % i, connection,
+            timeout=0.05) for i, connection in enumerate(self.connections)]
+        self.scheduler = Scheduler(self.boards)
+
+    def test_run(self):
+        barrier = threading.Barrier(3)
+
+        def job(client):
+            # Returns only once every board runs a job
+            barrier.wait(timeout=5)
+            client.write(1, 42)
+            return client.read(1).data
+
+        jobs = [self.scheduler.submit(job) for _ in range(6)]
+        self.assertEquals(self.scheduler.run(), jobs)
+        self.assertEquals([job.result for job in jobs], [42] * 6)
+        self.assertEquals([board.jobs for board in self.boards], [2, 2, 2])
+        self.assertEquals(jobs[0].name, 'job')
+        self.assertIn('board0: 2 jobs, 0 failed', self.scheduler.report())
+
+    def test_reset(self):
+        def job(client):
+            value = client.read(1).data
+            client.write(1, 42)
+            return value
+
+        jobs = [self.scheduler.submit(job) for _ in range(6)]
+        self.scheduler.run()
+        self.assertEquals([job.result for job in jobs], [0] * 6)
+
+    def silence(self, emulator):
+        patcher = mock.patch.object(emulator, 'process', return_value=b'')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_left_over_state(self):
+        scheduler = Scheduler(self.boards[:1])
+
+        def leave_unread(client):
+            client.batch().write(1, 41)
+            client.send(self.spec.addr_type_message(
+                self.spec.opcode_cmd_write, 2, 42))
+
+        def read(client):
+            return [(res.opcode, res.addr, res.data) for res in
+                    [client.read(2), client.read(1)]]
+
+        scheduler.submit(leave_unread)
+        job = scheduler.submit(read)
+        scheduler.run()
+        self.assertIsNone(job.error)
+        self.assertEquals(job.result, [(self.spec.opcode_res_read_success,
+            addr, 0) for addr in [2, 1]])
+
+    def test_error(self):
+        def job(client):
+            raise KeyError()
+
+        job = self.scheduler.submit(job, name='failing')
+        self.scheduler.run()
+        self.assertIsInstance(job.error, KeyError)
+        self.assertEquals(job.attempts, 1)
+        self.assertFalse(job.board.retired)
+
+    def test_retire(self):
+        self.silence(self.emulators[0])
+        jobs = [self.scheduler.submit(lambda client: client.status().value)
+                for _ in range(6)]
+        self.scheduler.run()
+        self.assertTrue(self.boards[0].retired)
+        self.assertEquals([job.error for job in jobs], [None] * 6)
+        self.assertIn('(retired)', self.scheduler.report())
+
+    def test_no_boards_left(self):
+        for emulator in self.emulators:
+            self.silence(emulator)
+        job = self.scheduler.submit(lambda client: None)
+        self.scheduler.run()
+        self.assertIsInstance(job.error, ResponseTimeoutError)
+        self.assertEquals(job.attempts, 2)
+
+    def test_close(self):
+        for connection in self.connections:
+            connection.close = mock.Mock()
+        self.scheduler.close()
+        for connection in self.connections:
+            connection.close.assert_called_once_with()
@@ -0,0 +1,100 @@
+import threading
+from unittest import TestCase, mock
+from fpgaedu import (ControllerSpec, BoardEmulator, Client, MuxServer,
+        Transport, EmulatorTransport, SerialTransport, SocketTransport,
+        open_transport, encode_frame)
+
+class TransportTestCase(TestCase):
+    '''
+    Runs the same client code over every transport.
+    '''
+
+    def setUp(self):
+        self.spec = ControllerSpec(16, 8)
+        self.emulator = BoardEmulator(self.spec, memory={3: 30})
+        self.closers = []
+
+    def tearDown(self):
+        for close in reversed(self.closers):
+            close()
+
+    def check_client(self, transport):
+        self.closers.append(transport.close)
+        client = Client(self.spec, transport, timeout=1)
+        self.assertEquals(client.sync_credits(), self.emulator.rx_fifo_depth)
+        messages = [self.spec.addr_type_message(self.spec.opcode_cmd_write,
+            addr, addr) for addr in range(0x10, 0x40)]
+        responses = client.transact(messages)
+        self.assertEquals([res.data for res in responses],
+                list(range(0x10, 0x40)))
+        self.assertEquals(client.read(3).data, 30)
+        self.assertEquals(transport.in_waiting, 0)
+
+    def test_emulator(self):
+        transport = EmulatorTransport(self.emulator)
+        self.check_client(transport)
+        self.assertEquals(self.emulator.memory[0x20], 0x20)
+
+    def test_reset_input_buffer(self):
+        transport = EmulatorTransport(self.emulator)
+        transport.write(encode_frame(self.spec, self.spec.value_type_message(
+            self.spec.opcode_cmd_status, 0)))
+        self.assertTrue(transport.in_waiting > 0)
+        transport.reset_input_buffer()
+        self.assertEquals(transport.in_waiting, 0)
+        self.assertIsNone(transport.baudrate)
+
+    def test_serial(self):
+        path = self.emulator.open()
+        thread = threading.Thread(target=self.emulator.serve_forever,
+                kwargs={'poll_interval': 0.05})
+        thread.daemon = True
+        thread.start()
+        self.closers.extend([thread.join, self.emulator.close])
+        self.check_client(SerialTransport(path))
+
+    def serve(self):
+        server = MuxServer(self.spec, EmulatorTransport(self.emulator))
+        address = server.open()
+        thread = threading.Thread(target=server.serve_forever,
+                kwargs={'poll_interval': 0.01})
+        thread.daemon = True
+        thread.start()
+        self.closers.extend([thread.join, server.close])
+        return address
+
+    def test_socket(self):
+        self.check_client(SocketTransport(*self.serve()))
+
+    def test_socket_without_fcntl(self):
+        # As on Windows, where the bytes waiting are peeked at instead
+        with mock.patch('fpgaedu._transport.fcntl', None):
+            self.check_client(SocketTransport(*self.serve()))
+
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            Transport()
+
+    def test_serial_url(self):
+        self.check_client(SerialTransport('socket://%s:%s' % self.serve()))
+
+    def test_readinto(self):
+        transport = EmulatorTransport(self.emulator)
+        transport.write(b'\x12\x60\x00\x00\x00\x13')
+        self.assertEquals(transport.in_waiting, 6)
+        buffer = bytearray(4)
+        self.assertEquals(transport.readinto(memoryview(buffer)[1:]), 3)
+        self.assertEquals(buffer[1], 0x12)
+        self.assertEquals(transport.read(10)[-1], 0x13)
+        self.assertEquals(transport.read(10), b'')
+
+    def test_open_transport(self):
+        self.assertIsInstance(open_transport('emulator://', self.spec),
+                EmulatorTransport)
+        transport = open_transport('tcp://%s:%s' % self.serve())
+        self.closers.append(transport.close)
+        self.assertIsInstance(transport, SocketTransport)
+        with self.assertRaises(ValueError):
+            open_transport('emulator://')
+        with self.assertRaises(ValueError):
+            open_transport('tcp://localhost')
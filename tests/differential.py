@@ -0,0 +1,339 @@
+'''
+Differential testing of the hdl modules against Python reference models.
+
+Constrained random input streams are fed to a myhdl module and to its
+reference model, and their outputs are compared:
+
+controller
+    The Controller against ControllerModel, comparing all outputs in every
+    clock cycle. The streams hold bursts of commands, periods of
+    back-pressure on tx_ready, breaks and resets.
+receiver
+    The MessageReceiver against the host's FrameDecoder, comparing the
+    received messages. The byte streams hold frames with escaped control
+    characters, corrupted and truncated frames, stalls on the receive fifo
+    and resets in the middle of frames.
+
+A stream is a list of the module inputs in every clock cycle. Failing
+streams are shrunk by removing cycles for as long as the outputs keep
+differing. Many seeds can be run in parallel processes:
+
+    python tests/differential.py -n 200 -j 4
+'''
+
+import argparse, multiprocessing, random, sys
+from collections import deque, OrderedDict
+
+from myhdl import (Signal, ResetSignal, intbv, always, instance, Simulation,
+        StopSimulation)
+
+from fpgaedu import ControllerSpec, ControllerModel, FrameDecoder, encode_frame
+from fpgaedu.hdl import ClockGen, Controller, MessageReceiver
+
+_HALF_PERIOD = 5
+
+def _runs(rand, probability, mean_length):
+    '''
+    Returns an endless iterator over booleans that are True in runs with the
+    given mean length, covering about the given fraction of the stream
+    '''
+    while True:
+        value = rand.random() < probability
+        for _ in range(1 + int(rand.expovariate(1.0 / mean_length))):
+            yield value
+
+def generate_controller(spec, rand, cycles):
+    '''
+    Returns a random input stream for the controller
+    '''
+    rx_ready = _runs(rand, 0.6, 4)
+    tx_ready = _runs(rand, 0.7, 8)
+    control_chars = [spec.chr_start, spec.chr_stop, spec.chr_esc]
+    mode_commands = [spec.opcode_cmd_start, spec.opcode_cmd_pause,
+            spec.opcode_cmd_step]
+    stream = []
+    for _ in range(cycles):
+        if rand.random() < 0.2:
+            opcode = rand.choice(mode_commands)
+        else:
+            opcode = rand.randrange(2**spec.width_opcode)
+        addr = rand.choice([rand.randrange(spec.num_stats + 4),
+            rand.randrange(2**spec.width_addr)])
+        data = rand.choice(control_chars + [rand.randrange(2**spec.width_data)])
+        stream.append(dict(
+            rx_msg=spec.addr_type_message(opcode, addr, data),
+            rx_ready=next(rx_ready),
+            tx_ready=next(tx_ready),
+            exp_break=rand.random() < 0.02,
+            stat_events=rand.randrange(2**spec.num_stats),
+            rx_free=rand.randrange(2**spec.width_value),
+            reset=rand.random() < 0.005))
+    return stream
+
+def run_controller(spec, stream, exp_reset_active=False):
+    '''
+    Runs the Controller and ControllerModel on stream and returns a
+    description of the first difference of their outputs, or None.
+    '''
+    clk = Signal(False)
+    reset = ResetSignal(True, active=False, isasync=False)
+    rx_msg = Signal(intbv(0)[spec.width_message:0])
+    rx_ready = Signal(False)
+    tx_ready = Signal(True)
+    exp_data_read = Signal(intbv(0)[spec.width_data:0])
+    exp_break = Signal(False)
+    stat_events = Signal(intbv(0)[spec.num_stats:0])
+    rx_free = Signal(intbv(0)[spec.width_value:0])
+    outputs = OrderedDict([
+        ('rx_next', Signal(False)),
+        ('tx_msg', Signal(intbv(0)[spec.width_message:0])),
+        ('tx_next', Signal(False)),
+        ('exp_addr', Signal(intbv(0)[spec.width_addr:0])),
+        ('exp_data_write', Signal(intbv(0)[spec.width_data:0])),
+        ('exp_wen', Signal(False)),
+        ('exp_reset', ResetSignal(not exp_reset_active,
+            active=exp_reset_active, isasync=False)),
+        ('exp_clk_en', Signal(False))])
+    inputs = dict(rx_msg=rx_msg, rx_ready=rx_ready, tx_ready=tx_ready,
+            exp_break=exp_break, stat_events=stat_events, rx_free=rx_free)
+
+    controller = Controller(spec=spec, clk=clk, reset=reset, rx_msg=rx_msg,
+            rx_next=outputs['rx_next'], rx_ready=rx_ready,
+            tx_msg=outputs['tx_msg'], tx_next=outputs['tx_next'],
+            tx_ready=tx_ready, exp_addr=outputs['exp_addr'],
+            exp_data_write=outputs['exp_data_write'],
+            exp_data_read=exp_data_read, exp_wen=outputs['exp_wen'],
+            exp_reset=outputs['exp_reset'],
+            exp_clk_en=outputs['exp_clk_en'],
+            exp_reset_active=exp_reset_active, stat_events=stat_events,
+            rx_free=rx_free, exp_break=exp_break)
+    model = ControllerModel(spec, exp_reset_active=exp_reset_active)
+    memory = {}
+    result = []
+
+    @always(clk.posedge)
+    def experiment():
+        if outputs['exp_wen']:
+            memory[int(outputs['exp_addr'].val)] = int(
+                    outputs['exp_data_write'].val)
+        exp_data_read.next = memory.get(int(outputs['exp_addr'].val), 0)
+
+    @instance
+    def stimulus():
+        # The model's clock periods include a falling edge
+        yield clk.posedge
+        for cycle, values in enumerate(stream):
+            for name, value in values.items():
+                if name == 'reset':
+                    reset.next = reset.active if value else not reset.active
+                else:
+                    inputs[name].next = value
+                setattr(model, name, value)
+            yield clk.posedge
+            model.exp_data_read = int(exp_data_read.val)
+            model.tick()
+            for name, signal in outputs.items():
+                if int(signal.val) != int(getattr(model, name)):
+                    result.append('cycle %d: %s is %#x, model %#x' % (cycle,
+                        name, int(signal.val), int(getattr(model, name))))
+                    raise StopSimulation()
+        raise StopSimulation()
+
+    sim = Simulation(ClockGen(clk, _HALF_PERIOD), controller, experiment,
+            stimulus)
+    sim.run(quiet=True)
+    return result[0] if result else None
+
+def generate_receiver(spec, rand, cycles):
+    '''
+    Returns a random input stream for the message receiver: the byte
+    arriving in the receive fifo, if any, whether the next message is
+    taken and whether the receiver is reset, in every cycle
+    '''
+    control_chars = [spec.chr_start, spec.chr_stop, spec.chr_esc]
+    data = bytearray()
+    while len(data) < cycles:
+        message = 0
+        for _ in range(spec.width_message_bytes):
+            message = (message << 8) | rand.choice(control_chars +
+                    [rand.randrange(256)])
+        frame = bytearray(encode_frame(spec, message))
+        choice = rand.random()
+        if choice < 0.1:
+            # Truncated
+            frame = frame[:rand.randrange(len(frame))]
+        elif choice < 0.2:
+            # A corrupted byte
+            frame[rand.randrange(len(frame))] = rand.choice(control_chars +
+                    [rand.randrange(256)])
+        elif choice < 0.25:
+            # Noise between frames
+            frame = bytearray(rand.randrange(256) for _ in range(3)) + frame
+        data.extend(frame)
+
+    arrive = _runs(rand, 0.7, 10)
+    receive_next = _runs(rand, 0.7, 6)
+    data = iter(data)
+    stream = []
+    for _ in range(cycles):
+        stream.append(dict(
+            byte=next(data) if next(arrive) else None,
+            receive_next=next(receive_next),
+            reset=rand.random() < 0.003))
+    return stream
+
+def run_receiver(spec, stream):
+    '''
+    Runs the MessageReceiver on stream and returns a description of the
+    first difference between its messages and those of a FrameDecoder
+    receiving the same bytes, or None. A reset restarts the decoder, and
+    may drop a message that was received but not taken.
+    '''
+    clk = Signal(False)
+    reset = ResetSignal(True, active=False, isasync=False)
+    fifo_data = Signal(intbv(0)[8:0])
+    fifo_empty = Signal(True)
+    fifo_dequeue = Signal(False)
+    message = Signal(intbv(0)[spec.width_message:0])
+    message_ready = Signal(False)
+    receive_next = Signal(False)
+    receiver = MessageReceiver(spec, clk, reset, fifo_data, fifo_empty,
+            fifo_dequeue, message, message_ready, receive_next)
+    result = []
+
+    @instance
+    def stimulus():
+        fifo = deque()
+        # Bytes dequeued and messages taken since the last reset
+        segment = bytearray()
+        received = []
+
+        def compare(cycle, dropped):
+            # The receiver keeps only the message bits of the frame bytes
+            expected = [m & (2**spec.width_message - 1) for m in
+                    FrameDecoder(spec).feed(segment)]
+            if dropped:
+                expected = expected[:-1]
+            if received != expected:
+                result.append('cycle %d: received %s, decoded %s' % (cycle,
+                    [hex(m) for m in received], [hex(m) for m in expected]))
+                return True
+            return False
+
+        # Take the remaining messages after the stream
+        drain = dict(byte=None, receive_next=True, reset=False)
+        for cycle, values in enumerate(stream + [drain] * (len(stream) + 4)):
+            if values['byte'] is not None:
+                fifo.append(values['byte'])
+            # Like the fifo, the data keeps its last value when empty
+            if fifo:
+                fifo_data.next = fifo[0]
+            fifo_empty.next = not fifo
+            receive_next.next = values['receive_next']
+            reset.next = reset.active if values['reset'] else (
+                    not reset.active)
+            yield clk.posedge
+            if values['reset']:
+                if compare(cycle, bool(message_ready)):
+                    raise StopSimulation()
+                del segment[:]
+                del received[:]
+                continue
+            if message_ready and receive_next:
+                received.append(int(message.val))
+            if fifo_dequeue and fifo:
+                segment.append(fifo.popleft())
+        compare(cycle, False)
+        raise StopSimulation()
+
+    sim = Simulation(ClockGen(clk, _HALF_PERIOD), receiver, stimulus)
+    sim.run(quiet=True)
+    return result[0] if result else None
+
+TARGETS = OrderedDict([
+    ('controller', (generate_controller, run_controller)),
+    ('receiver', (generate_receiver, run_receiver)),
+])
+
+def shrink(stream, fails):
+    '''
+    Returns a shortest sublist of stream found for which fails still
+    returns True, by removing ever smaller chunks of cycles.
+    '''
+    chunk = len(stream) // 2
+    while chunk >= 1:
+        start = 0
+        while start < len(stream):
+            candidate = stream[:start] + stream[start + chunk:]
+            if candidate and fails(candidate):
+                stream = candidate
+            else:
+                start += chunk
+        chunk //= 2
+    return stream
+
+def run_seed(target, seed, cycles=500, spec=None):
+    '''
+    Runs target on the stream generated from seed, returning None when the
+    module and the reference model agree, or a (seed, description, stream)
+    tuple with the shrunk failing stream.
+    '''
+    spec = spec or ControllerSpec(32, 8)
+    generate, run = TARGETS[target]
+    stream = generate(spec, random.Random(seed), cycles)
+    if run(spec, stream) is None:
+        return None
+    stream = shrink(stream, lambda s: run(spec, s) is not None)
+    return seed, run(spec, stream), stream
+
+def _run_seed(args):
+    return run_seed(*args)
+
+def run_seeds(target, seeds, cycles=500, processes=None):
+    '''
+    Runs target for every seed in parallel processes and returns the list
+    of failures
+    '''
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.map(_run_seed, [(target, seed, cycles)
+            for seed in seeds])
+    finally:
+        pool.close()
+        pool.join()
+    return [result for result in results if result is not None]
+
+def _parse_args():
+    '''
+    Parses the command line arguments.
+    '''
+    parser = argparse.ArgumentParser(description='Compares the hdl modules \
+            with their reference models on random input streams.')
+    parser.add_argument('-t', '--targets', nargs='+', default=None,
+            choices=list(TARGETS), help='The modules to test.')
+    parser.add_argument('-n', '--seeds', type=int, default=100,
+            help='The number of random streams per module.')
+    parser.add_argument('-s', '--firstSeed', type=int, default=0)
+    parser.add_argument('-c', '--cycles', type=int, default=500,
+            help='The number of clock cycles per stream.')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+            help='The number of processes. Defaults to the number of cpus.')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = _parse_args()
+
+    failed = False
+    for target in args.targets or TARGETS:
+        seeds = range(args.firstSeed, args.firstSeed + args.seeds)
+        failures = run_seeds(target, seeds, args.cycles, args.processes)
+        sys.stdout.write('%s: %d of %d streams failed\n' % (target,
+            len(failures), args.seeds))
+        for seed, description, stream in failures:
+            failed = True
+            sys.stdout.write('  seed %d, shrunk to %d cycles: %s\n' % (seed,
+                len(stream), description))
+            for values in stream:
+                sys.stdout.write('    %r\n' % (values,))
+    sys.exit(1 if failed else 0)
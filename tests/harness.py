@@ -0,0 +1,88 @@
+'''
+Shared elaboration of the designs under test.
+
+Elaborating a design parses the source of every myhdl instance, which can
+take longer than the short simulation of a test. A HarnessTestCase
+elaborates its design once per test case class and parameter set, and
+runs every test in a new simulation of the same instances.
+
+Between simulations, myhdl restores all signals to their initial values,
+and the harness restarts the generators of the instances. Every test then
+begins with the design held in reset for RESET_CYCLES clock cycles. State
+that is not kept in signals, such as a dict modelling a memory, survives
+between tests, so the instances that keep it must restore it while the
+reset is active.
+'''
+
+from unittest import TestCase
+
+from myhdl import Simulation
+
+# Attributes set by elaborate, by test case class and parameters
+_designs = {}
+
+def _flatten(instances):
+    if isinstance(instances, (list, tuple)):
+        return [inst for item in instances for inst in _flatten(item)]
+    return [instances]
+
+class HarnessTestCase(TestCase):
+    '''
+    TestCase that shares the elaboration of its design between its tests.
+
+    Subclasses implement elaborate, which sets the signals of the design,
+    including clk and reset, as attributes of the test case and returns
+    the instances of the design. setUp shares the design elaborated
+    without parameters; subclasses with parameters call share from their
+    own setUp.
+    '''
+
+    RESET_CYCLES = 2
+
+    def setUp(self):
+        self.share()
+
+    def elaborate(self, *parameters):
+        raise NotImplementedError()
+
+    def share(self, *parameters):
+        '''
+        Sets the attributes of the design elaborated with parameters,
+        elaborating it on first use.
+        '''
+        key = (type(self), parameters)
+        if key not in _designs:
+            before = dict(self.__dict__)
+            design = self.elaborate(*parameters)
+            attributes = dict((name, value) for name, value in
+                    self.__dict__.items() if before.get(name) is not value)
+            attributes['design'] = _flatten(design)
+            _designs[key] = attributes
+        self.__dict__.update(_designs[key])
+
+    def _after_reset(self, gen, drive):
+        # Only one of the test generators drives the reset
+        if drive:
+            self.reset.next = self.reset.active
+        for _ in range(self.RESET_CYCLES):
+            yield self.clk.negedge
+        if drive:
+            self.reset.next = not self.reset.active
+        yield gen
+
+    def simulate(self, test_logic, duration=None):
+        '''
+        Holds the design in reset and then runs test_logic, a myhdl
+        instance or a list of them, for duration or until the simulation
+        is stopped.
+        '''
+        for inst in self.design:
+            inst.gen = inst.genfunc()
+        tests = [self._after_reset(inst.gen, i == 0) for i, inst in
+                enumerate(_flatten(test_logic))]
+        sim = Simulation(self.design, tests)
+        try:
+            sim.run(duration, quiet=False)
+        finally:
+            # A simulation that ran for duration is still alive
+            sim.quit()
@@ -0,0 +1,260 @@
+from myhdl import (Signal, ResetSignal, intbv, always, instance, Simulation,
+        StopSimulation, delay, now)
+from unittest import TestCase
+
+from fpgaedu import ControllerSpec, CreditWindow, FrameDecoder, encode_frame
+from fpgaedu import decode_response
+from fpgaedu.hdl import (ClockGen, uart_transitions, UartStimulus,
+        UartMonitor, uart_decode)
+from fpgaedu.hdl.nexys4 import BoardComponent
+
+def MockExperimentSetup(clk, exp_addr, exp_din, exp_dout, exp_wen):
+
+    memory = {}
+
+    @always(clk.posedge)
+    def logic():
+        if exp_wen:
+            memory[int(exp_addr.val)] = int(exp_din.val)
+        exp_dout.next = memory.get(int(exp_addr.val), 0)
+
+    return logic
+
+class BoardComponentTestCase(TestCase):
+
+    HALF_PERIOD = 5
+    # Clock cycles per bit. The reduced ratio keeps the simulation short.
+    BAUD_DIV = 16
+    RX_FIFO_DEPTH = 16
+    # A shallow transmit fifo makes the transmit path push back on the
+    # controller, so that a flood of commands fills up the receive fifo
+    TX_FIFO_DEPTH = 2
+    LVL_START = False
+    LVL_STOP = True
+    LVL_IDLE = True
+
+    def setUp(self):
+        self.build(self.BAUD_DIV)
+
+    def build(self, baud_div):
+        self.spec = ControllerSpec(width_addr=32, width_data=8)
+        self.bit_time = 2 * self.HALF_PERIOD * baud_div
+
+        self.clk = Signal(False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
+        self.rx = Signal(self.LVL_IDLE)
+        self.tx = Signal(self.LVL_IDLE)
+        self.exp_addr = Signal(intbv(0)[self.spec.width_addr:0])
+        self.exp_data_write = Signal(intbv(0)[self.spec.width_data:0])
+        self.exp_data_read = Signal(intbv(0)[self.spec.width_data:0])
+        self.exp_wen = Signal(False)
+        self.exp_reset = Signal(False)
+        self.exp_clk = Signal(False)
+        self.exp_clk_en = Signal(False)
+
+        self.clockgen = ClockGen(self.clk, self.HALF_PERIOD)
+        self.board_component = BoardComponent(spec=self.spec, clk=self.clk,
+                reset=self.reset, rx=self.rx, tx=self.tx,
+                exp_addr=self.exp_addr, exp_data_write=self.exp_data_write,
+                exp_data_read=self.exp_data_read, exp_wen=self.exp_wen,
+                exp_reset=self.exp_reset, exp_clk=self.exp_clk,
+                exp_clk_en=self.exp_clk_en,
+                baud_div=baud_div,
+                rx_fifo_depth=self.RX_FIFO_DEPTH, 
+                tx_fifo_depth=self.TX_FIFO_DEPTH)
+        self.mock_experiment = MockExperimentSetup(self.clk, self.exp_addr,
+                self.exp_data_write, self.exp_data_read, self.exp_wen)
+
+        self.tx_transitions = []
+        self.tx_monitor = UartMonitor(self.tx, self.tx_transitions)
+        self.tx_resume = 0
+        self.decoder = FrameDecoder(self.spec)
+        self.responses = []
+        # Released for every response received, if set
+        self.window = None
+
+    def simulate(self, test_logic, duration=None):
+        sim = Simulation(self.clockgen, self.board_component,
+                self.mock_experiment, self.tx_monitor, *test_logic)
+        sim.run(duration, quiet=False)
+
+    def stop_simulation(self):
+        raise StopSimulation()
+
+    def uart_write(self, data):
+        # Jumps from one transition of the line to the next
+        time = 0
+        for next_time, level in uart_transitions(data, self.bit_time):
+            if next_time > time:
+                yield delay(next_time - time)
+                time = next_time
+            self.rx.next = level
+
+    def receive(self):
+        '''
+        Decodes the responses of which the tx line has been recorded
+        '''
+        data, self.tx_resume = uart_decode(self.tx_transitions,
+                self.bit_time, start=self.tx_resume, end=now())
+        for message in self.decoder.feed(data):
+            self.responses.append(decode_response(self.spec, message))
+            if self.window is not None:
+                self.window.release()
+
+    def reset_sequence(self):
+        self.reset.next = self.reset.active
+        yield delay(10 * self.bit_time)
+        self.reset.next = not self.reset.active
+        yield delay(10 * self.bit_time)
+
+    def wait_responses(self, count, timeout):
+        for _ in range(timeout):
+            self.receive()
+            if len(self.responses) >= count:
+                break
+            yield delay(self.bit_time)
+
+    def flood_messages(self, count):
+        messages = []
+        for i in range(count):
+            # data values include the control characters, to make sure that
+            # escaped frames are paced correctly
+            data = [self.spec.chr_start, self.spec.chr_esc, 
+                    self.spec.chr_stop, i][i % 4]
+            messages.append(self.spec.addr_type_message(
+                self.spec.opcode_cmd_write, i, data))
+            messages.append(self.spec.addr_type_message(
+                self.spec.opcode_cmd_read, i, 0))
+        return messages
+
+    def test_credit(self):
+
+        @instance
+        def test():
+            yield self.reset_sequence()
+            yield self.uart_write(encode_frame(self.spec, 
+                    self.spec.value_type_message(
+                        self.spec.opcode_cmd_credit, 0)))
+            yield self.wait_responses(1, 1000)
+            self.assertEquals(self.responses[0].opcode, 
+                    self.spec.opcode_res_credit)
+            self.assertEquals(self.responses[0].value, self.RX_FIFO_DEPTH)
+
+            self.stop_simulation()
+
+        self.simulate([test])
+
+    def test_flood_paced(self):
+        messages = self.flood_messages(10)
+        window = CreditWindow(self.RX_FIFO_DEPTH)
+        self.window = window
+
+        @instance
+        def test():
+            yield self.reset_sequence()
+            for message in messages:
+                frame = encode_frame(self.spec, message)
+                while not window.can_send(len(frame)):
+                    yield delay(self.bit_time)
+                    self.receive()
+                window.sent(len(frame))
+                yield self.uart_write(frame)
+            yield self.wait_responses(len(messages), 1000)
+
+            self.assertEquals(len(self.responses), len(messages))
+            for i, res in enumerate(self.responses):
+                cmd_opcode = self.spec.parse_opcode(messages[i])
+                addr = self.spec.parse_addr(messages[i])
+                if cmd_opcode == self.spec.opcode_cmd_write:
+                    self.assertEquals(res.opcode, 
+                            self.spec.opcode_res_write_success)
+                    self.assertEquals(res.data, 
+                            self.spec.parse_data(messages[i]))
+                else:
+                    self.assertEquals(res.opcode, 
+                            self.spec.opcode_res_read_success)
+                    self.assertEquals(res.data, self.responses[i-1].data)
+                self.assertEquals(res.addr, addr)
+
+            # No bytes may have been dropped by the receive fifo
+            frame = encode_frame(self.spec, self.spec.addr_type_message(
+                self.spec.opcode_cmd_stat, self.spec.stat_rx_overflows, 0))
+            window.sent(len(frame))
+            yield self.uart_write(frame)
+            yield self.wait_responses(len(messages) + 1, 1000)
+            self.assertEquals(self.responses[-1].opcode, 
+                    self.spec.opcode_res_stat)
+            self.assertEquals(self.responses[-1].value, 0)
+
+            self.stop_simulation()
+
+        self.simulate([test])
+
+    def test_flood_unpaced(self):
+        '''
+        Check that the flood used in test_flood_paced does overflow the
+        receive fifo without flow control.
+        '''
+        messages = self.flood_messages(10)
+        # The frames follow each other without a pause, from the end of the
+        # reset sequence
+        idle_bits = 20
+        transitions = uart_transitions(b''.join(encode_frame(self.spec,
+            message) for message in messages), self.bit_time)
+        transitions = [(time + idle_bits * self.bit_time, level) for time,
+                level in transitions]
+
+        @instance
+        def test():
+            yield self.reset_sequence()
+            yield delay(transitions[-1][0] - idle_bits * self.bit_time)
+            yield self.wait_responses(len(messages), 1000)
+
+            self.assertTrue(len(self.responses) < len(messages))
+
+            self.stop_simulation()
+
+        self.simulate([test, UartStimulus(self.rx, transitions)])
+
+    def test_baud_div_equivalence(self):
+        '''
+        Check that the board responds identically for different baud_div
+        ratios, apart from cycle counts of autonomous runs.
+        '''
+        spec = self.spec
+        messages = self.flood_messages(2) + [
+                spec.value_type_message(spec.opcode_cmd_step, 0),
+                spec.value_type_message(spec.opcode_cmd_status, 0),
+                spec.value_type_message(spec.opcode_cmd_start, 0),
+                spec.addr_type_message(spec.opcode_cmd_read, 0, 0),
+                spec.value_type_message(spec.opcode_cmd_pause, 0),
+                spec.value_type_message(spec.opcode_cmd_credit, 0)] + [
+                spec.addr_type_message(spec.opcode_cmd_stat, index, 0)
+                for index in (spec.stat_rx_bytes, spec.stat_rx_messages,
+                    spec.stat_tx_bytes, spec.stat_commands)]
+        timed = (spec.opcode_res_start_success, spec.opcode_res_pause_success,
+                spec.opcode_res_event_manual, spec.opcode_res_event_autonomous)
+        traces = []
+
+        for baud_div in (self.BAUD_DIV, 3 * self.BAUD_DIV // 2 + 1):
+            self.build(baud_div)
+
+            @instance
+            def test():
+                yield self.reset_sequence()
+                expected = 0
+                for message in messages:
+                    yield self.uart_write(encode_frame(spec, message))
+                    opcode = spec.parse_opcode(message)
+                    # start and pause are followed by an event
+                    expected += 2 if opcode in (spec.opcode_cmd_start, 
+                            spec.opcode_cmd_pause) else 1
+                    yield self.wait_responses(expected, 1000)
+                self.stop_simulation()
+
+            self.simulate([test])
+            traces.append([res._replace(addr=None, data=None, value=None)
+                if res.opcode in timed else res for res in self.responses])
+
+        self.assertEquals(len(traces[0]), len(messages) + 2)
+        self.assertEquals(traces[0], traces[1])
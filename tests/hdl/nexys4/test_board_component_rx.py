@@ -1,27 +1,26 @@
 from unittest import TestCase
 from myhdl import (Signal, intbv, ResetSignal, instance, delay, Simulation,
-        StopSimulation, now, bin)
+        StopSimulation)
 
 from fpgaedu import ControllerSpec
-from fpgaedu.hdl import ClockGen
+from fpgaedu.hdl import ClockGen, uart_transitions, UartStimulus
 from fpgaedu.hdl.nexys4 import BoardComponentRx
 
 class BoardComponentRxTestCase(TestCase):
 
     HALF_PERIOD = 5
+    PERIOD = 2 * HALF_PERIOD
     UART_RX_BAUD_DIV = 8
-    LVL_HIGH = True
-    LVL_LOW = False
-    LVL_START = LVL_LOW
-    LVL_STOP = LVL_HIGH
-    LVL_IDLE = LVL_HIGH
+    # Number of clock cycles per uart_rx_baud_tick
+    TICK_CYCLES = 7
+    BIT_TIME = UART_RX_BAUD_DIV * TICK_CYCLES * PERIOD
 
     def setUp(self):
         self.spec = ControllerSpec(width_addr=32, width_data=8)
         # Input signals
         self.clk = Signal(False)
-        self.reset = ResetSignal(True, active=False, async=False)
-        self.rx = Signal(False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
+        self.rx = Signal(True)
         self.rx_next = Signal(False)
         self.uart_rx_baud_tick = Signal(False)
         # Output signals
@@ -37,76 +36,35 @@ class BoardComponentRxTestCase(TestCase):
 
     def simulate(self, test_logic, duration=None):
         sim = Simulation(self.clockgen, self.component_rx, *test_logic)
-        sim.run(duration, quiet=False)
+        sim.run(duration, quiet=True)
+        sim.quit()
 
     def stop_simulation(self):
         raise StopSimulation()
 
     def test_rx(self):
 
-        
+        data = bytearray([0x1, self.spec.chr_start] +
+                [0xFF] * self.spec.width_message_bytes + [self.spec.chr_stop])
+        transitions = uart_transitions(data, self.BIT_TIME, idle_bits=1)
 
         @instance
         def monitor():
             yield self.rx_ready.posedge, delay(500000)
             yield delay(1)
-            print(now())
             self.assertEquals(self.rx_msg, 0x0FFFFFFFFFFF)
             self.assertTrue(self.rx_ready)
             self.stop_simulation()
 
         @instance
-        def stimulant():
+        def baud_ticks():
+            # Change the tick on falling clock edges
             yield self.clk.negedge
-
-            self.rx.next = self.LVL_IDLE
-            self.reset.next = not self.reset.active
-            self.rx_next.next = False
-            self.uart_rx_baud_tick.next = False
-            yield self.clk.negedge
-            
-            def baud_ticks(n_ticks):
-                for _ in range(n_ticks):
-                    for _ in range(5):
-                        yield self.clk.negedge
-                    self.uart_rx_baud_tick.next = True
-                    yield self.clk.negedge
-                    self.uart_rx_baud_tick.next = False
-                    yield self.clk.negedge
-
-            def transmit(char):
-
-                yield baud_ticks(self.UART_RX_BAUD_DIV)
-                self.rx.next = self.LVL_START
-                yield baud_ticks(self.UART_RX_BAUD_DIV)
-
-                indexes = range(8)[::-1]
-                for i in indexes:
-                    lvl = bin(char, width=8)[i] == '1'
-                    self.rx.next = lvl
-                    yield baud_ticks(self.UART_RX_BAUD_DIV)
-
-                self.rx.next = self.LVL_STOP
-                yield baud_ticks(self.UART_RX_BAUD_DIV)
-
-            yield transmit(0x1)
-            yield transmit(self.spec.chr_start)
-            for i in range(8):
-                yield transmit(0xFF)
-            yield transmit(self.spec.chr_stop)
-
-#            for i in range(8):
-#                self.rx.next = self.LVL_START
-#                for i in range(8):
-#                    yield self.clk.negedge
-#
-#                self.rx.next = self.LVL_HIGH
-#                for i in range(8*8):
-#                    yield self.clk.negedge
-#
-#                self.rx.next = self.LVL_STOP
-#                for i in range(8):
-#                    yield self.clk.negedge
-
-
-        self.simulate([monitor, stimulant])
+            while True:
+                yield delay((self.TICK_CYCLES - 1) * self.PERIOD)
+                self.uart_rx_baud_tick.next = True
+                yield delay(self.PERIOD)
+                self.uart_rx_baud_tick.next = False
+
+        self.simulate([monitor, baud_ticks,
+            UartStimulus(self.rx, transitions)])
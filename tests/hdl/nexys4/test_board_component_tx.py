@@ -1,13 +1,17 @@
 from myhdl import (Signal, intbv, ResetSignal, instance, Simulation, 
         StopSimulation, delay)
 from unittest import TestCase
-from fpgaedu import ControllerSpec
-from fpgaedu.hdl import ClockGen
+from random import Random
+from fpgaedu import ControllerSpec, FrameDecoder
+from fpgaedu.hdl import ClockGen, UartMonitor, uart_decode
 from fpgaedu.hdl.nexys4 import BoardComponentTx
 
 class BoardComponentTxTestCase(TestCase):
 
     HALF_PERIOD = 5
+    PERIOD = 2 * HALF_PERIOD
+    # Number of clock cycles per uart_tx_baud_tick
+    TICK_CYCLES = 4
     LVL_HIGH = True
     LVL_LOW = False
     LVL_START = LVL_LOW
@@ -18,7 +22,7 @@ class BoardComponentTxTestCase(TestCase):
         self.spec = ControllerSpec(width_addr=32, width_data=8)
         # Input signals
         self.clk = Signal(False)
-        self.reset = ResetSignal(True, active=False, async=False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
         self.tx_next = Signal(False)
         self.tx_msg = Signal(intbv(0)[self.spec.width_message:0])
         self.uart_tx_baud_tick = Signal(False)
@@ -34,7 +38,8 @@ class BoardComponentTxTestCase(TestCase):
 
     def simulate(self, test_logic, duration=None):
         sim = Simulation(self.clockgen, self.component_tx, *test_logic)
-        sim.run(duration, quiet=False)
+        sim.run(duration, quiet=True)
+        sim.quit()
 
     def stop_simulation(self):
         raise StopSimulation()
@@ -75,3 +80,44 @@ class BoardComponentTxTestCase(TestCase):
         self.simulate([test])
 
 
+
+    def test_tx_messages(self):
+
+        rand = Random(1)
+        control_chars = [self.spec.chr_start, self.spec.chr_stop,
+                self.spec.chr_esc]
+        messages = [self.spec.addr_type_message(rand.randrange(16),
+            rand.randrange(2**32), rand.choice(control_chars +
+                [rand.randrange(256)])) for _ in range(20)]
+        transitions = []
+
+        @instance
+        def baud_ticks():
+            yield self.clk.negedge
+            while True:
+                yield delay((self.TICK_CYCLES - 1) * self.PERIOD)
+                self.uart_tx_baud_tick.next = True
+                yield delay(self.PERIOD)
+                self.uart_tx_baud_tick.next = False
+
+        @instance
+        def stimulant():
+            yield self.clk.negedge
+            self.reset.next = self.reset.active
+            yield self.clk.negedge
+            self.reset.next = not self.reset.active
+            for message in messages:
+                yield self.clk.negedge
+                while not self.tx_ready:
+                    yield self.clk.negedge
+                self.tx_msg.next = message
+                self.tx_next.next = True
+                yield self.clk.negedge
+                self.tx_next.next = False
+
+        # Enough time for 20 frames of at most 22 bytes
+        self.simulate([baud_ticks, stimulant, UartMonitor(self.tx,
+            transitions)], 20 * 22 * 10 * self.TICK_CYCLES * self.PERIOD)
+
+        data, _ = uart_decode(transitions, self.TICK_CYCLES * self.PERIOD)
+        self.assertEqual(FrameDecoder(self.spec).feed(data), messages)
@@ -0,0 +1,85 @@
+import threading, time
+from unittest import TestCase
+
+import serial
+
+from fpgaedu import (ControllerSpec, Client, FrameDecoder, encode_frame, 
+        decode_response)
+from fpgaedu.hdl.nexys4 import BoardSimulation
+
+class BoardSimulationTestCase(TestCase):
+
+    RX_FIFO_DEPTH = 64
+
+    def setUp(self):
+        self.spec = ControllerSpec(32, 8)
+        self.simulation = BoardSimulation(self.spec, memory={3: 4},
+                rx_fifo_depth=self.RX_FIFO_DEPTH, tx_fifo_depth=16)
+        self.thread = None
+
+    def tearDown(self):
+        self.simulation.close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def serve(self):
+        self.thread = threading.Thread(target=self.simulation.serve_forever,
+                kwargs={'poll_interval': 0.01})
+        self.thread.daemon = True
+        self.thread.start()
+
+    def check_client(self, client):
+        spec = self.spec
+        events = []
+        client.add_event_handler(events.append)
+        self.assertEquals(client.sync_credits(), self.RX_FIFO_DEPTH)
+        self.assertEquals(client.read(3).data, 4)
+        messages = [spec.addr_type_message(spec.opcode_cmd_write, addr, 
+            addr + 0x10) for addr in range(8)]
+        responses = client.transact(messages)
+        self.assertEquals([res.data for res in responses], 
+                [addr + 0x10 for addr in range(8)])
+        self.assertEquals(client.read(3).data, 0x13)
+        client.reset()
+        self.assertEquals(client.read(3).data, 4)
+        client.start()
+        client.pause()
+        # The event follows the response to the pause command
+        deadline = time.time() + 5
+        while len(events) < 2 and time.time() < deadline:
+            client.poll()
+            time.sleep(0.01)
+        self.assertEquals([event.opcode for event in events], 
+                [spec.opcode_res_event_autonomous, 
+                spec.opcode_res_event_manual])
+
+    def test_bytes(self):
+        spec = self.spec
+        simulation = self.simulation
+        simulation.reset_board()
+        simulation.write(encode_frame(spec, spec.addr_type_message(
+            spec.opcode_cmd_read, 3, 0)))
+        simulation.run(200)
+        messages = FrameDecoder(spec).feed(simulation.read())
+        self.assertEquals([decode_response(spec, m).data for m in messages],
+                [4])
+        self.assertTrue(simulation.idle)
+
+    def test_pty(self):
+        path = self.simulation.open_pty()
+        self.serve()
+        connection = serial.Serial(path, timeout=1)
+        try:
+            self.check_client(Client(self.spec, connection, timeout=5))
+        finally:
+            connection.close()
+
+    def test_tcp(self):
+        host, port = self.simulation.open_tcp()
+        self.serve()
+        connection = serial.serial_for_url('socket://%s:%s' % (host, port),
+                timeout=1)
+        try:
+            self.check_client(Client(self.spec, connection, timeout=5))
+        finally:
+            connection.close()
@@ -0,0 +1,71 @@
+import os, re, shutil, tempfile
+from unittest import TestCase
+
+from fpgaedu.hdl import VhdlCache
+from fpgaedu.hdl.nexys4.generate_vhdl import (Configuration,
+        configuration_dir, generate_vhdl_matrix)
+
+class GenerateVhdlTestCase(TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_configuration_dir(self):
+        self.assertEqual(configuration_dir(Configuration(32, 8, False, 9600)),
+                'addr32_data8_resetlow_9600')
+
+    def test_matrix(self):
+        configurations = [Configuration(8, 8, True, 9600),
+                Configuration(16, 8, False, 115200)]
+        results = generate_vhdl_matrix(self.output_dir, 'top.vhd',
+                configurations, processes=2)
+
+        self.assertEqual([configuration for configuration, _, _ in results],
+                configurations)
+        for configuration, seconds, cached in results:
+            self.assertGreater(seconds, 0)
+            self.assertFalse(cached)
+            directory = os.path.join(self.output_dir,
+                    configuration_dir(configuration))
+            with open(os.path.join(directory, 'top.vhd')) as f:
+                source = f.read()
+            self.assertIn('exp_addr: out std_logic_vector(%d downto 0)' %
+                    (configuration.width_addr - 1), source)
+            # The use clause names the package that the conversion wrote
+            package = re.search(r'use work\.(pck_myhdl_\w+)\.all;',
+                    source).group(1)
+            self.assertTrue(os.path.exists(os.path.join(directory,
+                package + '.vhd')))
+
+    def test_matrix_cached(self):
+        cache_dir = os.path.join(self.output_dir, 'cache')
+        first = Configuration(8, 8, True, 9600)
+        generate_vhdl_matrix(os.path.join(self.output_dir, 'first'),
+                'top.vhd', [first], cache=VhdlCache(cache_dir))
+
+        second = Configuration(8, 16, True, 9600)
+        cache = VhdlCache(cache_dir)
+        results = generate_vhdl_matrix(os.path.join(self.output_dir,
+            'second'), 'top.vhd', [first, second], cache=cache)
+
+        self.assertEqual([cached for _, _, cached in results], [True, False])
+        self.assertEqual(len(cache.hits), 1)
+        self.assertEqual(len(cache.misses), 1)
+        for configuration in (first, second):
+            self.assertTrue(os.path.exists(os.path.join(self.output_dir,
+                'second', configuration_dir(configuration), 'top.vhd')))
+        with open(os.path.join(self.output_dir, 'first',
+                configuration_dir(first), 'top.vhd')) as f:
+            source = f.read()
+        with open(os.path.join(self.output_dir, 'second',
+                configuration_dir(first), 'top.vhd')) as f:
+            self.assertEqual(f.read(), source)
+
+    def test_duplicate_configurations(self):
+        configuration = Configuration(8, 8, True, 9600)
+        with self.assertRaises(ValueError):
+            generate_vhdl_matrix(self.output_dir, 'top.vhd',
+                    [configuration, configuration])
@@ -17,7 +17,7 @@ class BaudGenTestCase(TestCase):
 
     def setUp(self):
         self.clk = Signal(False)
-        self.reset = ResetSignal(True, active=False, async=False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
         self.rx_tick = Signal(False)
         self.tx_tick = Signal(False)
 
@@ -114,6 +114,64 @@ class BaudGenTestCase(TestCase):
             
         self.simulate(test)
 
+class BaudGenBaudDivTestCase(TestCase):
+
+    BAUD_DIV = 24
+    RX_DIV = 8
+
+    def trace_ticks(self, cycles, **kwargs):
+        '''
+        Returns the clock cycle numbers in which rx_tick and tx_tick are 
+        set, for a baudgen built with kwargs.
+        '''
+        clk = Signal(False)
+        reset = ResetSignal(True, active=False, isasync=False)
+        rx_tick = Signal(False)
+        tx_tick = Signal(False)
+        clockgen = ClockGen(clk, 1)
+        baudgen = BaudGen(clk, reset, rx_tick, tx_tick, rx_div=self.RX_DIV,
+                **kwargs)
+        rx_ticks = []
+        tx_ticks = []
+
+        @instance
+        def test():
+            for cycle in range(cycles):
+                yield clk.posedge
+                if rx_tick:
+                    rx_ticks.append(cycle)
+                if tx_tick:
+                    tx_ticks.append(cycle)
+            raise StopSimulation()
+
+        Simulation(clockgen, baudgen, test).run(quiet=True)
+        return rx_ticks, tx_ticks
+
+    def test_baud_div(self):
+        rx_ticks, tx_ticks = self.trace_ticks(10 * self.BAUD_DIV,
+                baud_div=self.BAUD_DIV)
+        self.assertEquals(tx_ticks, list(range(self.BAUD_DIV - 1, 
+            10 * self.BAUD_DIV, self.BAUD_DIV)))
+        rx_period = self.BAUD_DIV // self.RX_DIV
+        self.assertEquals(rx_ticks, list(range(rx_period - 1, 
+            10 * self.BAUD_DIV, rx_period)))
+
+    def test_equivalence(self):
+        '''
+        Check that baud_div produces the same ticks as a clock frequency and
+        baudrate of the same ratio
+        '''
+        self.assertEquals(
+                self.trace_ticks(5 * self.BAUD_DIV, baud_div=self.BAUD_DIV),
+                self.trace_ticks(5 * self.BAUD_DIV, 
+                    clk_freq=self.BAUD_DIV * 9600, baudrate=9600))
+
+    def test_baud_div_too_small(self):
+        with self.assertRaises(ValueError):
+            BaudGen(Signal(False), ResetSignal(True, active=False, 
+                isasync=False), Signal(False), Signal(False), 
+                rx_div=self.RX_DIV, baud_div=self.RX_DIV - 1)
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -1,6 +1,6 @@
-from myhdl import (Signal, ResetSignal, intbv, always, instance, Simulation, 
+from myhdl import (Signal, ResetSignal, intbv, always, instance, 
         StopSimulation, delay, always_comb)
-from unittest import TestCase
+from harness import HarnessTestCase
 
 from fpgaedu import ControllerSpec
 from fpgaedu.hdl import ClockGen, Controller
@@ -12,7 +12,11 @@ def MockExperimentSetup(clk, reset, exp_addr, exp_din, exp_dout, exp_wen,
 
     @always(clk.posedge)
     def logic():
-        if exp_wen: 
+        # The memory is shared by the tests, which start with a reset
+        if reset == reset.active:
+            memory.clear()
+            memory.update(initial)
+        elif exp_wen: 
             memory[int(exp_addr.val)] = exp_din.val
 
         try:
@@ -22,7 +26,7 @@ def MockExperimentSetup(clk, reset, exp_addr, exp_din, exp_dout, exp_wen,
     
     return logic
 
-class ControllerTestCase(TestCase):
+class ControllerTestCase(HarnessTestCase):
 
     HALF_PERIOD = 5
     WIDTH_ADDR = 32
@@ -31,11 +35,14 @@ class ControllerTestCase(TestCase):
     EXP_RESET_ACTIVE=False
 
     def setUp(self):
-        self.spec = ControllerSpec(width_addr=self.WIDTH_ADDR, 
-                width_data=self.WIDTH_DATA)
+        self.share(self.WIDTH_ADDR, self.WIDTH_DATA, self.EXP_RESET_ACTIVE)
+
+    def elaborate(self, width_addr, width_data, exp_reset_active):
+        self.spec = ControllerSpec(width_addr=width_addr, 
+                width_data=width_data)
         # Input signals
         self.clk = Signal(False)
-        self.reset = ResetSignal(True, active=False, async=False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
         self.rx_msg = Signal(intbv(0)[self.spec.width_message:0])
         self.rx_ready = Signal(False)
         self.tx_ready = Signal(True)
@@ -47,9 +54,10 @@ class ControllerTestCase(TestCase):
         self.exp_addr = Signal(intbv(0)[self.spec.width_addr:0])
         self.exp_data_write = Signal(intbv(0)[self.spec.width_data:0])
         self.exp_wen = Signal(False)
-        self.exp_reset = ResetSignal(not self.EXP_RESET_ACTIVE, 
-                active=self.EXP_RESET_ACTIVE, async=False)
+        self.exp_reset = ResetSignal(not exp_reset_active, 
+                active=exp_reset_active, isasync=False)
         self.exp_clk_en = Signal(False)
+        self.exp_break = Signal(False)
 
         self.clockgen = ClockGen(clk=self.clk, half_period=self.HALF_PERIOD)
         self.controller = Controller(spec=self.spec, clk=self.clk, 
@@ -59,15 +67,14 @@ class ControllerTestCase(TestCase):
                 exp_addr=self.exp_addr, exp_data_write=self.exp_data_write, 
                 exp_data_read=self.exp_data_read, exp_wen=self.exp_wen, 
                 exp_reset=self.exp_reset, exp_clk_en=self.exp_clk_en, 
-                exp_reset_active=self.EXP_RESET_ACTIVE)
+                exp_reset_active=exp_reset_active, 
+                exp_break=self.exp_break)
 
         self.mock_experiment = MockExperimentSetup(self.clk, self.reset, 
                 self.exp_addr, self.exp_data_write, self.exp_data_read, self.exp_wen, 
                 self.exp_reset, self.exp_clk_en, self.MEM_INIT)
 
-    def simulate(self, test_logic, duration=None):
-        sim = Simulation(self.clockgen, self.controller, self.mock_experiment, *test_logic)
-        sim.run(duration, quiet=False)
+        return self.clockgen, self.controller, self.mock_experiment
 
     def stop_simulation(self):
         raise StopSimulation()
@@ -250,6 +257,38 @@ class ControllerTestCase(TestCase):
 
         self.simulate([test])
 
+    def test_cmd_stat(self):
+        cmd_read = self.spec.addr_type_message(self.spec.opcode_cmd_read, 3, 0)
+        cmd_stat = self.spec.addr_type_message(self.spec.opcode_cmd_stat, 
+                self.spec.stat_commands, 0)
+
+        @instance
+        def test():
+            self.reset.next = self.reset.active
+            yield self.clk.negedge
+            self.reset.next = not self.reset.active
+            yield self.clk.negedge
+
+            self.rx_msg.next = cmd_read
+            self.rx_ready.next = True
+            self.tx_ready.next = True
+            yield self.clk.negedge
+            yield self.clk.negedge
+
+            self.rx_msg.next = cmd_stat
+            yield self.clk.negedge
+            self.assertTrue(self.tx_next)
+            self.assertEquals(self.tx_msg, self.spec.value_type_message(
+                    self.spec.opcode_res_stat, 2))
+
+            self.rx_ready.next = False
+            yield self.clk.negedge
+            self.assertFalse(self.tx_next)
+
+            self.stop_simulation()
+
+        self.simulate([test])
+
     def test_cmd_start_pause(self):
         @instance
         def test():
@@ -264,4 +303,65 @@ class ControllerTestCase(TestCase):
 
         self.simulate([test])
 
+    def test_events(self):
+        cmd_start = self.spec.value_type_message(self.spec.opcode_cmd_start, 0)
+        cmd_pause = self.spec.value_type_message(self.spec.opcode_cmd_pause, 0)
+        responses = []
+
+        @always(self.clk.posedge)
+        def monitor():
+            if self.tx_next:
+                responses.append((self.spec.parse_opcode(self.tx_msg.val),
+                        self.spec.parse_value(self.tx_msg.val)))
+
+        def command(message):
+            # Like the message receiver, rx_ready is set on a rising edge
+            yield self.clk.posedge
+            self.rx_msg.next = message
+            self.rx_ready.next = True
+            yield self.clk.posedge
+            self.rx_ready.next = False
+            for i in range(5):
+                yield self.clk.negedge
+
+        @instance
+        def test():
+            self.reset.next = self.reset.active
+            yield self.clk.negedge
+            self.reset.next = not self.reset.active
+            self.tx_ready.next = True
+            for i in range(5):
+                yield self.clk.negedge
+            self.assertEquals(responses, [])
+
+            yield command(cmd_start)
+            self.assertEquals([r[0] for r in responses], 
+                    [self.spec.opcode_res_start_success, 
+                    self.spec.opcode_res_event_autonomous])
+
+            del responses[:]
+            yield command(cmd_pause)
+            self.assertEquals([r[0] for r in responses], 
+                    [self.spec.opcode_res_pause_success, 
+                    self.spec.opcode_res_event_manual])
+            self.assertTrue(responses[1][1] > 0)
+
+            yield command(cmd_start)
+            del responses[:]
+            self.exp_break.next = True
+            yield self.clk.negedge
+            self.exp_break.next = False
+            for i in range(5):
+                yield self.clk.negedge
+            self.assertFalse(self.exp_clk_en)
+            self.assertEquals([r[0] for r in responses], 
+                    [self.spec.opcode_res_event_manual])
+
+            self.stop_simulation()
+
+        self.simulate([test, monitor])
 
+class ControllerResetActiveTestCase(ControllerTestCase):
+    WIDTH_ADDR = 12
+    WIDTH_DATA = 16
+    EXP_RESET_ACTIVE = True
@@ -18,14 +18,14 @@ class ControllerControlTestCase(TestCase):
         self.rx_ready = Signal(False)
         self.tx_ready = Signal(False)
         self.cycle_autonomous = Signal(False)
-        self.reset = ResetSignal(True, active=False, async=False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
         # output signals
         self.rx_next = Signal(False)
         self.opcode_res = Signal(intbv(0)[self.spec.width_message:0])
         self.nop = Signal(False)
         self.exp_wen = Signal(False)
         self.exp_reset = ResetSignal(True, active=self.EXP_RESET_ACTIVE, 
-                async=False)
+                isasync=False)
         self.cycle_start = Signal(False)
         self.cycle_pause = Signal(False)
         self.cycle_step = Signal(False)
@@ -16,7 +16,7 @@ class ControllerCycleControlTestCase(TestCase):
         self.spec = ControllerSpec(self.WIDTH_ADDR, self.WIDTH_DATA)
         #input signals
         self.clk = Signal(False)
-        self.reset = ResetSignal(True, active=False, async=False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
         self.start = Signal(False)
         self.pause = Signal(False)
         self.step = Signal(False)
@@ -0,0 +1,92 @@
+import random
+from unittest import TestCase
+
+from fpgaedu import ControllerSpec, ControllerModel
+
+from differential import generate_controller, run_controller
+
+class ControllerModelTestCase(TestCase):
+    '''
+    Runs the model in lockstep with the myhdl Controller on random input
+    streams, comparing all outputs in every clock cycle.
+    '''
+
+    WIDTH_ADDR = 32
+    WIDTH_DATA = 8
+    EXP_RESET_ACTIVE = False
+    CYCLES = 3000
+
+    def setUp(self):
+        self.spec = ControllerSpec(width_addr=self.WIDTH_ADDR, 
+                width_data=self.WIDTH_DATA)
+        self.model = ControllerModel(self.spec, 
+                exp_reset_active=self.EXP_RESET_ACTIVE)
+
+    def test_lockstep(self):
+        for seed in range(3):
+            stream = generate_controller(self.spec, random.Random(seed), 
+                    self.CYCLES)
+            self.assertEquals(run_controller(self.spec, stream, 
+                exp_reset_active=self.EXP_RESET_ACTIVE), None)
+
+    def test_stream(self):
+        # Make sure the streams exercise responses and events
+        spec = self.spec
+        model = self.model
+        responses = events = 0
+        for values in generate_controller(spec, random.Random(0), 
+                self.CYCLES):
+            for name, value in values.items():
+                setattr(model, name, value)
+            model.tick()
+            if model.tx_next:
+                responses += 1
+                if spec.is_event_response(spec.parse_opcode(model.tx_msg)):
+                    events += 1
+        self.assertTrue(responses > self.CYCLES // 10)
+        self.assertTrue(events > 0)
+
+    def test_counts(self):
+        spec = self.spec
+        model = self.model
+        model.rx_msg = spec.value_type_message(spec.opcode_cmd_status, 0)
+        model.rx_ready = True
+        for i in range(3):
+            model.tick()
+        model.rx_ready = False
+        model.tick()
+        self.assertEquals(model.counts[spec.stat_commands], 3)
+        self.assertTrue(model.tx_next)
+        self.assertEquals(spec.parse_opcode(model.tx_msg), 
+                spec.opcode_res_status)
+
+    def test_run(self):
+        '''
+        Holds random inputs for random numbers of cycles, which run must
+        skip without a difference to ticking every cycle.
+        '''
+        rand = random.Random(1)
+        model = self.model
+        reference = ControllerModel(self.spec, 
+                exp_reset_active=self.EXP_RESET_ACTIVE)
+        for _ in range(300):
+            inputs = generate_controller(self.spec, rand, 1)[0]
+            if rand.random() < 0.5:
+                # Quiet inputs, as between commands
+                inputs.update(rx_ready=False, stat_events=0, reset=False)
+            cycles = rand.choice([1, 2, 3, rand.randrange(1000)])
+            for name, value in inputs.items():
+                setattr(model, name, value)
+                setattr(reference, name, value)
+            model.run(cycles)
+            for _ in range(cycles):
+                reference.tick()
+            self.assertEquals([getattr(model, name) for name in 
+                ControllerModel.__slots__], [getattr(reference, name) for
+                    name in ControllerModel.__slots__])
+
+class ControllerModelResetActiveTestCase(ControllerModelTestCase):
+    EXP_RESET_ACTIVE = True
+    WIDTH_ADDR = 12
+    WIDTH_DATA = 16
+    CYCLES = 1000
@@ -0,0 +1,56 @@
+import random
+from unittest import TestCase
+
+from fpgaedu import ControllerSpec
+from differential import (generate_receiver, run_receiver, shrink, run_seed,
+        run_seeds)
+
+class DifferentialTestCase(TestCase):
+
+    CYCLES = 400
+
+    def test_controller(self):
+        # test_controller_model runs more streams, of both reset polarities
+        self.assertEqual(run_seed('controller', 0, self.CYCLES), None)
+
+    def test_receiver(self):
+        for seed in range(3):
+            self.assertEqual(run_seed('receiver', seed, self.CYCLES), None)
+
+    def test_receiver_stale_fifo_output(self):
+        # The fifo runs empty right after an escaped start character, while
+        # its output still holds the character
+        spec = ControllerSpec(32, 8)
+        frame = [spec.chr_start, spec.chr_esc, spec.chr_start, 1, 2, 3, 4,
+                5, spec.chr_stop]
+        stream = [dict(byte=byte, receive_next=True, reset=False)
+                for byte in frame]
+        stream.insert(3, dict(byte=None, receive_next=True, reset=False))
+        self.assertEqual(run_receiver(spec, stream), None)
+
+    def test_receiver_long_frame(self):
+        spec = ControllerSpec(32, 8)
+        frame = [spec.chr_start] + list(range(1, 8)) + [spec.chr_stop]
+        stream = [dict(byte=byte, receive_next=True, reset=False)
+                for byte in frame]
+        self.assertEqual(run_receiver(spec, stream), None)
+
+    def test_receiver_stream(self):
+        spec = ControllerSpec(32, 8)
+        stream = generate_receiver(spec, random.Random(1), 1000)
+        self.assertTrue(any(values['reset'] for values in stream))
+        self.assertTrue(spec.chr_esc in [values['byte'] for values in stream])
+
+    def test_shrink(self):
+        runs = []
+
+        def fails(stream):
+            runs.append(stream)
+            return 17 in stream and 42 in stream
+
+        self.assertEqual(shrink(list(range(100)), fails), [17, 42])
+        self.assertTrue(len(runs) < 100)
+
+    def test_run_seeds(self):
+        self.assertEqual(run_seeds('receiver', range(2), cycles=100,
+            processes=2), [])
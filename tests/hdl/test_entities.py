@@ -0,0 +1,111 @@
+import os, shutil, tempfile
+from unittest import TestCase
+
+from myhdl import Signal, ResetSignal, intbv, always_comb
+
+from fpgaedu.hdl import (Fifo, VhdlCache, register, entity,
+        generate_entities)
+
+def _FifoPair(clk, reset, din, enqueue, dout, dequeue, empty, full,
+        depth_first=4, depth_second=4, count=None):
+    '''
+    Two fifos in series, which are separate entities
+    '''
+
+    middle = Signal(intbv(0)[8:0])
+    middle_empty = Signal(False)
+    middle_full = Signal(False)
+    transfer = Signal(False)
+
+    first = entity(Fifo)(clk=clk, reset=reset, din=din, enqueue=enqueue,
+            dout=middle, dequeue=transfer, empty=middle_empty,
+            full=middle_full, data_width=8, depth=depth_first)
+    second = entity(Fifo)(clk=clk, reset=reset, din=middle,
+            enqueue=transfer, dout=dout, dequeue=dequeue, empty=empty,
+            full=full, data_width=8, depth=depth_second, count=count)
+
+    @always_comb
+    def transfer_logic():
+        transfer.next = not middle_empty and not full
+
+    return first, second, transfer_logic
+
+class EntitiesTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.directory, 'output')
+        self.cache_dir = os.path.join(self.directory, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def generate(self, cache=None, **parameters):
+        return generate_entities(self.output_dir, 'fifo_pair', _FifoPair,
+                clk=Signal(False), reset=ResetSignal(True, active=False,
+                    isasync=False),
+                din=Signal(intbv(0)[8:0]), enqueue=Signal(False),
+                dout=Signal(intbv(0)[8:0]), dequeue=Signal(False),
+                empty=Signal(False), full=Signal(False), cache=cache,
+                **parameters)
+
+    def read(self, name):
+        with open(os.path.join(self.output_dir, name + '.vhd')) as f:
+            return f.read()
+
+    def test_entity_outside_generation(self):
+        self.assertIs(entity(Fifo), Fifo)
+
+    def test_entity_unregistered(self):
+        with self.assertRaises(ValueError):
+            entity(_FifoPair)
+
+    def test_register_unknown_parameter(self):
+        with self.assertRaises(ValueError):
+            register(_FifoPair, 'fifo_pair', parameters=('depth',))
+
+    def test_register_undeclared_argument(self):
+        with self.assertRaises(ValueError):
+            register(_FifoPair, 'fifo_pair', parameters=('depth_first',
+                'depth_second'), inputs=('clk', 'reset', 'din', 'enqueue',
+                    'dequeue'), outputs=('dout', 'empty', 'full'))
+
+    def test_separate_entities(self):
+        results = self.generate(depth_first=4, depth_second=8)
+
+        names = [name for name, _, _ in results]
+        self.assertEqual(len(names), 3)
+        self.assertEqual(names[-1], 'fifo_pair')
+        top = self.read('fifo_pair')
+        for name in names[:-1]:
+            self.assertTrue(name.startswith('fifo_'))
+            self.assertIn('entity %s is' % name, self.read(name))
+            self.assertIn('entity work.%s(MyHDL)' % name, top)
+        # The fifo logic is not converted inline
+        self.assertNotIn('count_reg', top)
+        # Signals that only connect entities are declared
+        self.assertIn('signal middle: unsigned(7 downto 0);', top)
+        self.assertIn('signal middle_empty: std_logic;', top)
+
+    def test_shared_entity(self):
+        results = self.generate(depth_first=4, depth_second=4)
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.read('fifo_pair').count('entity work.%s' %
+            results[0][0]), 2)
+
+    def test_cache(self):
+        self.generate(VhdlCache(self.cache_dir), depth_first=4,
+                depth_second=8)
+
+        cache = VhdlCache(self.cache_dir)
+        results = self.generate(cache, depth_first=4, depth_second=16)
+
+        self.assertEqual([cached for _, _, cached in results],
+                [True, False, False])
+        self.assertEqual(len(cache.hits), 1)
+        self.assertEqual(len(cache.misses), 2)
+
+    def test_undeclared_parameter(self):
+        with self.assertRaises(ValueError):
+            self.generate(count=3)
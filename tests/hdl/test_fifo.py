@@ -3,9 +3,9 @@ from myhdl import (Signal, ResetSignal, intbv, Simulation, StopSimulation,
 from math import ceil
 import unittest
 from unittest import TestCase
-from random import randint
+from random import Random
 
-from fpgaedu.hdl import Fifo, ClockGen
+from fpgaedu.hdl import Fifo, BlockRamFifo, ClockGen
 
 
 class FifoTestCase(TestCase):
@@ -16,7 +16,7 @@ class FifoTestCase(TestCase):
 
     def setUp(self):
         self.clk = Signal(False)
-        self.reset = ResetSignal(True, active=False, async=False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
         self.din = Signal(intbv(0)[self.DATA_WIDTH:0])
         self.enqueue = Signal(False)
         self.dout = Signal(intbv(0)[self.DATA_WIDTH:0])
@@ -25,7 +25,10 @@ class FifoTestCase(TestCase):
         self.full = Signal(False)
 
         self.clockgen = ClockGen(self.clk, self.CLK_HALF_PERIOD)
-        self.fifo = Fifo(self.clk, self.reset, self.din, self.enqueue, 
+        self.fifo = self.create_fifo()
+
+    def create_fifo(self):
+        return Fifo(self.clk, self.reset, self.din, self.enqueue, 
                 self.dout, self.dequeue, self.empty, self.full, 
                 data_width=self.DATA_WIDTH, depth=self.DEPTH)
 
@@ -96,3 +99,75 @@ class FifoTestCase(TestCase):
             
         self.simulate(test)
 
+class BlockRamFifoTestCase(FifoTestCase):
+
+    def setUp(self):
+        self.count = Signal(intbv(0, min=0, max=self.DEPTH+1))
+        self.almost_full = Signal(False)
+        self.almost_empty = Signal(False)
+        super(BlockRamFifoTestCase, self).setUp()
+
+    def create_fifo(self):
+        return BlockRamFifo(self.clk, self.reset, self.din, self.enqueue, 
+                self.dout, self.dequeue, self.empty, self.full, 
+                data_width=self.DATA_WIDTH, depth=self.DEPTH, 
+                count=self.count, almost_full=self.almost_full,
+                almost_empty=self.almost_empty)
+
+    def test_depth(self):
+        with self.assertRaises(ValueError):
+            BlockRamFifo(self.clk, self.reset, self.din, self.enqueue, 
+                self.dout, self.dequeue, self.empty, self.full, depth=12)
+
+    def test_stream(self):
+        '''
+        Stream random data through a deep fifo with random enqueue and 
+        dequeue patterns and compare the output to a reference queue
+        '''
+        depth = 2048
+        # Seeded, so that a failure can be reproduced
+        rng = Random(1)
+        self.count = Signal(intbv(0, min=0, max=depth+1))
+        self.fifo = BlockRamFifo(self.clk, self.reset, self.din, 
+                self.enqueue, self.dout, self.dequeue, self.empty, self.full, 
+                data_width=self.DATA_WIDTH, depth=depth, count=self.count, 
+                almost_full=self.almost_full, almost_empty=self.almost_empty)
+
+        @instance
+        def test():
+            self.reset.next = False
+            yield self.clk.negedge
+            self.reset.next = True
+            expected = []
+
+            for i in range(3*depth):
+                # fill during the first half, drain during the second half
+                fill = i < 1.5*depth
+                enqueue = (rng.randint(0, 7) != 0 if fill else
+                        rng.randint(0, 7) == 0)
+                dequeue = (rng.randint(0, 7) == 0 if fill else
+                        rng.randint(0, 7) != 0)
+                data = rng.randint(0, 2**self.DATA_WIDTH-1)
+                self.din.next = data
+                self.enqueue.next = enqueue
+                self.dequeue.next = dequeue
+                yield self.clk.negedge
+
+                # enqueue is ignored when full, even when dequeuing
+                accept = enqueue and len(expected) < depth
+                if dequeue and expected:
+                    expected.pop(0)
+                if accept:
+                    expected.append(data)
+
+                self.assertEquals(self.count, len(expected))
+                self.assertEquals(self.empty, len(expected) == 0)
+                self.assertEquals(self.full, len(expected) == depth)
+                self.assertEquals(self.almost_empty, len(expected) <= 1)
+                self.assertEquals(self.almost_full, 
+                        len(expected) >= depth - 1)
+                self.assertEquals(self.dout, expected[0] if expected else 0)
+
+            self.stop_simulation()
+
+        self.simulate(test)
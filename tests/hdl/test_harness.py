@@ -0,0 +1,79 @@
+from myhdl import (Signal, ResetSignal, intbv, always, always_seq, instance,
+        StopSimulation)
+
+import harness
+from fpgaedu.hdl import ClockGen
+
+def Counter(clk, reset, count, seen):
+
+    @always_seq(clk.posedge, reset)
+    def logic():
+        count.next = (count + 1) % 16
+
+    @always(clk.posedge)
+    def record():
+        if reset == reset.active:
+            del seen[:]
+        else:
+            seen.append(int(count.val))
+
+    return logic, record
+
+class HarnessTestCase(harness.HarnessTestCase):
+
+    elaborations = []
+
+    def setUp(self):
+        self.share(4)
+
+    def elaborate(self, width):
+        self.elaborations.append(width)
+        self.clk = Signal(False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
+        self.count = Signal(intbv(0)[width:0])
+        self.seen = []
+        return ClockGen(self.clk, 5), Counter(self.clk, self.reset,
+                self.count, self.seen)
+
+    def run_cycles(self, cycles):
+        @instance
+        def test():
+            self.assertEquals(self.count, 0)
+            for i in range(cycles):
+                yield self.clk.negedge
+            self.assertEquals(self.reset, not self.reset.active)
+            self.assertEquals(self.count, cycles)
+            self.assertEquals(self.seen, list(range(cycles)))
+            raise StopSimulation()
+
+        self.simulate(test)
+
+    def test_share(self):
+        self.run_cycles(3)
+        self.run_cycles(5)
+        self.assertEquals(self.elaborations.count(4), 1)
+        design = self.design
+        self.share(4)
+        self.assertTrue(self.design is design)
+        self.share(5)
+        self.assertFalse(self.design is design)
+        self.assertEquals(self.elaborations.count(5), 1)
+
+    def test_duration(self):
+        @instance
+        def test():
+            while True:
+                yield self.clk.negedge
+
+        self.simulate(test, 100)
+        self.run_cycles(3)
+
+    def test_failure(self):
+        @instance
+        def test():
+            yield self.clk.negedge
+            self.fail()
+
+        with self.assertRaises(AssertionError):
+            self.simulate(test)
+        self.run_cycles(3)
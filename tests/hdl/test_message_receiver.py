@@ -17,7 +17,7 @@ class MessageReceiverTestCase(TestCase):
 
         # Input signals
         self.clk = Signal(False)
-        self.reset = ResetSignal(True, active=False, async=False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
         self.rx_fifo_data_read = Signal(intbv(0)[8:0])
         self.rx_fifo_empty = Signal(False)
         self.receive_next = Signal(False)
@@ -17,7 +17,7 @@ class MessageTransmitterTestCase(TestCase):
 
         # Input signals
         self.clk = Signal(False)
-        self.reset = ResetSignal(True, active=False, async=False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
         self.message = Signal(intbv(0)[self.spec.width_message:0])
         self.tx_fifo_full = Signal(False)
         self.transmit_next = Signal(False)
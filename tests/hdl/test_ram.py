@@ -0,0 +1,178 @@
+from myhdl import (Signal, intbv, Simulation, StopSimulation, instance, 
+        delay, toVHDL)
+from unittest import TestCase
+import os, shutil, tempfile
+
+from fpgaedu.hdl import ClockGen, Ram, DualPortRam
+
+class RamTestCase(TestCase):
+
+    HALF_PERIOD = 5
+    DATA_WIDTH = 8
+    DEPTH = 16
+
+    def setUp(self):
+        self.clk = Signal(False)
+        self.dout = Signal(intbv(0)[self.DATA_WIDTH:0])
+        self.din = Signal(intbv(0)[self.DATA_WIDTH:0])
+        self.addr = Signal(intbv(0, min=0, max=self.DEPTH))
+        self.wen = Signal(False)
+
+        self.clockgen = ClockGen(self.clk, self.HALF_PERIOD)
+        self.ram = Ram(clk=self.clk, dout=self.dout, din=self.din, 
+                addr=self.addr, wen=self.wen, data_width=self.DATA_WIDTH, 
+                depth=self.DEPTH)
+
+    def simulate(self, test_logic, duration=None):
+        sim = Simulation(self.clockgen, self.ram, test_logic)
+        sim.run(duration, quiet=False)
+
+    def stop_simulation(self):
+        raise StopSimulation()
+
+    def test_write_read(self):
+
+        @instance
+        def test():
+            for addr in range(self.DEPTH):
+                self.addr.next = addr
+                self.din.next = addr * 3
+                self.wen.next = True
+                yield self.clk.negedge
+            self.wen.next = False
+
+            for addr in range(self.DEPTH):
+                self.addr.next = addr
+                yield delay(1)
+                self.assertEquals(self.dout, addr * 3)
+
+            self.stop_simulation()
+
+        self.simulate(test)
+
+class DualPortRamTestCase(TestCase):
+
+    HALF_PERIOD = 5
+    DATA_WIDTH = 16
+    BYTE_WIDTH = 8
+    DEPTH = 32
+
+    def setUp(self):
+        self.clk = Signal(False)
+        self.din = Signal(intbv(0)[self.DATA_WIDTH:0])
+        self.waddr = Signal(intbv(0, min=0, max=self.DEPTH))
+        self.wen = Signal(False)
+        self.byte_wen = Signal(intbv(0)[self.DATA_WIDTH//self.BYTE_WIDTH:0])
+        self.dout = Signal(intbv(0)[self.DATA_WIDTH:0])
+        self.raddr = Signal(intbv(0, min=0, max=self.DEPTH))
+
+        self.clockgen = ClockGen(self.clk, self.HALF_PERIOD)
+
+    def create_ram(self, **kwargs):
+        return DualPortRam(clk=self.clk, din=self.din, waddr=self.waddr,
+                wen=self.wen, dout=self.dout, raddr=self.raddr, 
+                data_width=self.DATA_WIDTH, depth=self.DEPTH, **kwargs)
+
+    def simulate(self, ram, test_logic, duration=None):
+        sim = Simulation(self.clockgen, ram, test_logic)
+        sim.run(duration, quiet=False)
+
+    def stop_simulation(self):
+        raise StopSimulation()
+
+    def test_simultaneous_read_write(self):
+
+        @instance
+        def test():
+            # Write address i while reading address i-1
+            self.wen.next = True
+            for addr in range(self.DEPTH):
+                self.waddr.next = addr
+                self.din.next = addr + 1000
+                self.raddr.next = max(addr - 1, 0)
+                yield self.clk.negedge
+                if addr > 0:
+                    self.assertEquals(self.dout, addr - 1 + 1000)
+
+            # A read of the address being written returns the old data
+            self.waddr.next = 5
+            self.raddr.next = 5
+            self.din.next = 7
+            yield self.clk.negedge
+            self.assertEquals(self.dout, 1005)
+            self.wen.next = False
+            yield self.clk.negedge
+            self.assertEquals(self.dout, 7)
+
+            self.stop_simulation()
+
+        self.simulate(self.create_ram(), test)
+
+    def test_output_register(self):
+
+        @instance
+        def test():
+            self.wen.next = True
+            for addr in range(4):
+                self.waddr.next = addr
+                self.din.next = addr + 10
+                yield self.clk.negedge
+            self.wen.next = False
+
+            for addr in range(4):
+                self.raddr.next = addr
+                yield self.clk.negedge
+                if addr > 0:
+                    self.assertEquals(self.dout, addr - 1 + 10)
+                yield self.clk.negedge
+                self.assertEquals(self.dout, addr + 10)
+
+            self.stop_simulation()
+
+        self.simulate(self.create_ram(output_register=True), test)
+
+    def test_byte_write_enable(self):
+        self.wen = self.byte_wen
+
+        @instance
+        def test():
+            self.waddr.next = 3
+            self.din.next = 0xAABB
+            self.byte_wen.next = int('11', 2)
+            yield self.clk.negedge
+            self.din.next = 0xCCDD
+            self.byte_wen.next = int('01', 2)
+            yield self.clk.negedge
+            self.din.next = 0xEEFF
+            self.byte_wen.next = int('10', 2)
+            yield self.clk.negedge
+            self.byte_wen.next = 0
+
+            self.raddr.next = 3
+            yield self.clk.negedge
+            self.assertEquals(self.dout, 0xEEDD)
+
+            self.stop_simulation()
+
+        self.simulate(self.create_ram(byte_width=self.BYTE_WIDTH), test)
+
+    def test_byte_width(self):
+        with self.assertRaises(ValueError):
+            self.create_ram(byte_width=5)
+
+    def test_convert(self):
+        directory = tempfile.mkdtemp()
+        try:
+            toVHDL.directory = directory
+            toVHDL.name = 'dual_port_ram'
+            toVHDL(DualPortRam, clk=self.clk, din=self.din, 
+                    waddr=self.waddr, wen=self.byte_wen, dout=self.dout,
+                    raddr=self.raddr, data_width=self.DATA_WIDTH, 
+                    depth=self.DEPTH, byte_width=self.BYTE_WIDTH,
+                    output_register=True)
+            self.assertTrue(os.path.exists(os.path.join(directory, 
+                'dual_port_ram.vhd')))
+        finally:
+            toVHDL.directory = None
+            toVHDL.name = None
+            shutil.rmtree(directory)
@@ -0,0 +1,81 @@
+from myhdl import (Signal, ResetSignal, intbv, Simulation, StopSimulation,
+        instance, delay)
+from unittest import TestCase
+
+from fpgaedu.hdl import ClockGen, Statistics
+
+class StatisticsTestCase(TestCase):
+
+    HALF_PERIOD = 5
+    NUM_STATS = 4
+    WIDTH_VALUE = 3
+
+    def setUp(self):
+        self.clk = Signal(False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
+        self.events = Signal(intbv(0)[self.NUM_STATS:0])
+        self.index = Signal(intbv(0)[8:0])
+        self.value = Signal(intbv(0)[self.WIDTH_VALUE:0])
+
+        self.clockgen = ClockGen(self.clk, self.HALF_PERIOD)
+        self.statistics = Statistics(clk=self.clk, reset=self.reset, 
+                events=self.events, index=self.index, value=self.value,
+                num_stats=self.NUM_STATS)
+
+    def simulate(self, test_logic, duration=None):
+        sim = Simulation(self.clockgen, self.statistics, test_logic)
+        sim.run(duration, quiet=False)
+
+    def stop_simulation(self):
+        raise StopSimulation()
+
+    def test_count(self):
+
+        @instance
+        def test():
+            self.reset.next = self.reset.active
+            yield self.clk.negedge
+            self.reset.next = not self.reset.active
+
+            self.events.next = int('0101', 2)
+            yield self.clk.negedge
+            self.events.next = int('0001', 2)
+            yield self.clk.negedge
+            self.events.next = 0
+            yield self.clk.negedge
+
+            for index, expected in enumerate([2, 0, 1, 0]):
+                self.index.next = index
+                yield delay(1)
+                self.assertEquals(self.value, expected)
+
+            # Out of range index
+            self.index.next = self.NUM_STATS
+            yield delay(1)
+            self.assertEquals(self.value, 0)
+
+            self.stop_simulation()
+
+        self.simulate(test)
+
+    def test_saturate(self):
+
+        @instance
+        def test():
+            self.reset.next = self.reset.active
+            yield self.clk.negedge
+            self.reset.next = not self.reset.active
+
+            self.index.next = 3
+            self.events.next = int('1000', 2)
+            for _ in range(2**self.WIDTH_VALUE + 5):
+                yield self.clk.negedge
+            self.assertEquals(self.value, 2**self.WIDTH_VALUE - 1)
+
+            self.reset.next = self.reset.active
+            yield self.clk.negedge
+            self.assertEquals(self.value, 0)
+
+            self.stop_simulation()
+
+        self.simulate(test)
@@ -0,0 +1,74 @@
+from unittest import TestCase
+from random import Random
+from myhdl import Signal, Simulation
+
+from fpgaedu.hdl import (uart_transitions, UartStimulus, UartMonitor,
+        uart_decode)
+
+class UartDecodeTestCase(TestCase):
+
+    BIT_TIME = 100
+
+    def test_decode(self):
+        data = bytearray(range(256))
+        transitions = uart_transitions(data, self.BIT_TIME, idle_bits=2)
+        decoded, resume = uart_decode(transitions, self.BIT_TIME)
+        self.assertEqual(decoded, data)
+        self.assertEqual(resume, transitions[-1][0] + 1)
+
+    def test_jitter(self):
+        rand = Random(1)
+        data = bytearray(rand.randrange(256) for _ in range(256))
+        transitions = uart_transitions(data, self.BIT_TIME, jitter=20,
+                seed=1)
+        self.assertEqual(uart_decode(transitions, self.BIT_TIME)[0], data)
+
+    def test_bits(self):
+        data = bytearray([0x00, 0x55, 0x7F])
+        transitions = uart_transitions(data, self.BIT_TIME, data_bits=7,
+                stop_bits=2)
+        self.assertEqual(uart_decode(transitions, self.BIT_TIME,
+            data_bits=7, stop_bits=2)[0], data)
+
+    def test_frame_error(self):
+        # The second frame's stop bit is low
+        transitions = uart_transitions(bytearray([0x12, 0x00, 0x34]),
+                self.BIT_TIME)
+        transitions = [(time, level) for time, level in transitions
+                if not 1000 <= time < 2000]
+        self.assertEqual(uart_decode(transitions, self.BIT_TIME)[0],
+                bytearray([0x12, 0x34]))
+
+    def test_glitch(self):
+        transitions = [(0, True), (50, False), (60, True)] + [(time + 200,
+            level) for time, level in uart_transitions(bytearray([0x34]),
+            self.BIT_TIME)]
+        self.assertEqual(uart_decode(transitions, self.BIT_TIME)[0],
+                bytearray([0x34]))
+
+    def test_incremental(self):
+        data = bytearray(range(64))
+        transitions = uart_transitions(data, self.BIT_TIME)
+        decoded = bytearray()
+        resume = 0
+        for end in range(0, transitions[-1][0] + 1000, 333):
+            recorded = [(time, level) for time, level in transitions
+                    if resume <= time <= end]
+            chunk, resume = uart_decode(recorded, self.BIT_TIME,
+                    start=resume, end=end)
+            decoded.extend(chunk)
+        self.assertEqual(decoded, data)
+
+class UartMonitorTestCase(TestCase):
+
+    def test_record(self):
+        line = Signal(True)
+        recorded = []
+        data = bytearray(b'\x12\x7d\x13monitor')
+        transitions = uart_transitions(data, 100, idle_bits=1)
+        sim = Simulation(UartStimulus(line, transitions),
+                UartMonitor(line, recorded))
+        sim.run(transitions[-1][0], quiet=True)
+        sim.quit()
+        self.assertEqual(recorded, transitions[1:-1])
+        self.assertEqual(uart_decode(recorded, 100)[0], data)
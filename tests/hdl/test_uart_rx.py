@@ -1,26 +1,23 @@
-from myhdl import (Signal, ResetSignal, intbv, Simulation, StopSimulation,
-        instance, delay, now)
+from myhdl import (Signal, ResetSignal, intbv, Simulation, instance, delay)
 from unittest import TestCase
-from fpgaedu.hdl import ClockGen, UartRx
-from random import randint
+from fpgaedu.hdl import ClockGen, UartRx, uart_transitions, UartStimulus
+from random import Random
 
 class UartRxTestCase(TestCase):
 
     DATA_BITS = 8
     STOP_BITS = 1
     HALF_PERIOD = 5
+    PERIOD = 2 * HALF_PERIOD
     RX_DIV = 4
-
-    HIGH = True
-    LOW = False
-    START = LOW
-    STOP = HIGH
-    IDLE = HIGH
+    # Number of clock cycles per rx_baud_tick
+    TICK_CYCLES = 51
+    BIT_TIME = RX_DIV * TICK_CYCLES * PERIOD
 
     def setUp(self):
         self.clk = Signal(True)
-        self.reset = ResetSignal(True, active=False, async=False)
-        self.rx = Signal(False)
+        self.reset = ResetSignal(True, active=False, isasync=False)
+        self.rx = Signal(True)
         self.rx_data = Signal(intbv(0)[self.DATA_BITS:0])
         self.rx_finish = Signal(False)
         self.rx_busy = Signal(False)
@@ -34,51 +31,47 @@ class UartRxTestCase(TestCase):
 
     def simulate(self, test_logic, duration=None):
         sim = Simulation(self.clockgen, self.uart_rx, *test_logic)
-        sim.run(duration, quiet=False)
-
-    def stop_simulation(self):
-        raise StopSimulation()
+        sim.run(duration, quiet=True)
+        sim.quit()
 
-    def test_rx_receive(self):
+    def receive(self, data, jitter=0):
+        '''
+        Sends data to the UartRx and returns the list of received bytes
+        '''
+        transitions = uart_transitions(data, self.BIT_TIME,
+                data_bits=self.DATA_BITS, stop_bits=self.STOP_BITS,
+                idle_bits=1, jitter=jitter, seed=1)
+        received = []
 
-        test_data = ['10101010', '00110011', '011001110']
+        @instance
+        def baud_ticks():
+            self.reset.next = self.reset.active
+            # Change the tick on falling clock edges
+            yield delay(self.HALF_PERIOD)
+            self.reset.next = not self.reset.active
+            while True:
+                yield delay((self.TICK_CYCLES - 1) * self.PERIOD)
+                self.rx_baud_tick.next = True
+                yield delay(self.PERIOD)
+                self.rx_baud_tick.next = False
 
         @instance
         def monitor():
-            for data in test_data:
+            while True:
                 yield self.rx_finish.posedge
-                self.assertEquals(self.rx_data, int(data, 2))
+                received.append(int(self.rx_data.val))
 
-        @instance
-        def test():
-    
-            self.rx.next = self.IDLE
-            self.rx_baud_tick.next = False
-            self.reset.next = False
-
-            yield self.clk.negedge
-            self.reset.next = True
-            yield self.clk.negedge
+        self.simulate([baud_ticks, monitor,
+                UartStimulus(self.rx, transitions)],
+                transitions[-1][0] + self.BIT_TIME)
+        return received
 
-            def baud_tick(n):
-                for _ in range(n):
-                    for _ in range(49):
-                        yield self.clk.negedge
-                    self.rx_baud_tick.next = True
-                    yield self.clk.negedge
-                    self.rx_baud_tick.next = False
-                    yield self.clk.negedge
-
-            for data in test_data:
-                self.rx.next = self.START
-                yield baud_tick(self.RX_DIV)
-                for bit in data[::-1]:
-                    self.rx.next = (bit == '1')
-                    yield baud_tick(self.RX_DIV)
-                self.rx.next = self.STOP
-                yield baud_tick(self.RX_DIV)
-                yield baud_tick(self.RX_DIV)
-            
-            self.stop_simulation()
+    def test_rx_receive(self):
+        test_data = [0b10101010, 0b00110011, 0b11001110]
+        self.assertEqual(self.receive(bytearray(test_data)), test_data)
 
-        self.simulate([test, monitor])
+    def test_rx_receive_jitter(self):
+        rand = Random(1)
+        test_data = [rand.randrange(256) for _ in range(16)]
+        self.assertEqual(self.receive(bytearray(test_data),
+            jitter=self.BIT_TIME // 10), test_data)
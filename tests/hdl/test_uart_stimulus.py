@@ -0,0 +1,70 @@
+from unittest import TestCase
+from myhdl import Signal, Simulation, instance, now
+
+from fpgaedu.hdl import uart_transitions, UartStimulus
+
+class UartTransitionsTestCase(TestCase):
+
+    def test_levels(self):
+        transitions = uart_transitions(bytearray([0x0F, 0xFF]), 10)
+        self.assertEqual(transitions, [(0, True),
+            # start bit, 4 ones, 4 zeros
+            (0, False), (10, True), (50, False),
+            # stop bit, start bit, 8 ones and stop bit
+            (90, True), (100, False), (110, True), (200, True)])
+
+    def test_bits(self):
+        transitions = uart_transitions(bytearray([0x00]), 10, data_bits=7,
+                stop_bits=2, idle_bits=3)
+        self.assertEqual(transitions, [(0, True), (30, False), (110, True),
+            (130, True)])
+
+    def test_jitter(self):
+        data = bytearray(range(256))
+        exact = uart_transitions(data, 100)
+        jittered = uart_transitions(data, 100, jitter=20, seed=1)
+        self.assertEqual(len(exact), len(jittered))
+        self.assertNotEqual(exact, jittered)
+        self.assertEqual(jittered, uart_transitions(data, 100, jitter=20,
+            seed=1))
+        for (time, level), (jittered_time, jittered_level) in zip(
+                exact[1:-1], jittered[1:-1]):
+            self.assertEqual(level, jittered_level)
+            self.assertTrue(abs(time - jittered_time) <= 20)
+        times = [time for time, _ in jittered]
+        self.assertEqual(times, sorted(times))
+
+    def test_jitter_limit(self):
+        self.assertRaises(ValueError, uart_transitions, bytearray(1), 10,
+                jitter=5)
+
+class UartStimulusTestCase(TestCase):
+
+    def record(self, transitions, duration, repeat=False):
+        line = Signal(True)
+        changes = []
+
+        @instance
+        def monitor():
+            while True:
+                yield line
+                changes.append((now(), bool(line)))
+
+        sim = Simulation(UartStimulus(line, transitions, repeat=repeat),
+                monitor)
+        sim.run(duration, quiet=True)
+        sim.quit()
+        return changes
+
+    def test_replay(self):
+        transitions = uart_transitions(bytearray([0x0F]), 10, idle_bits=1)
+        self.assertEqual(self.record(transitions, 1000),
+                [(10, False), (20, True), (60, False), (100, True)])
+
+    def test_repeat(self):
+        transitions = uart_transitions(bytearray([0x0F]), 10)
+        self.assertEqual(self.record(transitions, 140, repeat=True),
+                [(0, False), (10, True), (50, False), (90, True),
+                (100, False), (110, True)])
+        self.assertRaises(ValueError, UartStimulus, Signal(True),
+                uart_transitions(bytearray(), 10), repeat=True)
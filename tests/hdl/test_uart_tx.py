@@ -21,7 +21,7 @@ class UartTxTestCase(TestCase):
     def setUp(self):
         
         self.clk = Signal(False)
-        self.reset = ResetSignal(True,active=False,async=True)
+        self.reset = ResetSignal(True,active=False,isasync=True)
         self.tx = Signal(False)
         self.tx_start = Signal(False)
         self.tx_busy = Signal(False)
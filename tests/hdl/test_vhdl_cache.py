@@ -0,0 +1,105 @@
+import os, shutil, tempfile
+from unittest import TestCase
+
+from fpgaedu.hdl import VhdlCache, hdl_sources
+
+class VhdlCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.output_dir = os.path.join(self.directory, 'output')
+        self.conversions = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def conversion(self, directory):
+        self.conversions += 1
+        with open(os.path.join(directory, 'top.vhd'), 'w') as f:
+            f.write('conversion %d' % self.conversions)
+
+    def read_output(self):
+        with open(os.path.join(self.output_dir, 'top.vhd')) as f:
+            return f.read()
+
+    def test_hdl_sources(self):
+        names = [os.path.basename(path) for path in hdl_sources()]
+        self.assertIn('_controllerspec.py', names)
+        self.assertIn('_uart_rx.py', names)
+        self.assertIn('_board_component.py', names)
+
+    def test_miss_then_hit(self):
+        cache = VhdlCache(self.cache_dir)
+        self.assertFalse(cache.convert('top', {'a': 1}, self.output_dir,
+            self.conversion))
+        os.remove(os.path.join(self.output_dir, 'top.vhd'))
+        self.assertTrue(cache.convert('top', {'a': 1}, self.output_dir,
+            self.conversion))
+
+        self.assertEqual(self.conversions, 1)
+        self.assertEqual(self.read_output(), 'conversion 1')
+        self.assertEqual(cache.hits, ['top'])
+        self.assertEqual(cache.misses, ['top'])
+        # Only the entry remains in the cache directory
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_key(self):
+        cache = VhdlCache(self.cache_dir)
+        self.assertEqual(cache.key('top', {'a': 1, 'b': 2}),
+                cache.key('top', {'b': 2, 'a': 1}))
+        self.assertNotEqual(cache.key('top', {'a': 1}),
+                cache.key('top', {'a': 2}))
+        self.assertNotEqual(cache.key('top', {'a': 1}),
+                cache.key('other', {'a': 1}))
+
+    def test_arguments_miss(self):
+        cache = VhdlCache(self.cache_dir)
+        cache.convert('top', {'a': 1}, self.output_dir, self.conversion)
+        self.assertFalse(cache.convert('top', {'a': 2}, self.output_dir,
+            self.conversion))
+        self.assertEqual(self.conversions, 2)
+
+    def test_sources_miss(self):
+        source = os.path.join(self.directory, 'script.py')
+        with open(source, 'w') as f:
+            f.write('WIDTH = 8\n')
+        VhdlCache(self.cache_dir, sources=[source]).convert('top', {},
+                self.output_dir, self.conversion)
+        with open(source, 'w') as f:
+            f.write('WIDTH = 16\n')
+        cache = VhdlCache(self.cache_dir, sources=[source])
+        self.assertFalse(cache.convert('top', {}, self.output_dir,
+            self.conversion))
+        self.assertEqual(self.conversions, 2)
+
+    def test_force(self):
+        VhdlCache(self.cache_dir).convert('top', {}, self.output_dir,
+                self.conversion)
+        cache = VhdlCache(self.cache_dir, force=True)
+        self.assertFalse(cache.convert('top', {}, self.output_dir,
+            self.conversion))
+        self.assertEqual(self.read_output(), 'conversion 2')
+
+        # The forced conversion replaced the entry
+        cache = VhdlCache(self.cache_dir)
+        cache.convert('top', {}, self.output_dir, self.conversion)
+        self.assertEqual(self.read_output(), 'conversion 2')
+
+    def test_failed_conversion(self):
+        def conversion(directory):
+            raise RuntimeError()
+
+        cache = VhdlCache(self.cache_dir)
+        with self.assertRaises(RuntimeError):
+            cache.convert('top', {}, self.output_dir, conversion)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        self.assertFalse(cache.convert('top', {}, self.output_dir,
+            self.conversion))
+
+    def test_report(self):
+        cache = VhdlCache(self.cache_dir)
+        cache.convert('top', {}, self.output_dir, self.conversion)
+        cache.convert('top', {}, self.output_dir, self.conversion)
+        self.assertTrue(cache.report().startswith(
+            'vhdl cache: 1 hits, 1 misses'))